@@ -3,16 +3,46 @@ AI Processor for Social Saver Bot
 Uses Groq for text tasks and Gemini for multimodal summaries.
 """
 
+import hashlib
+import json
 import mimetypes
 import os
+import random
 import re
 import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_for_futures
 from typing import Dict, Optional, Tuple
 
 import requests
 
+from cache import get_cache, make_key
+from category_classifier import confident_category
 from config import Config
+from rate_limit import CircuitBreaker, ProviderLimiter, parse_retry_after
+
+# Shared by every AIProcessor so all threads draw from the same provider quotas
+provider_limiters = {
+    'groq': ProviderLimiter(
+        'groq', Config.GROQ_REQUESTS_PER_MINUTE, Config.GROQ_TOKENS_PER_MINUTE,
+        Config.LLM_BREAKER_FAILURES, Config.LLM_BREAKER_RESET_SECONDS
+    ),
+    'gemini': ProviderLimiter(
+        'gemini', Config.GEMINI_REQUESTS_PER_MINUTE, Config.GEMINI_TOKENS_PER_MINUTE,
+        Config.LLM_BREAKER_FAILURES, Config.LLM_BREAKER_RESET_SECONDS
+    ),
+}
+
+
+def provider_stats() -> Dict[str, Dict]:
+    """Rate limit, retry and circuit breaker counters per LLM provider."""
+    return {name: limiter.stats() for name, limiter in provider_limiters.items()}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt size (~4 characters per token) for reserving tokens/min quota."""
+    return len(text or '') // 4 + 1
 
 
 class AIProcessor:
@@ -33,11 +63,119 @@ class AIProcessor:
         self.session = requests.Session()
         self.session.headers.update({'User-Agent': Config.USER_AGENT})
 
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Shared pool for running independent AI calls side by side."""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=Config.AI_MAX_WORKERS,
+                        thread_name_prefix='ai-task'
+                    )
+        return self._executor
+
+    def _llm_cache(self):
+        if not Config.LLM_CACHE_ENABLED:
+            return None
+        return get_cache('llm', Config.LLM_CACHE_MAX_ENTRIES, Config.LLM_CACHE_TTL_SECONDS)
+
+    def _llm_cache_key(self, provider: str, model: str, prompt: str, media_hash: str = '') -> str:
+        return make_key(provider, model, prompt, media_hash)
+
+    def _cached_response(self, cache_key: str) -> str | None:
+        cache = self._llm_cache()
+        return cache.get(cache_key) if cache else None
+
+    def _store_response(self, cache_key: str, text: str | None) -> None:
+        cache = self._llm_cache()
+        if cache and text:
+            cache.set(cache_key, text)
+
+    def _post_llm(self, provider: str, url: str, estimated_tokens: int, usage, **kwargs) -> Optional[Dict]:
+        """
+        POST to an LLM provider through its limiter and return the JSON body, or None.
+
+        429s, 5xx and network errors are retried up to LLM_MAX_ATTEMPTS times with
+        jittered exponential backoff; a 429's Retry-After pauses every caller of
+        that provider. Other errors are not retried. Only 5xx, network and bad
+        responses count towards the circuit breaker, since a 429 means the
+        provider is up but busy. usage(data) returns the tokens actually used.
+        """
+        limiter = provider_limiters[provider]
+        label = provider.capitalize()
+        error = None
+
+        for attempt in range(1, Config.LLM_MAX_ATTEMPTS + 1):
+            reserved = limiter.acquire(estimated_tokens, Config.LLM_MAX_WAIT_SECONDS)
+            if reserved < 0:
+                reason = 'circuit open' if limiter.breaker.state == CircuitBreaker.OPEN else 'rate limited'
+                print(f"{label} API skipped ({reason}): {error or 'using fallback'}")
+                return None
+
+            retry_after = None
+            try:
+                response = self.session.post(url, **kwargs)
+                response.raise_for_status()
+                data = response.json()
+            except requests.HTTPError as exc:
+                limiter.settle(reserved, 0)
+                error = exc
+                status = exc.response.status_code if exc.response is not None else 0
+                if status == 429:
+                    # The provider answered, so it is up: a 429 must not open the breaker,
+                    # and if this was the half-open trial call it closes it and frees the slot
+                    limiter.breaker.record_success()
+                    limiter.count('rate_limited')
+                    retry_after = parse_retry_after(exc.response.headers.get('Retry-After'))
+                    if retry_after:
+                        limiter.pause(retry_after)
+                elif status >= 500:
+                    limiter.breaker.record_failure()
+                    limiter.count('failures')
+                else:
+                    limiter.breaker.record_success()
+                    limiter.count('failures')
+                    print(f"{label} API error: {exc}")
+                    return None
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                limiter.settle(reserved, 0)
+                limiter.breaker.record_failure()
+                limiter.count('failures')
+                error = exc
+            except Exception as exc:
+                limiter.settle(reserved, 0)
+                limiter.breaker.record_failure()
+                limiter.count('failures')
+                print(f"{label} API error: {exc}")
+                return None
+            else:
+                limiter.breaker.record_success()
+                limiter.count('successes')
+                limiter.settle(reserved, usage(data))
+                return data
+
+            if attempt < Config.LLM_MAX_ATTEMPTS:
+                limiter.count('retries')
+                if retry_after is None:
+                    ceiling = min(Config.LLM_RETRY_MAX_DELAY, Config.LLM_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+                    time.sleep(random.uniform(0, ceiling))
+
+        print(f"{label} API error after {Config.LLM_MAX_ATTEMPTS} attempt(s): {error}")
+        return None
+
     def _call_groq(self, prompt: str) -> str | None:
         """Call Groq API in OpenAI-compatible format."""
         if not self.groq_api_key:
             return None
 
+        cache_key = self._llm_cache_key('groq', self.groq_model, prompt)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            return cached
+
         headers = {
             'Authorization': f'Bearer {self.groq_api_key}',
             'Content-Type': 'application/json'
@@ -50,44 +188,73 @@ class AIProcessor:
             'temperature': self.temperature
         }
 
-        try:
-            response = self.session.post(
-                f'{self.groq_base_url}/chat/completions',
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            response.raise_for_status()
-            data = response.json()
+        data = self._post_llm(
+            'groq',
+            f'{self.groq_base_url}/chat/completions',
+            estimate_tokens(prompt) + self.max_tokens,
+            lambda body: (body.get('usage') or {}).get('total_tokens'),
+            headers=headers,
+            json=payload,
+            timeout=30
+        )
+        if not data:
+            return None
 
+        try:
             if data.get('choices'):
-                return data['choices'][0]['message']['content'].strip()
+                text = data['choices'][0]['message']['content'].strip()
+                self._store_response(cache_key, text)
+                return text
             return None
         except Exception as exc:
             print(f"Groq API error: {exc}")
             return None
 
-    def _call_gemini(self, parts: list[dict], model: Optional[str] = None) -> str | None:
-        """Call Gemini generateContent with arbitrary parts."""
+    def _call_gemini(
+        self,
+        parts: list[dict],
+        model: Optional[str] = None,
+        media_hash: Optional[str] = None
+    ) -> str | None:
+        """
+        Call Gemini generateContent with arbitrary parts.
+
+        Responses are cached by prompt text plus media identity: media_hash when
+        the caller knows the content digest of an uploaded file (upload URIs
+        change on every upload), otherwise the file URIs themselves.
+        """
         if not self.gemini_api_key:
             return None
 
+        model = model or self.gemini_model
+        prompt = '\n'.join(part['text'] for part in parts if 'text' in part)
+        media_id = media_hash or '|'.join(
+            part['file_data'].get('file_uri', '') for part in parts if 'file_data' in part
+        )
+        cache_key = self._llm_cache_key('gemini', model, prompt, media_id)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            return cached
+
         headers = {
             'x-goog-api-key': self.gemini_api_key,
             'Content-Type': 'application/json'
         }
         payload = {'contents': [{'parts': parts}]}
 
-        try:
-            response = self.session.post(
-                f'{self.gemini_base_url}/models/{model or self.gemini_model}:generateContent',
-                headers=headers,
-                json=payload,
-                timeout=90
-            )
-            response.raise_for_status()
-            data = response.json()
+        data = self._post_llm(
+            'gemini',
+            f'{self.gemini_base_url}/models/{model}:generateContent',
+            estimate_tokens(prompt) + self.max_tokens,
+            lambda body: (body.get('usageMetadata') or {}).get('totalTokenCount'),
+            headers=headers,
+            json=payload,
+            timeout=90
+        )
+        if not data:
+            return None
 
+        try:
             candidates = data.get('candidates', [])
             if not candidates:
                 return None
@@ -98,6 +265,7 @@ class AIProcessor:
                     text_parts.append(part['text'])
 
             text = ' '.join(text_parts).strip()
+            self._store_response(cache_key, text)
             return text or None
         except Exception as exc:
             print(f"Gemini API error: {exc}")
@@ -310,45 +478,21 @@ class AIProcessor:
         model: str
     ) -> str | None:
         """Download remote media, upload it to Gemini, summarize, then clean up."""
-        downloaded = self._download_media_to_temp(
-            media_url=media_url,
-            fallback_suffix=fallback_suffix,
-            expected_prefix=expected_prefix
-        )
-        if not downloaded:
-            return None
-
-        temp_path, mime_type = downloaded
-        uploaded_file = None
+        with GeminiMediaSession(self, media_url, expected_prefix, fallback_suffix) as media_session:
+            return media_session.ask(prompt, model)
 
-        try:
-            uploaded_file = self._upload_file_to_gemini(
-                file_path=temp_path,
-                mime_type=mime_type,
-                display_name=os.path.basename(temp_path)
-            )
-            if not uploaded_file or not uploaded_file.get('uri'):
-                return None
+    def categorize_content(self, url: str, title: str, caption: str) -> str:
+        return self.categorize_content_with_source(url, title, caption)[0]
 
-            return self._call_gemini(
-                [
-                    {
-                        'file_data': {
-                            'mime_type': mime_type,
-                            'file_uri': uploaded_file['uri']
-                        }
-                    },
-                    {'text': prompt}
-                ],
-                model=model
-            )
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            if uploaded_file and uploaded_file.get('name'):
-                self._delete_gemini_file(uploaded_file['name'])
+    def categorize_content_with_source(self, url: str, title: str, caption: str) -> Tuple[str, str]:
+        """
+        (category, category_source): 'local' when the category classifier was
+        confident, 'ai' when Groq chose it, '' for the 'Other' fallback.
+        """
+        local = confident_category(url, title, caption)
+        if local:
+            return local, 'local'
 
-    def categorize_content(self, url: str, title: str, caption: str) -> str:
         categories_str = ', '.join(Config.DEFAULT_CATEGORIES)
         prompt = Config.CATEGORY_PROMPT.format(
             categories=categories_str,
@@ -358,12 +502,62 @@ class AIProcessor:
         )
         result = self._call_groq(prompt)
         if result:
-            result = result.strip()
-            for category in Config.DEFAULT_CATEGORIES:
-                if result.lower() == category.lower():
-                    return category
-            return result
-        return 'Other'
+            return self._match_category(result) or result.strip(), 'ai'
+        return 'Other', ''
+
+    def _match_category(self, value: str) -> Optional[str]:
+        """Canonical spelling of a known category, or None."""
+        value = value.strip().strip('"\'').lower()
+        for category in Config.DEFAULT_CATEGORIES:
+            if value == category.lower():
+                return category
+        return None
+
+    def analyze_metadata(self, url: str, title: str, caption: str, platform: str) -> Dict:
+        """
+        Category, metadata summary and tags from a single Groq call.
+
+        Only fields that pass validation are returned, so callers can fall back
+        to the per-field prompts for whatever is missing.
+        """
+        prompt = Config.FUSED_METADATA_PROMPT.format(
+            categories=', '.join(Config.DEFAULT_CATEGORIES),
+            url=url,
+            title=title or 'No title',
+            caption=caption or 'No caption',
+            platform=platform
+        )
+        result = self._call_groq(prompt)
+        if not result:
+            return {}
+
+        match = re.search(r'\{.*\}', result, re.DOTALL)
+        try:
+            data = json.loads(match.group(0)) if match else None
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            print("Fused metadata prompt returned no JSON object")
+            return {}
+
+        fields = {}
+        if isinstance(data.get('category'), str):
+            category = self._match_category(data['category'])
+            if category:
+                fields['category'] = category
+
+        if isinstance(data.get('summary'), str) and data['summary'].strip():
+            fields['summary'] = self._clean_summary(data['summary'], max_words=25)
+
+        tags = data.get('tags')
+        if isinstance(tags, list):
+            tags = ', '.join(str(tag) for tag in tags)
+        if isinstance(tags, str):
+            tags = self._normalize_tags(tags)
+            if tags:
+                fields['tags'] = tags
+
+        return fields
 
     def summarize_content(
         self,
@@ -373,11 +567,16 @@ class AIProcessor:
         platform: str,
         media_url: str = '',
         media_type: str = '',
-        image_url: str = ''
+        image_url: str = '',
+        media_session: 'GeminiMediaSession' = None,
+        metadata_summary: str = ''
     ) -> Tuple[str, str]:
         """
         Summarize content with the strongest available signal.
 
+        Pass media_session to reuse a video already uploaded for another prompt,
+        and metadata_summary to skip the metadata prompt when one is already known.
+
         Returns:
             (summary, summary_source)
         """
@@ -406,7 +605,11 @@ class AIProcessor:
                 if result:
                     return self._clean_summary(result, max_words=30), 'video'
 
-            if media_url:
+            if media_session:
+                result = media_session.ask(video_prompt, self.gemini_video_model)
+                if result:
+                    return self._clean_summary(result, max_words=30), 'video'
+            elif media_url:
                 result = self._summarize_uploaded_media(
                     media_url=media_url,
                     prompt=video_prompt,
@@ -428,10 +631,14 @@ class AIProcessor:
             if result:
                 return self._clean_summary(result, max_words=25), 'image'
 
-        result = self._call_groq(metadata_prompt)
+        result = metadata_summary or self._call_groq(metadata_prompt)
         if result:
             return self._clean_summary(result, max_words=25), 'metadata_no_video' if is_video_content else 'metadata'
 
+        return self._fallback_summary(title, caption, is_video_content)
+
+    def _fallback_summary(self, title: str, caption: str, is_video_content: bool) -> Tuple[str, str]:
+        """Summary built from metadata alone when no model produced one."""
         if title:
             return self._clean_summary(title, max_words=25), 'title_no_video' if is_video_content else 'title'
         if caption:
@@ -447,11 +654,20 @@ class AIProcessor:
         )
         result = self._call_groq(prompt)
         if result:
-            result = result.strip().lower()
-            result = result.replace('"', '').replace("'", '').replace('tags:', '').strip()
-            if len(result) >= 3:
+            result = self._normalize_tags(result)
+            if result:
                 return result
 
+        return self._fallback_tags(title, platform)
+
+    def _normalize_tags(self, value: str) -> str:
+        """Lowercase, unquoted tag list; empty if too short to be useful."""
+        value = value.strip().lower()
+        value = value.replace('"', '').replace("'", '').replace('tags:', '').strip()
+        return value if len(value) >= 3 else ''
+
+    def _fallback_tags(self, title: str, platform: str) -> str:
+        """Tags built from title words when the model gave none."""
         if title:
             words = title.lower().split()
             tags = [word.strip('.,!?;:') for word in words if len(word) > 3][:10]
@@ -465,7 +681,8 @@ class AIProcessor:
         caption: str,
         platform: str,
         media_url: str = '',
-        media_type: str = ''
+        media_type: str = '',
+        media_session: 'GeminiMediaSession' = None
     ) -> Tuple[str, str]:
         """Generate a detailed multi-sentence video summary using Gemini."""
         if media_type not in ('video', 'reel'):
@@ -493,15 +710,18 @@ class AIProcessor:
             if result:
                 return self._clean_summary(result, max_words=80, complete_sentences=True), 'available'
 
-        # Other platforms: upload the media file
+        # Other platforms: upload the media file (or reuse the shared upload)
         if not result and media_url:
-            result = self._summarize_uploaded_media(
-                media_url=media_url,
-                prompt=prompt,
-                expected_prefix='video/',
-                fallback_suffix='.mp4',
-                model=self.gemini_video_model
-            )
+            if media_session:
+                result = media_session.ask(prompt, self.gemini_video_model)
+            else:
+                result = self._summarize_uploaded_media(
+                    media_url=media_url,
+                    prompt=prompt,
+                    expected_prefix='video/',
+                    fallback_suffix='.mp4',
+                    model=self.gemini_video_model
+                )
             if result:
                 return self._clean_summary(result, max_words=80, complete_sentences=True), 'available'
 
@@ -518,33 +738,64 @@ class AIProcessor:
         platform: str,
         media_url: str = '',
         media_type: str = '',
-        image_url: str = ''
+        image_url: str = '',
+        defer_video: bool = False
     ) -> Dict:
-        """Run AI tasks and return a structured result."""
-        category = self.categorize_content(url, title, caption)
-        summary, summary_source = self.summarize_content(
-            url=url,
-            title=title,
-            caption=caption,
-            platform=platform,
-            media_url=media_url,
-            media_type=media_type,
-            image_url=image_url
-        )
-        tags = self.extract_tags(url, title, caption, platform)
+        """
+        Run AI tasks and return a structured result.
 
-        # Generate detailed video summary for video/reel content
-        video_summary, video_summary_status = self.generate_video_summary(
-            url=url,
-            title=title,
-            caption=caption,
-            platform=platform,
-            media_url=media_url,
-            media_type=media_type
-        )
+        With defer_video, a video save only gets the quick text pass here (no media
+        download or upload) and video_summary_status 'video_analysis_pending';
+        the caller then runs analyze_video() in the background.
+        """
+        if defer_video and self.gemini_api_key and media_type in {'video', 'reel'}:
+            result = self.process_content(url, title, caption, platform)
+            result['video_summary_status'] = 'video_analysis_pending'
+            return result
+
+        if Config.AI_CONCURRENT:
+            return self._process_content_concurrently(
+                url, title, caption, platform, media_url, media_type, image_url
+            )
+
+        metadata = self.analyze_metadata(url, title, caption, platform) if Config.AI_FUSED_PROMPT else {}
+
+        media_session = self._open_media_session(media_url, media_type)
+        try:
+            if metadata.get('category'):
+                category, category_source = metadata['category'], 'ai'
+            else:
+                category, category_source = self.categorize_content_with_source(url, title, caption)
+            summary, summary_source = self.summarize_content(
+                url=url,
+                title=title,
+                caption=caption,
+                platform=platform,
+                media_url=media_url,
+                media_type=media_type,
+                image_url=image_url,
+                media_session=media_session,
+                metadata_summary=metadata.get('summary', '')
+            )
+            tags = metadata.get('tags') or self.extract_tags(url, title, caption, platform)
+
+            # Generate detailed video summary for video/reel content
+            video_summary, video_summary_status = self.generate_video_summary(
+                url=url,
+                title=title,
+                caption=caption,
+                platform=platform,
+                media_url=media_url,
+                media_type=media_type,
+                media_session=media_session
+            )
+        finally:
+            if media_session:
+                media_session.close()
 
         return {
             'category': category,
+            'category_source': category_source,
             'summary': summary,
             'summary_source': summary_source,
             'video_summary': video_summary,
@@ -553,6 +804,174 @@ class AIProcessor:
         }
 
 
+    def analyze_video(
+        self,
+        url: str,
+        title: str,
+        caption: str,
+        platform: str,
+        media_url: str = '',
+        media_type: str = 'video'
+    ) -> Dict:
+        """
+        Second phase of a deferred save: the video-based short summary and the
+        detailed video summary, sharing one upload. 'summary' is empty unless
+        the video itself could be summarized.
+        """
+        media_session = self._open_media_session(media_url, media_type)
+        try:
+            summary, summary_source = self.summarize_content(
+                url=url,
+                title=title,
+                caption=caption,
+                platform=platform,
+                media_url=media_url,
+                media_type=media_type,
+                media_session=media_session
+            )
+            video_summary, video_summary_status = self.generate_video_summary(
+                url=url,
+                title=title,
+                caption=caption,
+                platform=platform,
+                media_url=media_url,
+                media_type=media_type,
+                media_session=media_session
+            )
+        finally:
+            if media_session:
+                media_session.close()
+
+        if summary_source != 'video':
+            summary, summary_source = '', ''
+        return {
+            'summary': summary,
+            'summary_source': summary_source,
+            'video_summary': video_summary,
+            'video_summary_status': video_summary_status
+        }
+
+    def _open_media_session(self, media_url: str, media_type: str) -> Optional['GeminiMediaSession']:
+        """Shared Gemini upload for video saves; nothing is downloaded until a prompt needs it."""
+        if not (self.gemini_api_key and media_url and media_type in {'video', 'reel'}):
+            return None
+        return GeminiMediaSession(self, media_url)
+
+    def _process_content_concurrently(
+        self,
+        url: str,
+        title: str,
+        caption: str,
+        platform: str,
+        media_url: str = '',
+        media_type: str = '',
+        image_url: str = '',
+        deadline_seconds: float = None
+    ) -> Dict:
+        """
+        Run the independent AI tasks side by side under one overall deadline.
+
+        Any task that fails or is still running at the deadline is replaced by the
+        same fallback the sequential path would produce, so a slow video analysis
+        never blocks the category, summary and tags that did come back.
+        """
+        is_video_content = media_type in {'video', 'reel'}
+        executor = self._get_executor()
+
+        # Both video prompts share one download/upload; the session is released
+        # once each task using it has finished, even if that is after the deadline.
+        media_session = self._open_media_session(media_url, media_type)
+
+        # In fused mode one Groq call answers category, summary and tags; each task
+        # waits for it (it was queued first) and only prompts for a missing field.
+        metadata_future = None
+        if Config.AI_FUSED_PROMPT:
+            metadata_future = executor.submit(self.analyze_metadata, url, title, caption, platform)
+
+        def fused(field: str) -> str:
+            if metadata_future is None:
+                return ''
+            try:
+                return metadata_future.result().get(field, '')
+            except Exception as exc:
+                print(f"Fused metadata prompt failed: {exc}")
+                return ''
+
+        def category_with_source() -> Tuple[str, str]:
+            category = fused('category')
+            return (category, 'ai') if category else self.categorize_content_with_source(url, title, caption)
+
+        futures = {
+            'category': executor.submit(category_with_source),
+            'summary': executor.submit(
+                lambda: self.summarize_content(
+                    url=url,
+                    title=title,
+                    caption=caption,
+                    platform=platform,
+                    media_url=media_url,
+                    media_type=media_type,
+                    image_url=image_url,
+                    media_session=media_session,
+                    metadata_summary=fused('summary')
+                )
+            ),
+            'tags': executor.submit(
+                lambda: fused('tags') or self.extract_tags(url, title, caption, platform)
+            ),
+            'video_summary': executor.submit(
+                self.generate_video_summary,
+                url=url,
+                title=title,
+                caption=caption,
+                platform=platform,
+                media_url=media_url,
+                media_type=media_type,
+                media_session=media_session
+            ),
+        }
+        if media_session:
+            for name in ('summary', 'video_summary'):
+                media_session.hold()
+                futures[name].add_done_callback(lambda _: media_session.close())
+            media_session.close()
+        fallbacks = {
+            'category': lambda: ('Other', ''),
+            'summary': lambda: self._fallback_summary(title, caption, is_video_content),
+            'tags': lambda: self._fallback_tags(title, platform),
+            'video_summary': lambda: ('', 'video_analysis_timeout' if is_video_content else ''),
+        }
+
+        deadline = Config.AI_PROCESS_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds
+        done, _ = wait_for_futures(futures.values(), timeout=deadline)
+
+        results = {}
+        for name, future in futures.items():
+            if future in done and future.exception() is None:
+                results[name] = future.result()
+                continue
+
+            if future in done:
+                print(f"AI task '{name}' failed: {future.exception()}")
+            else:
+                future.cancel()
+                print(f"AI task '{name}' missed the {deadline}s deadline, using fallback")
+            results[name] = fallbacks[name]()
+
+        category, category_source = results['category']
+        summary, summary_source = results['summary']
+        video_summary, video_summary_status = results['video_summary']
+
+        return {
+            'category': category,
+            'category_source': category_source,
+            'summary': summary,
+            'summary_source': summary_source,
+            'video_summary': video_summary,
+            'video_summary_status': video_summary_status,
+            'tags': results['tags']
+        }
+
     def rag_answer(self, question: str, context: str) -> str:
         """Answer a question using saved content as context."""
         prompt = Config.RAG_PROMPT.format(
@@ -628,6 +1047,143 @@ class AIProcessor:
         return bool(self.groq_api_key or self.gemini_api_key)
 
 
+class GeminiMediaSession:
+    """
+    One downloaded and uploaded media file that several prompts can reuse.
+
+    The media is downloaded and hashed by the first ask(); prompts already in
+    the response cache for that digest are answered without uploading. The
+    first cache miss uploads the file once and later asks (from any thread) run
+    against the same Gemini file URI. close() deletes the temp file and the
+    Gemini upload once every hold() has been matched by a close().
+    """
+
+    def __init__(
+        self,
+        processor: AIProcessor,
+        media_url: str,
+        expected_prefix: str = 'video/',
+        fallback_suffix: str = '.mp4'
+    ):
+        self.processor = processor
+        self.media_url = media_url
+        self.expected_prefix = expected_prefix
+        self.fallback_suffix = fallback_suffix
+        self.mime_type = ''
+        self.media_hash = None
+        self.uploaded_file = None
+        self._temp_path = None
+        self._downloaded = False
+        self._uploaded = False
+        self._closed = False
+        self._refs = 1
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'GeminiMediaSession':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def hold(self) -> None:
+        with self._lock:
+            self._refs += 1
+
+    def _download(self) -> Optional[str]:
+        """Download the media once; returns its SHA-256 digest or None."""
+        with self._lock:
+            if self._downloaded or self._closed:
+                return self.media_hash
+            self._downloaded = True
+
+            downloaded = self.processor._download_media_to_temp(
+                media_url=self.media_url,
+                fallback_suffix=self.fallback_suffix,
+                expected_prefix=self.expected_prefix
+            )
+            if not downloaded:
+                return None
+
+            self._temp_path, self.mime_type = downloaded
+            digest = hashlib.sha256()
+            with open(self._temp_path, 'rb') as handle:
+                for chunk in iter(lambda: handle.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            self.media_hash = digest.hexdigest()
+            return self.media_hash
+
+    def _upload(self) -> Optional[Dict]:
+        """Upload the downloaded media once; returns the Gemini file info or None."""
+        with self._lock:
+            if self._uploaded or self._closed or not self._temp_path:
+                return self.uploaded_file
+            self._uploaded = True
+
+            temp_path, self._temp_path = self._temp_path, None
+            try:
+                uploaded_file = self.processor._upload_file_to_gemini(
+                    file_path=temp_path,
+                    mime_type=self.mime_type,
+                    display_name=os.path.basename(temp_path)
+                )
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+            if uploaded_file and uploaded_file.get('uri'):
+                self.uploaded_file = uploaded_file
+            elif uploaded_file and uploaded_file.get('name'):
+                self.processor._delete_gemini_file(uploaded_file['name'])
+            return self.uploaded_file
+
+    def ask(self, prompt: str, model: str) -> str | None:
+        media_hash = self._download()
+        if not media_hash:
+            return None
+
+        cached = self.processor._cached_response(
+            self.processor._llm_cache_key('gemini', model, prompt, media_hash)
+        )
+        if cached is not None:
+            return cached
+
+        if provider_limiters['gemini'].breaker.state == CircuitBreaker.OPEN:
+            provider_limiters['gemini'].count('short_circuited')
+            return None  # no point uploading media while Gemini is failing
+
+        uploaded_file = self._upload()
+        if not uploaded_file:
+            return None
+
+        return self.processor._call_gemini(
+            [
+                {
+                    'file_data': {
+                        'mime_type': self.mime_type,
+                        'file_uri': uploaded_file['uri']
+                    }
+                },
+                {'text': prompt}
+            ],
+            model=model,
+            media_hash=media_hash
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._refs -= 1
+            if self._refs > 0 or self._closed:
+                return
+            self._closed = True
+            uploaded_file, self.uploaded_file = self.uploaded_file, None
+            temp_path, self._temp_path = self._temp_path, None
+
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        if uploaded_file and uploaded_file.get('name'):
+            self.processor._delete_gemini_file(uploaded_file['name'])
+
+
 ai_processor = AIProcessor()
 
 
@@ -643,8 +1199,8 @@ def extract_tags(url, title, caption, platform):
     return ai_processor.extract_tags(url, title, caption, platform)
 
 
-def process_content(url, title, caption, platform, media_url='', media_type='', image_url=''):
-    return ai_processor.process_content(url, title, caption, platform, media_url, media_type, image_url)
+def process_content(url, title, caption, platform, media_url='', media_type='', image_url='', defer_video=False):
+    return ai_processor.process_content(url, title, caption, platform, media_url, media_type, image_url, defer_video)
 
 
 def rag_answer(question, context):
@@ -6,28 +6,88 @@ Flask web app with WhatsApp webhook integration
 import os
 import re
 import threading
+import time
 from flask import Flask, render_template, request, jsonify, redirect, url_for, make_response
 from twilio.twiml.messaging_response import MessagingResponse
-from twilio.rest import Client
-from config import Config, get_config, is_valid_url, detect_platform
+from config import Config, get_config, is_valid_url, detect_platform, canonicalize_url
 from database import (
-    init_db, save_content, get_all_content, get_content_by_id,
+    init_db, save_content, save_contents_many, get_all_content, get_content_by_id,
     get_categories, get_platforms, get_stats, get_random_content,
     search_content, delete_content, update_content, check_duplicate,
     get_random_content_by_category, get_related_content,
     get_content_count_by_category, get_total_content_count, get_streak_stats,
     get_collections, create_collection, assign_collection, delete_collection,
-    get_daily_save_counts
+    get_daily_save_counts, next_page_cursor, get_job, iter_content_rows,
+    add_job_watcher, close_job_watchers, claim_message_sid, release_message_sid, purge_processed_messages,
+    set_canonical_url
 )
-from content_extractor import extract_content
-from ai_processor import process_content, ai_processor
+from content_extractor import extract_content, extract_many, resolve_short_link
+from ai_processor import process_content, ai_processor, provider_stats
+from job_queue import JobQueue, job_queue
+from cache import cache_stats
+from messaging import outbound_queue, queue_message, record_delivery_status, is_configured as twilio_configured
+from semantic_index import semantic_index, semantic_search
+import near_duplicates
+from near_duplicates import find_near_duplicate, flag_possible_duplicate
+from library_io import CSV_FIELDS, export_fields, iter_ndjson, write_parquet, parquet_available, import_ndjson, import_parquet
 
 # Create Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = Config.SECRET_KEY
 
-# Initialize database
-init_db()
+# Phase two of video saves (Gemini analysis) runs on its own small pool so it
+# never holds up the workers that answer new saves
+video_queue = JobQueue(workers=Config.VIDEO_ANALYSIS_WORKERS, poll_interval=Config.JOB_POLL_INTERVAL, name='video')
+
+# Bulk-save enrichment gets its own pool too, so a large import cannot starve live saves
+enrich_queue = JobQueue(workers=Config.BULK_ENRICH_WORKERS, poll_interval=Config.JOB_POLL_INTERVAL, name='enrich')
+
+
+_started_up = False
+_startup_lock = threading.Lock()
+
+
+def startup() -> None:
+    """
+    One-time setup for the serving process: migrate the database, then queue the index backfills.
+
+    Nothing here runs at import time. The yt-dlp pool's spawned workers re-import
+    the main script (app.py under `python app.py`) as __mp_main__, and must not
+    touch the database or start job workers.
+    """
+    global _started_up
+    with _startup_lock:
+        if _started_up:
+            return
+        init_db()
+        _started_up = True
+    queue_index_backfill()
+
+
+@app.before_request
+def start_background_jobs():
+    """Initialize on the first request, then start the job workers (and recover unfinished jobs)."""
+    startup()
+    job_queue.start()
+    outbound_queue.start()
+    video_queue.start()
+    enrich_queue.start()
+
+
+def queue_index_backfill() -> None:
+    """Index saves that skipped the save hooks (older rows, imports) in the background."""
+    enrich_queue.enqueue('semantic_backfill', {}, dedupe_key='semantic_backfill')
+    enrich_queue.enqueue('near_duplicate_backfill', {}, dedupe_key='near_duplicate_backfill')
+
+
+def run_semantic_backfill_job(payload: dict, job: dict) -> dict:
+    """Job handler: embed every save that has no vector yet, so ask: never does it inline."""
+    return {'embedded': semantic_index.sync()}
+
+
+def run_near_duplicate_backfill_job(payload: dict, job: dict) -> dict:
+    """Job handler: MinHash every save missing from the band table, off the save path."""
+    return {'indexed': near_duplicates.backfill()}
 
 
 # ==================== Dashboard Routes ====================
@@ -53,20 +113,18 @@ def dashboard():
     category = request.args.get('category', '')
     # Read the search query and pass it to template
     search_query = request.args.get('q', '').strip()
+    cursor = request.args.get('cursor', '')
 
     limit = Config.ITEMS_PER_PAGE
     offset = (page - 1) * limit
+    next_cursor = None
 
     # If search query exists, use search_content instead of get_all_content
     if search_query:
         content = search_content(search_query, limit=limit)
     else:
-        content = get_all_content(
-            limit=limit,
-            offset=offset,
-            platform=platform if platform else None,
-            category=category if category else None
-        )
+        content = _get_content_page(limit, offset, platform, category, cursor)
+        next_cursor = next_page_cursor(content, limit)
 
     stats = get_stats()
     categories = get_categories()
@@ -82,6 +140,7 @@ def dashboard():
         platforms=platforms,
         current_page=page,
         total_pages=total_pages,
+        next_cursor=next_cursor,
         selected_platform=platform,
         selected_category=category,
         search_query=search_query,
@@ -138,19 +197,17 @@ def discover():
     platform = request.args.get('platform', '')
     category = request.args.get('category', '')
     search_query = request.args.get('q', '').strip()
+    cursor = request.args.get('cursor', '')
     
     limit = Config.ITEMS_PER_PAGE
     offset = (page - 1) * limit
+    next_cursor = None
     
     if search_query:
         content = search_content(search_query, limit=limit)
     else:
-        content = get_all_content(
-            limit=limit,
-            offset=offset,
-            platform=platform if platform else None,
-            category=category if category else None
-        )
+        content = _get_content_page(limit, offset, platform, category, cursor)
+        next_cursor = next_page_cursor(content, limit)
     
     stats = get_stats()
     categories = get_categories()
@@ -166,6 +223,7 @@ def discover():
         platforms=platforms,
         current_page=page,
         total_pages=total_pages,
+        next_cursor=next_cursor,
         selected_platform=platform,
         selected_category=category,
         search_query=search_query,
@@ -173,30 +231,55 @@ def discover():
     )
 
 
+def _get_content_page(limit: int, offset: int, platform: str, category: str, cursor: str) -> list:
+    """Fetch one listing page, preferring the keyset cursor and falling back to offset."""
+    try:
+        return get_all_content(
+            limit=limit,
+            offset=offset,
+            platform=platform if platform else None,
+            category=category if category else None,
+            cursor=cursor or None
+        )
+    except ValueError:
+        return get_all_content(
+            limit=limit,
+            offset=offset,
+            platform=platform if platform else None,
+            category=category if category else None
+        )
+
+
 # ==================== API Routes ====================
 
 @app.route('/api/content', methods=['GET'])
 def api_get_content():
-    """API: Get all content with filters"""
+    """API: Get all content with filters (page-based or cursor-based)"""
     page = request.args.get('page', 1, type=int)
     platform = request.args.get('platform', '')
     category = request.args.get('category', '')
+    cursor = request.args.get('cursor', '')
 
     limit = request.args.get('limit', Config.ITEMS_PER_PAGE, type=int)
     offset = (page - 1) * limit
 
-    content = get_all_content(
-        limit=limit,
-        offset=offset,
-        platform=platform if platform else None,
-        category=category if category else None
-    )
+    try:
+        content = get_all_content(
+            limit=limit,
+            offset=offset,
+            platform=platform if platform else None,
+            category=category if category else None,
+            cursor=cursor or None
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
 
     return jsonify({
         'success': True,
         'data': content,
         'page': page,
-        'limit': limit
+        'limit': limit,
+        'next_cursor': next_page_cursor(content, limit)
     })
 
 
@@ -213,14 +296,69 @@ def api_save_content():
     if not is_valid_url(url):
         return jsonify({'success': False, 'error': 'Invalid URL'}), 400
 
+    # Concurrent saves of the same link by the same user share one job; another
+    # user's save gets its own job, so their user_phone is not dropped
+    user_phone = data.get('user_phone')
+    canonical_url = canonicalize_url(resolve_short_link(url, network=False))
+    job_id = job_queue.enqueue(
+        'save_url',
+        {'url': url, 'user_phone': user_phone},
+        dedupe_key=f"{canonical_url} {user_phone or ''}"
+    )
+    job = job_queue.wait(job_id, Config.JOB_SYNC_WAIT_SECONDS)
+    if not job or job['status'] != 'done':
+        return job_pending_response(job_id, job)
+
+    result = job['result'] or {}
+    if result.get('error'):
+        return jsonify({'success': False, 'error': result['error']}), 400
+
+    content = get_content_by_id(result['content_id'])
+    if not content:
+        return jsonify({'success': False, 'error': 'Content not found'}), 404
+    response = {'success': True, 'data': content, 'duplicate': bool(result.get('duplicate'))}
+    for key in ('possible_duplicate_of', 'video_job_id'):
+        if result.get(key):
+            response[key] = result[key]
+    return jsonify(response)
+
+
+def llm_duplicate_check(url: str, title: str, caption: str):
+    """Tie-breaker for borderline near-duplicates: asks the LLM (None when AI is not configured)."""
+    if not ai_processor.is_configured():
+        return None
+
+    def confirm(existing: dict) -> bool:
+        return ai_processor.check_duplicate(
+            existing.get('title') or '', existing.get('summary') or existing.get('caption') or '',
+            existing.get('url') or '', title, caption, url
+        )
+    return confirm
+
+
+def run_save_url_job(payload: dict, job: dict) -> dict:
+    """Job handler: extract, enrich and save a URL submitted through the API."""
+    url = payload['url']
+    resolved_url = resolve_short_link(url)
+
+    existing = check_duplicate(resolved_url)
+    if existing:
+        return {'content_id': existing['id'], 'duplicate': True}
+
     # Extract content
     extracted = extract_content(url)
 
     if not extracted.get('success'):
-        return jsonify({'success': False, 'error': extracted.get('error', 'Failed to extract content')}), 400
+        return {'error': extracted.get('error', 'Failed to extract content')}
 
     title = extracted.get('title', '')
     caption = extracted.get('caption', '')
+
+    near_duplicate = find_near_duplicate(url, title, caption, confirm=llm_duplicate_check(url, title, caption),
+                                         user_phone=payload.get('user_phone'))
+    if near_duplicate and not near_duplicate['borderline']:
+        return {'content_id': near_duplicate['id'], 'duplicate': True, 'near_duplicate': True}
+
     platform = extracted.get('platform', detect_platform(url))
     image_url = extracted.get('image_url', '')
     media_url = extracted.get('media_url', '')
@@ -231,7 +369,8 @@ def api_save_content():
     ai_result = {}
     if ai_processor.is_configured():
         try:
-            ai_result = process_content(url, title, caption, platform, media_url, media_type, image_url)
+            ai_result = process_content(url, title, caption, platform, media_url, media_type, image_url,
+                                        defer_video=Config.DEFER_VIDEO_ANALYSIS)
         except Exception as e:
             print(f"AI processing error: {e}")
             ai_result = {'category': 'Other', 'summary': '', 'summary_source': '', 'video_summary': '', 'video_summary_status': '', 'tags': ''}
@@ -249,15 +388,149 @@ def api_save_content():
         category=ai_result.get('category', 'Other'),
         summary=ai_result.get('summary', ''),
         summary_source=ai_result.get('summary_source', ''),
+        category_source=ai_result.get('category_source', ''),
         video_summary=ai_result.get('video_summary', ''),
         video_summary_status=ai_result.get('video_summary_status', ''),
-        tags=ai_result.get('tags', ''),
-        user_phone=data.get('user_phone')
+        tags=flag_possible_duplicate(ai_result.get('tags', ''), near_duplicate),
+        user_phone=payload.get('user_phone'),
+        canonical_url=canonicalize_url(resolved_url)
     )
-    content = get_content_by_id(content_id)
-    if not content:
-        return jsonify({'success': False, 'error': 'Content not found'}), 404
-    return jsonify({'success': True, 'data': content})
+    result = {'content_id': content_id}
+    if near_duplicate:
+        result['possible_duplicate_of'] = near_duplicate['id']
+    if ai_result.get('video_summary_status') == 'video_analysis_pending':
+        result['video_job_id'] = queue_video_analysis(content_id, media_url, media_type)
+    return result
+
+
+@app.route('/api/content/bulk', methods=['POST'])
+def api_bulk_save_content():
+    """API: Save many URLs at once; extraction and AI enrichment run in the background"""
+    data = request.get_json(silent=True) or {}
+    urls = data.get('urls')
+
+    if not isinstance(urls, list) or not urls:
+        return jsonify({'success': False, 'error': 'urls must be a non-empty list'}), 400
+    if len(urls) > Config.BULK_SAVE_MAX_URLS:
+        return jsonify({
+            'success': False,
+            'error': f'At most {Config.BULK_SAVE_MAX_URLS} URLs per request'
+        }), 400
+
+    valid_urls, invalid_urls = [], []
+    for url in urls:
+        url = str(url).strip()
+        (valid_urls if is_valid_url(url) else invalid_urls).append(url)
+
+    # Rows are saved right away as placeholders (title = URL) and filled in by enrich_content jobs
+    items = [{
+        'url': url,
+        'canonical_url': canonicalize_url(resolve_short_link(url, network=False)),
+        'platform': detect_platform(url),
+        'title': url,
+        'category': 'Other',
+        'summary_source': 'pending',
+        'user_phone': data.get('user_phone')
+    } for url in valid_urls]
+    results = save_contents_many(items) if items else []
+
+    created = [{'url': url, 'id': content_id} for url, (content_id, is_new) in zip(valid_urls, results) if is_new]
+    duplicates = [{'url': url, 'id': content_id} for url, (content_id, is_new) in zip(valid_urls, results) if not is_new]
+
+    new_ids = [item['id'] for item in created]
+    batch_size = max(1, Config.BULK_ENRICH_BATCH_SIZE)
+    batches = [{'content_ids': new_ids[start:start + batch_size]} for start in range(0, len(new_ids), batch_size)]
+    job_ids = enrich_queue.enqueue_many('enrich_content', batches) if batches else []
+
+    return jsonify({
+        'success': True,
+        'created': created,
+        'duplicates': duplicates,
+        'invalid': invalid_urls,
+        'job_ids': job_ids
+    }), 202
+
+
+def run_enrich_content_job(payload: dict, job: dict) -> dict:
+    """Job handler: extract and AI-enrich a batch of placeholder rows from a bulk save."""
+    items = [get_content_by_id(content_id) for content_id in payload['content_ids']]
+    # Skip rows a previous attempt of this job already finished
+    items = [item for item in items if item and item.get('summary_source') == 'pending']
+    if not items:
+        return {'enriched': 0, 'failed': 0}
+
+    # Placeholders were keyed on the unresolved link; resolve short links now
+    # so check_duplicate finds these rows by their target URL
+    for item in items:
+        canonical_url = canonicalize_url(resolve_short_link(item['url']))
+        if canonical_url != item['canonical_url']:
+            original_id = set_canonical_url(item['id'], canonical_url)
+            if original_id is not None:
+                print(f"Bulk save {item['id']} duplicates content {original_id}")
+
+    extracted_items = extract_many([item['url'] for item in items])
+
+    enriched = 0
+    for item, extracted in zip(items, extracted_items):
+        if not extracted.get('success'):
+            update_content(
+                content_id=item['id'],
+                media_extraction_status='extraction_failed',
+                media_extraction_error=extracted.get('error', 'Failed to extract content'),
+                summary_source=''
+            )
+            continue
+
+        url = item['url']
+        title = extracted.get('title', '') or url
+        caption = extracted.get('caption', '')
+        platform = extracted.get('platform', item['platform'])
+        image_url = extracted.get('image_url', '')
+        media_url = extracted.get('media_url', '')
+        media_type = extracted.get('media_type', '')
+
+        ai_result = {'category': 'Other', 'summary': '', 'summary_source': '', 'video_summary': '', 'video_summary_status': '', 'tags': ''}
+        if ai_processor.is_configured():
+            try:
+                ai_result = process_content(url, title, caption, platform, media_url, media_type, image_url,
+                                            defer_video=Config.DEFER_VIDEO_ANALYSIS)
+            except Exception as e:
+                print(f"AI processing error for content {item['id']}: {e}")
+
+        update_content(
+            content_id=item['id'],
+            platform=platform,
+            title=title,
+            caption=caption,
+            image_url=image_url,
+            media_extraction_status=extracted.get('media_extraction_status', ''),
+            media_extraction_error=extracted.get('media_extraction_error', ''),
+            category=ai_result.get('category', 'Other'),
+            summary=ai_result.get('summary', ''),
+            summary_source=ai_result.get('summary_source', ''),
+            category_source=ai_result.get('category_source', ''),
+            video_summary=ai_result.get('video_summary', ''),
+            video_summary_status=ai_result.get('video_summary_status', ''),
+            tags=ai_result.get('tags', '')
+        )
+        if ai_result.get('video_summary_status') == 'video_analysis_pending':
+            queue_video_analysis(item['id'], media_url, media_type)
+        enriched += 1
+
+    return {'enriched': enriched, 'failed': len(items) - enriched}
+
+
+def job_pending_response(job_id: int, job: dict):
+    """Response for a job that did not finish within the synchronous wait window."""
+    if job and job['status'] == 'dead':
+        return jsonify({'success': False, 'error': job.get('last_error') or 'Job failed', 'job_id': job_id}), 500
+    return jsonify({
+        'success': True,
+        'queued': True,
+        'job_id': job_id,
+        'status': job['status'] if job else 'queued',
+        'status_url': f'/api/jobs/{job_id}'
+    }), 202
 
 
 @app.route('/api/content/<int:content_id>', methods=['PUT'])
@@ -270,6 +543,7 @@ def api_update_content(content_id):
         title=data.get('title'),
         caption=data.get('caption'),
         category=data.get('category'),
+        category_source='user' if data.get('category') is not None else None,
         summary=data.get('summary'),
         tags=data.get('tags')
     )
@@ -280,9 +554,30 @@ def api_update_content(content_id):
 @app.route('/api/content/<int:content_id>/regenerate', methods=['POST'])
 def api_regenerate_ai(content_id):
     """API: Regenerate AI content (category, summary, tags) for existing item"""
+    if not get_content_by_id(content_id):
+        return jsonify({'success': False, 'error': 'Content not found'}), 404
+
+    return run_content_job('regenerate_ai', content_id)
+
+
+def run_content_job(kind: str, content_id: int):
+    """Queue a per-item job and answer with its result if it finishes in time."""
+    job_id = job_queue.enqueue(kind, {'content_id': content_id})
+    job = job_queue.wait(job_id, Config.JOB_SYNC_WAIT_SECONDS)
+    if not job or job['status'] != 'done':
+        return job_pending_response(job_id, job)
+
+    result = dict(job['result'] or {})
+    status_code = result.pop('status_code', 200)
+    return jsonify(result), status_code
+
+
+def run_regenerate_ai_job(payload: dict, job: dict) -> dict:
+    """Job handler: re-extract an item and regenerate its category, summary and tags."""
+    content_id = payload['content_id']
     content = get_content_by_id(content_id)
     if not content:
-        return jsonify({'success': False, 'error': 'Content not found'}), 404
+        return {'success': False, 'error': 'Content not found', 'status_code': 404}
 
     print(f"\n=== Regenerating AI for content ID {content_id} ===")
 
@@ -347,6 +642,7 @@ def api_regenerate_ai(content_id):
         category=ai_result.get('category', 'Other'),
         summary=ai_result.get('summary', ''),
         summary_source=ai_result.get('summary_source', ''),
+        category_source=ai_result.get('category_source', ''),
         video_summary=ai_result.get('video_summary', ''),
         video_summary_status=ai_result.get('video_summary_status', ''),
         tags=ai_result.get('tags', '')
@@ -356,16 +652,25 @@ def api_regenerate_ai(content_id):
     ai_result['media_extraction_status'] = media_extraction_status
     ai_result['media_extraction_error'] = media_extraction_error
 
-    return jsonify({'success': success, 'data': ai_result})
+    return {'success': success, 'data': ai_result}
 
 
 @app.route('/api/content/<int:content_id>/video-summary', methods=['POST'])
 def api_regenerate_video_summary(content_id):
     """API: Regenerate only the video summary for an existing item"""
+    if not get_content_by_id(content_id):
+        return jsonify({'success': False, 'error': 'Content not found'}), 404
+
+    return run_content_job('video_summary', content_id)
+
+
+def run_video_summary_job(payload: dict, job: dict) -> dict:
+    """Job handler: regenerate only the video summary for an existing item."""
+    content_id = payload['content_id']
     content = get_content_by_id(content_id)
     if not content:
-        return jsonify({'success': False, 'error': 'Content not found'}), 404
-        
+        return {'success': False, 'error': 'Content not found', 'status_code': 404}
+
     print(f"\n=== Regenerating Video Summary for content ID {content_id} ===")
     
     video_summary = ''
@@ -391,7 +696,7 @@ def api_regenerate_video_summary(content_id):
             print("Video summary generated.")
         except Exception as e:
             print(f"Video summary error: {e}")
-            return jsonify({'success': False, 'error': str(e)}), 500
+            return {'success': False, 'error': str(e), 'status_code': 500}
             
     # Update only the video summary
     success = update_content(
@@ -409,13 +714,72 @@ def api_regenerate_video_summary(content_id):
         tags=content.get('tags', '')
     )
     
-    return jsonify({
+    return {
         'success': success,
         'video_summary': video_summary,
         'video_summary_status': video_summary_status,
         'media_extraction_status': media_extraction_status,
         'media_extraction_error': media_extraction_error
-    })
+    }
+
+
+def queue_video_analysis(content_id: int, media_url: str, media_type: str,
+                         notify: list = None, base_url: str = '') -> int:
+    """Queue phase two of a deferred video save; `notify` phones get the summary when it is ready."""
+    payload = {
+        'content_id': content_id,
+        'media_url': media_url,
+        'media_type': media_type,
+        'notify': notify or [],
+        'base_url': base_url
+    }
+    return video_queue.enqueue('video_analysis', payload, dedupe_key=str(content_id))
+
+
+def run_video_analysis_job(payload: dict, job: dict) -> dict:
+    """
+    Job handler: analyze the video of an item saved with video_analysis_pending.
+
+    Stores the detailed video summary (and replaces the quick text summary when
+    the video itself could be summarized), then messages the notify phones.
+    The last failed attempt marks the item video_analysis_failed.
+    """
+    content = get_content_by_id(payload['content_id'])
+    if not content or content.get('video_summary_status') != 'video_analysis_pending':
+        return {'skipped': True}  # deleted, or regenerated in the meantime
+
+    try:
+        result = ai_processor.analyze_video(
+            url=content['url'],
+            title=content['title'],
+            caption=content['caption'],
+            platform=content['platform'],
+            media_url=payload.get('media_url', ''),
+            media_type=payload.get('media_type') or 'video'
+        )
+    except Exception as e:
+        if job['attempts'] < job['max_attempts']:
+            raise
+        print(f"Video analysis error for content {content['id']}: {e}")
+        result = {'summary': '', 'summary_source': '', 'video_summary': '', 'video_summary_status': 'video_analysis_failed'}
+
+    update_content(
+        content_id=content['id'],
+        summary=result['summary'] or None,
+        summary_source=result['summary_source'] or None,
+        video_summary=result['video_summary'],
+        video_summary_status=result['video_summary_status']
+    )
+
+    if Config.VIDEO_ANALYSIS_NOTIFY and result['video_summary']:
+        title = content['title'] or content['url']
+        message = f"Video summary ready for: {title[:50]}{'...' if len(title) > 50 else ''}\n\n"
+        message += f"{result['video_summary']}\n\n"
+        message += f"View on dashboard: {payload.get('base_url', '')}/content/{content['id']}"
+        for phone in payload.get('notify') or []:
+            send_whatsapp_message(phone, message)
+
+    return {'content_id': content['id'], 'video_summary_status': result['video_summary_status']}
 
 
 
@@ -430,7 +794,7 @@ def api_delete_content(content_id):
 def api_get_stats():
     """API: Get statistics"""
     stats = get_stats()
-    return jsonify({'success': True, 'data': stats})
+    return jsonify({'success': True, 'data': stats, 'cache': cache_stats(), 'providers': provider_stats()})
 
 
 @app.route('/api/random', methods=['GET'])
@@ -457,6 +821,28 @@ def api_get_random():
     return jsonify({'success': False, 'error': 'No content found'}), 404
 
 
+@app.route('/api/jobs/<int:job_id>', methods=['GET'])
+def api_get_job(job_id):
+    """API: Get the status and result of a background job"""
+    job = get_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({
+        'success': True,
+        'data': {
+            'id': job['id'],
+            'kind': job['kind'],
+            'status': job['status'],
+            'attempts': job['attempts'],
+            'max_attempts': job['max_attempts'],
+            'result': job['result'],
+            'last_error': job['last_error'],
+            'created_at': job['created_at'],
+            'updated_at': job['updated_at']
+        }
+    })
+
+
 @app.route('/api/categories', methods=['GET'])
 def api_get_categories():
     """API: Get all categories"""
@@ -467,48 +853,91 @@ def api_get_categories():
 # ==================== WhatsApp Webhook Routes ====================
 
 def send_whatsapp_message(to_phone: str, body: str) -> bool:
-    """Send a WhatsApp message using the Twilio REST API."""
-    if not (Config.TWILIO_ACCOUNT_SID and Config.TWILIO_AUTH_TOKEN and Config.TWILIO_PHONE_NUMBER):
-        print("WhatsApp send skipped: Twilio is not fully configured.")
-        return False
+    """Queue a WhatsApp message for the rate-limited outbound sender."""
+    return queue_message(to_phone, body) is not None
 
-    try:
-        destination = to_phone if to_phone.startswith('whatsapp:') else f'whatsapp:{to_phone}'
-        client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
-        client.messages.create(
-            body=body,
-            from_=f"whatsapp:{Config.TWILIO_PHONE_NUMBER}",
-            to=destination
-        )
+
+def claim_message(message_sid: str) -> bool:
+    """
+    Claim a Twilio MessageSid for this request. False if it is already claimed.
+
+    Twilio retries a webhook that times out, so the same inbound message can
+    arrive twice, even while the first delivery is still running. The claim is
+    a single INSERT OR IGNORE, so only one of them proceeds; claimed SIDs are
+    kept for PROCESSED_MESSAGE_TTL_SECONDS. The webhook releases the claim if
+    handling fails, so Twilio's retry is processed again.
+    """
+    global _last_message_purge
+    if not message_sid:
         return True
-    except Exception as exc:
-        print(f"WhatsApp send error: {exc}")
-        return False
+
+    now = time.monotonic()
+    if now - _last_message_purge > MESSAGE_SID_PURGE_INTERVAL:
+        _last_message_purge = now
+        purge_processed_messages(Config.PROCESSED_MESSAGE_TTL_SECONDS)
+    return claim_message_sid(message_sid)
+
+
+def release_message(message_sid: str) -> None:
+    """Drop the claim on a MessageSid whose handling failed."""
+    if message_sid:
+        release_message_sid(message_sid)
 
 
-def process_whatsapp_url(url: str, from_phone: str, base_url: str) -> None:
-    """Process a WhatsApp URL in the background and send the final result separately."""
+MESSAGE_SID_PURGE_INTERVAL = 3600
+_last_message_purge = 0.0
+
+
+def process_whatsapp_url(url: str, from_phone: str, base_url: str, raise_errors: bool = False,
+                         job_id: int = None) -> None:
+    """
+    Process a WhatsApp URL in the background and send the final result separately.
+
+    With raise_errors the exception is re-raised instead of messaging the user,
+    so the job queue can retry the attempt quietly. Phones that sent the same
+    link while job_id was in flight (its payload's 'notify' list) get the result too;
+    the list is closed the first time it is read, so later senders queue their own job.
+    """
+    closed_watchers = []
+
+    def recipients() -> list:
+        if job_id and not closed_watchers:
+            closed_watchers.append(close_job_watchers(job_id))
+        watchers = closed_watchers[0] if closed_watchers else []
+        return list(dict.fromkeys([from_phone] + watchers))
+
+    def reply(body: str) -> None:
+        for phone in recipients():
+            send_whatsapp_message(phone, body)
+
     try:
-        existing = check_duplicate(url)
-        if existing:
-            message = f"You already saved this on {existing['timestamp']}!\n\n"
+        def reply_already_saved(existing: dict, lead: str) -> None:
+            message = f"{lead} on {existing['timestamp']}!\n\n"
             message += f"Title: {existing['title']}\n"
             message += f"Category: {existing['category']}\n"
             message += f"Summary: {existing['summary']}\n\n"
             message += f"View it: {base_url}/content/{existing['id']}"
-            send_whatsapp_message(from_phone, message)
+            reply(message)
+
+        resolved_url = resolve_short_link(url)
+        existing = check_duplicate(resolved_url)
+        if existing:
+            reply_already_saved(existing, "You already saved this")
             return
 
         extracted = extract_content(url)
         if not extracted.get('success'):
-            send_whatsapp_message(
-                from_phone,
-                f"Failed to extract content: {extracted.get('error', 'Unknown error')}"
-            )
+            reply(f"Failed to extract content: {extracted.get('error', 'Unknown error')}")
             return
 
         title = extracted.get('title', '')
         caption = extracted.get('caption', '')
+
+        near_duplicate = find_near_duplicate(url, title, caption, confirm=llm_duplicate_check(url, title, caption),
+                                             user_phone=from_phone)
+        if near_duplicate and not near_duplicate['borderline']:
+            reply_already_saved(near_duplicate, "Looks like you already saved this (from another link)")
+            return
         platform = extracted.get('platform', detect_platform(url))
         image_url = extracted.get('image_url', '')
         media_url = extracted.get('media_url', '')
@@ -517,7 +946,8 @@ def process_whatsapp_url(url: str, from_phone: str, base_url: str) -> None:
         media_extraction_error = extracted.get('media_extraction_error', '')
 
         if ai_processor.is_configured():
-            ai_result = process_content(url, title, caption, platform, media_url, media_type, image_url)
+            ai_result = process_content(url, title, caption, platform, media_url, media_type, image_url,
+                                        defer_video=Config.DEFER_VIDEO_ANALYSIS)
         else:
             ai_result = {
                 'category': 'Other',
@@ -540,11 +970,16 @@ def process_whatsapp_url(url: str, from_phone: str, base_url: str) -> None:
             category=category,
             summary=ai_result.get('summary', ''),
             summary_source=ai_result.get('summary_source', ''),
+            category_source=ai_result.get('category_source', ''),
             video_summary=ai_result.get('video_summary', ''),
             video_summary_status=ai_result.get('video_summary_status', ''),
-            tags=ai_result.get('tags', ''),
-            user_phone=from_phone
+            tags=flag_possible_duplicate(ai_result.get('tags', ''), near_duplicate),
+            user_phone=from_phone,
+            canonical_url=canonicalize_url(resolved_url)
         )
+        video_pending = ai_result.get('video_summary_status') == 'video_analysis_pending'
+        if video_pending:
+            queue_video_analysis(content_id, media_url, media_type, recipients(), base_url)
 
         message = "Content saved successfully!\n\n"
         message += f"Title: {title[:50]}{'...' if len(title) > 50 else ''}\n"
@@ -553,6 +988,8 @@ def process_whatsapp_url(url: str, from_phone: str, base_url: str) -> None:
 
         if ai_result.get('video_summary'):
             message += "Video summary: available\n"
+        elif video_pending and Config.VIDEO_ANALYSIS_NOTIFY:
+            message += "Video summary: analyzing, I'll send it when it's ready\n"
         elif ai_result.get('video_summary_status'):
             message += f"Video summary: {ai_result['video_summary_status'].replace('_', ' ')}\n"
             if ai_result.get('video_summary_status') == 'video_media_missing' and media_extraction_status:
@@ -560,25 +997,68 @@ def process_whatsapp_url(url: str, from_phone: str, base_url: str) -> None:
 
         if ai_result.get('summary'):
             message += f"Summary: {ai_result['summary']}\n"
+        if near_duplicate:
+            message += f"Possibly the same as: {base_url}/content/{near_duplicate['id']}\n"
 
         message += f"\nView on dashboard: {base_url}/content/{content_id}"
-        send_whatsapp_message(from_phone, message)
+        reply(message)
     except Exception as exc:
         print(f"Error processing WhatsApp message: {exc}")
-        send_whatsapp_message(
-            from_phone,
-            "An error occurred while processing your URL. Please try again."
-        )
+        if raise_errors:
+            raise
+        reply("An error occurred while processing your URL. Please try again.")
+
+
+def start_whatsapp_url_processing(url: str, from_phone: str, base_url: str) -> int:
+    """
+    Queue asynchronous WhatsApp URL processing. Returns the job id.
+
+    A link whose canonical URL is already being processed joins that job (the
+    sender is added to its notify list) instead of running the pipeline twice.
+    """
+    payload = {'url': url, 'from_phone': from_phone, 'base_url': base_url}
+    dedupe_key = canonicalize_url(resolve_short_link(url, network=False))
+    job_id = job_queue.enqueue('whatsapp_url', payload, dedupe_key=dedupe_key)
 
+    job = get_job(job_id)
+    if job and job['payload'].get('from_phone') != from_phone:
+        if not add_job_watcher(job_id, from_phone):
+            # The shared job already replied (or finished); a job of our own reports the saved copy
+            job_id = job_queue.enqueue('whatsapp_url', payload)
+    return job_id
 
-def start_whatsapp_url_processing(url: str, from_phone: str, base_url: str) -> None:
-    """Start asynchronous WhatsApp URL processing."""
-    worker = threading.Thread(
-        target=process_whatsapp_url,
-        args=(url, from_phone, base_url),
-        daemon=True
+
+def run_whatsapp_url_job(payload: dict, job: dict) -> None:
+    """Job handler: process a WhatsApp URL; only the final attempt reports failure to the user."""
+    process_whatsapp_url(
+        payload['url'],
+        payload['from_phone'],
+        payload['base_url'],
+        raise_errors=job['attempts'] < job['max_attempts'],
+        job_id=job['id']
     )
-    worker.start()
+
+
+job_queue.register('whatsapp_url', run_whatsapp_url_job)
+job_queue.register('save_url', run_save_url_job)
+job_queue.register('regenerate_ai', run_regenerate_ai_job)
+job_queue.register('video_summary', run_video_summary_job)
+video_queue.register('video_analysis', run_video_analysis_job)
+enrich_queue.register('enrich_content', run_enrich_content_job)
+enrich_queue.register('semantic_backfill', run_semantic_backfill_job)
+enrich_queue.register('near_duplicate_backfill', run_near_duplicate_backfill_job)
+
+
+@app.route('/whatsapp/status', methods=['POST'])
+def whatsapp_status():
+    """Twilio delivery status callback for queued outbound messages"""
+    sid = request.form.get('MessageSid', '')
+    status = request.form.get('MessageStatus', '')
+    if not sid or not status:
+        return '', 400
+    record_delivery_status(sid, status, request.form.get('ErrorCode'))
+    return '', 204
+
 
 @app.route('/whatsapp/webhook', methods=['GET'])
 def whatsapp_verify():
@@ -595,13 +1075,25 @@ def whatsapp_verify():
 @app.route('/whatsapp/webhook', methods=['POST'])
 def whatsapp_webhook():
     """WhatsApp webhook (POST) - Handle incoming messages"""
+    message_sid = request.values.get('MessageSid', '')
+    if not claim_message(message_sid):
+        return str(MessagingResponse())  # Twilio retry: the first delivery is answered or in flight
+
+    try:
+        return handle_whatsapp_message()
+    except Exception:
+        release_message(message_sid)  # so Twilio's retry is processed again
+        raise
+
+
+def handle_whatsapp_message() -> str:
+    """Reply to an inbound WhatsApp message: save a URL or answer a text command"""
     from_xml = request.values.get('Body', '')
     from_phone = request.values.get('From', '')
     message_text = from_xml.strip().lower()
     url_match = re.search(r'https?://[^\s]+', from_xml)
 
     response = MessagingResponse()
-
     if url_match:
         url = url_match.group(0)
 
@@ -609,7 +1101,8 @@ def whatsapp_webhook():
             response.message("Invalid URL. Please send a valid URL to save.")
             return str(response)
 
-        existing = check_duplicate(url)
+        # Only already-resolved short links here; the job resolves new ones
+        existing = check_duplicate(resolve_short_link(url, network=False))
         if existing:
             base_url = request.host_url.rstrip('/')
             message = f"You already saved this on {existing['timestamp']}!\n\n"
@@ -708,8 +1201,8 @@ def whatsapp_webhook():
             if not question:
                 response.message("Please include a question after 'ask:'\n\nExample: ask: what did I save about Python?")
             else:
-                # Search saved content for relevant items to use as RAG context
-                results = search_content(question, limit=5)
+                # Retrieve saves closest in meaning as RAG context; keyword search as a fallback
+                results = semantic_search(question, limit=5) or search_content(question, limit=5, match_any=True)
                 if not results:
                     response.message("I couldn't find anything relevant in your saves. Try saving some content on this topic first!")
                 else:
@@ -801,14 +1294,9 @@ def send_daily_dose():
         message += f"URL: {item['url']}\n\n"
         message += f"Rediscover something great today!"
 
-        if Config.TWILIO_ACCOUNT_SID and Config.TWILIO_AUTH_TOKEN and Config.TWILIO_PHONE_NUMBER:
-            client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
-            client.messages.create(
-                body=message,
-                from_=f"whatsapp:{Config.TWILIO_PHONE_NUMBER}",
-                to=f"whatsapp:{Config.TWILIO_PHONE_NUMBER}"
-            )
-            return f"Daily dose sent!\n\n{message}", 200
+        if twilio_configured():
+            send_whatsapp_message(Config.TWILIO_PHONE_NUMBER, message)
+            return f"Daily dose queued!\n\n{message}", 200
         else:
             return f"Twilio not configured. Message would be:\n\n{message}", 200
 
@@ -864,14 +1352,9 @@ def send_weekly_digest():
         message += "\nKeep it up!\n"
         message += f"View dashboard: {base_url}/dashboard"
 
-        if Config.TWILIO_ACCOUNT_SID and Config.TWILIO_AUTH_TOKEN and Config.TWILIO_PHONE_NUMBER:
-            client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
-            client.messages.create(
-                body=message,
-                from_=f"whatsapp:{Config.TWILIO_PHONE_NUMBER}",
-                to=f"whatsapp:{Config.TWILIO_PHONE_NUMBER}"
-            )
-            return f"Digest sent!\n\n{message}", 200
+        if twilio_configured():
+            send_whatsapp_message(Config.TWILIO_PHONE_NUMBER, message)
+            return f"Digest queued!\n\n{message}", 200
         else:
             return f"Twilio not configured. Message would be:\n\n{message}", 200
 
@@ -880,34 +1363,141 @@ def send_weekly_digest():
         return f"Error: {str(e)}", 500
 
 
-# ==================== CSV Export ====================
+# ==================== Export / Import ====================
+
+def export_filters(args) -> dict:
+    """Export filters from query args; raises ValueError for a malformed date."""
+    from datetime import datetime
+
+    filters = {
+        key: args.get(key) or None
+        for key in ('platform', 'category', 'collection', 'user_phone', 'date_from', 'date_to')
+    }
+    for key in ('date_from', 'date_to'):
+        if filters[key]:
+            datetime.strptime(filters[key], '%Y-%m-%d')
+    return filters
+
+
+def include_phone(args) -> bool:
+    """Exports leave out the saving user's phone number unless include_phone=true is passed."""
+    return args.get('include_phone', '').lower() == 'true'
+
 
 @app.route('/export/csv')
 def export_csv():
-    """Export all content as CSV"""
+    """
+    Export content as CSV, streamed in chunks.
+
+    Filters: platform, category, collection, user_phone, date_from, date_to.
+    The user_phone column is only included with include_phone=true.
+    """
     import csv
     import io
-    from flask import Response
-    
-    items = get_all_content(limit=10000)
-    output = io.StringIO()
-    fields = [
-        'id', 'url', 'platform', 'title', 'caption', 'image_url',
-        'media_extraction_status', 'media_extraction_error',
-        'category', 'summary', 'summary_source',
-        'video_summary', 'video_summary_status', 'tags', 'timestamp'
-    ]
-    writer = csv.DictWriter(output, fieldnames=fields, extrasaction='ignore')
-    writer.writeheader()
-    for item in items:
-        writer.writerow({k: item.get(k, '') for k in fields})
+    from flask import Response, stream_with_context
+
+    try:
+        filters = export_filters(request.args)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Dates must be YYYY-MM-DD'}), 400
+
+    fields = export_fields(CSV_FIELDS, include_phone(request.args))
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for index, item in enumerate(iter_content_rows(**filters), start=1):
+            writer.writerow({k: item.get(k, '') for k in fields})
+            if index % 500 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
     return Response(
-        output.getvalue(),
+        stream_with_context(generate()),
         mimetype='text/csv',
         headers={'Content-Disposition': 'attachment; filename=social_saver_export.csv'}
     )
 
 
+@app.route('/export/ndjson')
+def export_ndjson():
+    """Export content as newline-delimited JSON, one object per row (same filters as CSV)"""
+    from flask import Response, stream_with_context
+
+    try:
+        filters = export_filters(request.args)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Dates must be YYYY-MM-DD'}), 400
+
+    return Response(
+        stream_with_context(iter_ndjson(filters, include_phone(request.args))),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename=social_saver_export.ndjson'}
+    )
+
+
+@app.route('/export/parquet')
+def export_parquet():
+    """Export content as a Parquet file (same filters as CSV; needs pyarrow)"""
+    import tempfile
+    from flask import send_file
+
+    if not parquet_available():
+        return jsonify({'success': False, 'error': 'Parquet export needs pyarrow installed'}), 501
+    try:
+        filters = export_filters(request.args)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Dates must be YYYY-MM-DD'}), 400
+
+    # Parquet writes its footer last, so spool to disk instead of holding the file in memory
+    output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    write_parquet(filters, output, include_phone(request.args))
+    output.seek(0)
+    return send_file(
+        output,
+        mimetype='application/vnd.apache.parquet',
+        as_attachment=True,
+        download_name='social_saver_export.parquet'
+    )
+
+
+@app.route('/import', methods=['POST'])
+def import_library():
+    """
+    Import an NDJSON or Parquet export (format from ?format= or the upload's extension).
+
+    NDJSON may be uploaded as a 'file' form field or sent as the raw request body;
+    rows whose canonical URL is already saved are skipped.
+    """
+    upload = request.files.get('file')
+    filename = (upload.filename or '') if upload else ''
+    fmt = (request.args.get('format') or ('parquet' if filename.endswith('.parquet') else 'ndjson')).lower()
+    user_phone = request.args.get('user_phone') or None
+
+    try:
+        if fmt == 'ndjson':
+            source = upload.stream if upload else request.stream
+            counts = import_ndjson(source, user_phone)
+        elif fmt == 'parquet':
+            if not parquet_available():
+                return jsonify({'success': False, 'error': 'Parquet import needs pyarrow installed'}), 501
+            if not upload:
+                return jsonify({'success': False, 'error': 'Upload the Parquet file as "file"'}), 400
+            counts = import_parquet(upload.stream, user_phone)
+        else:
+            return jsonify({'success': False, 'error': 'format must be ndjson or parquet'}), 400
+    except Exception as e:
+        print(f"Error importing library: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    if counts.get('created'):
+        queue_index_backfill()  # imported rows bypass the save hooks
+    return jsonify({'success': True, **counts})
+
+
 # ==================== Collections ====================
 
 @app.route('/collections')
@@ -0,0 +1,70 @@
+"""
+Benchmark meta-tag parsing on the saved HTML fixtures.
+
+Compares the old approach (full BeautifulSoup html.parser tree plus one
+soup.find() per tag) with every installed html_meta backend, on both the full
+page and the <head> prefix that ContentExtractor now streams.
+
+Usage:
+    python benchmarks/bench_html_parsers.py [--repeat 20]
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from html_meta import BACKENDS, available_backends  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'fixtures', 'html')
+META_KEYS = ('og:title', 'og:description', 'og:image', 'og:video', 'og:video:url',
+             'og:video:secure_url', 'twitter:player:stream', 'description', 'author')
+
+
+def parse_with_soup_find(content: bytes) -> dict:
+    soup = BeautifulSoup(content, 'html.parser')
+    meta = {}
+    for key in META_KEYS:
+        tag = soup.find('meta', property=key) or soup.find('meta', attrs={'name': key})
+        if tag:
+            meta[key] = tag.get('content', '')
+    return meta
+
+
+def time_per_call(func, content: bytes, repeat: int) -> float:
+    func(content)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(content)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    candidates = [('bs4 find()', parse_with_soup_find)]
+    candidates += [(name, BACKENDS[name]) for name in available_backends()]
+
+    print(f"{'fixture':<16} {'input':<5} {'bytes':>8}  " + '  '.join(f'{name:>12}' for name, _ in candidates))
+    for path in sorted(glob.glob(os.path.join(FIXTURES, '*.html'))):
+        with open(path, 'rb') as handle:
+            page = handle.read()
+        match = re.search(rb'</head\s*>', page, re.IGNORECASE)
+        head = page[:match.end()] if match else page
+
+        name = os.path.splitext(os.path.basename(path))[0]
+        for label, content in (('page', page), ('head', head)):
+            timings = [time_per_call(func, content, args.repeat) for _, func in candidates]
+            print(f"{name:<16} {label:<5} {len(content):>8}  " + '  '.join(f'{ms:>9.2f} ms' for ms in timings))
+
+
+if __name__ == '__main__':
+    main()
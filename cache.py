@@ -0,0 +1,178 @@
+"""
+Persistent response cache for Social Saver Bot
+Small SQLite key/value store with per-entry TTL and LRU eviction
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import Config
+
+CACHE_DB_PATH = Config.CACHE_DB_PATH
+
+
+def make_key(*parts: Any) -> str:
+    """Stable SHA-256 key for any JSON-serializable parts."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class SQLiteCache:
+    """
+    One namespace inside the shared cache file.
+
+    Entries expire after their TTL and, once the namespace holds more than
+    max_entries rows, the least recently read ones are evicted. Hit and miss
+    counters are kept in memory for the life of the process.
+    """
+
+    def __init__(self, path: str, namespace: str, max_entries: int, default_ttl: float):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        self._conn.execute(f'PRAGMA busy_timeout = {int(Config.DB_BUSY_TIMEOUT_MS)}')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+        ''')
+        self._conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed
+            ON cache_entries(namespace, accessed_at)
+        ''')
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            ).fetchone()
+
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._conn.execute(
+                        'DELETE FROM cache_entries WHERE namespace = ? AND key = ?',
+                        (self.namespace, key)
+                    )
+                self.misses += 1
+                return default
+
+            self._conn.execute(
+                'UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                (now, self.namespace, key)
+            )
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._conn.execute('''
+                INSERT INTO cache_entries (namespace, key, value, expires_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(namespace, key) DO UPDATE SET
+                    value = excluded.value,
+                    expires_at = excluded.expires_at,
+                    accessed_at = excluded.accessed_at
+            ''', (self.namespace, key, json.dumps(value, ensure_ascii=False), expires_at, now))
+            self._evict()
+
+    def _evict(self) -> None:
+        count = self._conn.execute(
+            'SELECT COUNT(*) FROM cache_entries WHERE namespace = ?', (self.namespace,)
+        ).fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+
+        self._conn.execute('''
+            DELETE FROM cache_entries
+            WHERE namespace = ? AND key IN (
+                SELECT key FROM cache_entries
+                WHERE namespace = ?
+                ORDER BY expires_at <= ? DESC, accessed_at ASC
+                LIMIT ?
+            )
+        ''', (self.namespace, self.namespace, time.time(), overflow))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM cache_entries WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM cache_entries WHERE namespace = ?', (self.namespace,))
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute(
+                'SELECT COUNT(*) FROM cache_entries WHERE namespace = ?', (self.namespace,)
+            ).fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_caches: Dict[str, SQLiteCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace: str, max_entries: int, default_ttl: float) -> SQLiteCache:
+    """Return the shared cache for a namespace, reopening it if CACHE_DB_PATH has changed."""
+    cache = _caches.get(namespace)
+    if cache is not None and cache.path == CACHE_DB_PATH:
+        return cache
+
+    with _caches_lock:
+        cache = _caches.get(namespace)
+        if cache is None or cache.path != CACHE_DB_PATH:
+            if cache is not None:
+                cache.close()
+            cache = SQLiteCache(CACHE_DB_PATH, namespace, max_entries, default_ttl)
+            _caches[namespace] = cache
+        return cache
+
+
+def close_caches() -> None:
+    with _caches_lock:
+        for cache in _caches.values():
+            cache.close()
+        _caches.clear()
+
+
+def cache_stats() -> Dict[str, Dict]:
+    """Counters for every cache opened by this process."""
+    return {namespace: cache.stats() for namespace, cache in list(_caches.items())}
@@ -0,0 +1,265 @@
+"""
+Local category classifier for Social Saver Bot
+Multinomial Naive Bayes over title, caption and URL words, trained on rows the
+LLM already categorized. categorize_content() uses it when it is confident and
+only asks Groq otherwise.
+
+Usage:
+    python category_classifier.py train     # retrain from saved_content and save the model
+    python category_classifier.py report    # hold-out accuracy, coverage and latency
+"""
+
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from config import Config
+from database import get_db_connection, init_db
+
+TOKEN_PATTERN = re.compile(r'[^\W_]{2,}', re.UNICODE)
+STOPWORDS = frozenset('''
+about after all also and any are but can com could did does for from had has have her here his how http https
+into its just more most not now our out over she should than that the their them then there these they this
+those through too very was were what when where which while who why will with would www you your
+'''.split())
+URL_NOISE = frozenset({'watch', 'reel', 'reels', 'status', 'post', 'posts', 'html', 'amp', 'index', 'php'})
+
+_model = None
+_model_mtime = None
+_model_lock = threading.Lock()
+
+
+def features(url: str, title: str, caption: str) -> List[str]:
+    """Lowercased words of title and caption (plus bigrams), and URL host/path words."""
+    words = [word for word in TOKEN_PATTERN.findall(f"{title or ''} {caption or ''}".lower()) if word not in STOPWORDS]
+    tokens = words + [f'{a}_{b}' for a, b in zip(words, words[1:])]
+
+    parsed = urlparse(url or '')
+    host_words = (parsed.hostname or '').replace('www.', '').split('.')[:-1]
+    path_words = TOKEN_PATTERN.findall(parsed.path.lower())
+    tokens += [f'url:{word}' for word in host_words + path_words if word not in URL_NOISE and not word.isdigit()]
+    return tokens
+
+
+class NaiveBayesClassifier:
+    """Multinomial Naive Bayes with Laplace smoothing; predict() returns (category, posterior)."""
+
+    def __init__(self, alpha: float = 0.5):
+        self.alpha = alpha
+        self.class_docs: Dict[str, int] = {}
+        self.class_tokens: Dict[str, int] = {}
+        self.token_counts: Dict[str, Dict[str, int]] = {}
+        self.vocabulary_size = 0
+        self.trained_rows = 0
+        self._known = set()
+
+    def fit(self, samples: Iterable[Tuple[List[str], str]], min_token_count: int = 2) -> 'NaiveBayesClassifier':
+        samples = list(samples)
+        totals = Counter(token for tokens, _ in samples for token in set(tokens))
+        vocabulary = {token for token, count in totals.items() if count >= min_token_count}
+
+        class_docs = Counter()
+        counts = defaultdict(Counter)
+        for tokens, category in samples:
+            class_docs[category] += 1
+            counts[category].update(token for token in tokens if token in vocabulary)
+
+        self.class_docs = dict(class_docs)
+        self.token_counts = {category: dict(counter) for category, counter in counts.items()}
+        self.class_tokens = {category: sum(counter.values()) for category, counter in counts.items()}
+        self.vocabulary_size = len(vocabulary)
+        self.trained_rows = len(samples)
+        self._known = set().union(*self.token_counts.values()) if self.token_counts else set()
+        return self
+
+    def predict(self, tokens: List[str]) -> Tuple[Optional[str], float]:
+        if not self.class_docs:
+            return None, 0.0
+
+        known = [token for token in tokens if token in self._known]
+        if not known:
+            return None, 0.0
+
+        total_docs = sum(self.class_docs.values())
+        scores = {}
+        for category, docs in self.class_docs.items():
+            counts = self.token_counts.get(category, {})
+            denominator = math.log(self.class_tokens.get(category, 0) + self.alpha * self.vocabulary_size)
+            score = math.log(docs / total_docs)
+            for token in known:
+                score += math.log(counts.get(token, 0) + self.alpha) - denominator
+            scores[category] = score
+
+        best = max(scores, key=scores.get)
+        normalizer = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / normalizer
+
+    def to_dict(self) -> Dict:
+        return {
+            'alpha': self.alpha,
+            'class_docs': self.class_docs,
+            'class_tokens': self.class_tokens,
+            'token_counts': self.token_counts,
+            'vocabulary_size': self.vocabulary_size,
+            'trained_rows': self.trained_rows,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'NaiveBayesClassifier':
+        model = cls(alpha=data.get('alpha', 0.5))
+        model.class_docs = data['class_docs']
+        model.class_tokens = data['class_tokens']
+        model.token_counts = data['token_counts']
+        model.vocabulary_size = data['vocabulary_size']
+        model.trained_rows = data.get('trained_rows', sum(model.class_docs.values()))
+        model._known = set().union(*model.token_counts.values()) if model.token_counts else set()
+        return model
+
+
+def load_training_rows() -> List[Dict]:
+    """
+    Saved items with a real category (known to DEFAULT_CATEGORIES and not 'Other')
+    chosen by the LLM or the user; the model's own 'local' predictions are left out
+    so it never learns from itself.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id, url, title, caption, category FROM saved_content "
+            "WHERE category IS NOT NULL AND category != 'Other' AND category_source IN ('ai', 'user')"
+        )
+        known = set(Config.DEFAULT_CATEGORIES)
+        rows = [dict(row) for row in cursor.fetchall() if row['category'] in known]
+    return rows
+
+
+def _samples(rows: List[Dict]) -> List[Tuple[List[str], str]]:
+    return [(features(row['url'], row['title'], row['caption']), row['category']) for row in rows]
+
+
+def train(rows: List[Dict] = None, path: str = None) -> NaiveBayesClassifier:
+    """Train on saved_content (or the given rows) and atomically write the model file."""
+    global _model, _model_mtime
+    model = NaiveBayesClassifier().fit(_samples(rows if rows is not None else load_training_rows()))
+    path = path or Config.CATEGORY_MODEL_PATH
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+        json.dump(model.to_dict(), handle)
+    os.replace(temp_path, path)
+
+    if os.path.abspath(path) == os.path.abspath(Config.CATEGORY_MODEL_PATH):
+        with _model_lock:
+            _model = model
+            _model_mtime = os.path.getmtime(path)
+    return model
+
+
+def get_model() -> Optional[NaiveBayesClassifier]:
+    """The saved model, reloaded when the file changes (e.g. after `train` in another process)."""
+    global _model, _model_mtime
+    path = Config.CATEGORY_MODEL_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    with _model_lock:
+        if _model is None or mtime != _model_mtime:
+            try:
+                with open(path, encoding='utf-8') as handle:
+                    _model = NaiveBayesClassifier.from_dict(json.load(handle))
+                _model_mtime = mtime
+            except (OSError, ValueError, KeyError) as exc:
+                print(f"Category model unreadable, ignoring it: {exc}")
+                return None
+        return _model
+
+
+def predict(url: str, title: str, caption: str) -> Tuple[Optional[str], float]:
+    model = get_model()
+    if model is None:
+        return None, 0.0
+    return model.predict(features(url, title, caption))
+
+
+def confident_category(url: str, title: str, caption: str) -> Optional[str]:
+    """
+    The local prediction when it can be trusted, else None (ask the LLM).
+
+    Requires the classifier to be enabled, trained on CATEGORY_CLASSIFIER_MIN_ROWS
+    rows or more, and at least CATEGORY_CLASSIFIER_MIN_CONFIDENCE sure.
+    """
+    if not Config.CATEGORY_CLASSIFIER_ENABLED:
+        return None
+    model = get_model()
+    if model is None or model.trained_rows < Config.CATEGORY_CLASSIFIER_MIN_ROWS:
+        return None
+
+    category, confidence = model.predict(features(url, title, caption))
+    if category and confidence >= Config.CATEGORY_CLASSIFIER_MIN_CONFIDENCE:
+        return category
+    return None
+
+
+def report(rows: List[Dict] = None, holdout_every: int = 5) -> Dict:
+    """
+    Train on 4/5 of the rows and score the held-out fifth (by id).
+
+    Returns overall accuracy, plus coverage (share answered locally) and accuracy
+    of the answered share at CATEGORY_CLASSIFIER_MIN_CONFIDENCE, and latency.
+    """
+    rows = rows if rows is not None else load_training_rows()
+    train_rows = [row for row in rows if row['id'] % holdout_every]
+    test_rows = [row for row in rows if not row['id'] % holdout_every]
+    model = NaiveBayesClassifier().fit(_samples(train_rows))
+
+    threshold = Config.CATEGORY_CLASSIFIER_MIN_CONFIDENCE
+    correct = answered = answered_correct = 0
+    latencies = []
+    for row in test_rows:
+        start = time.perf_counter()
+        category, confidence = model.predict(features(row['url'], row['title'], row['caption']))
+        latencies.append((time.perf_counter() - start) * 1000)
+        correct += category == row['category']
+        if category and confidence >= threshold:
+            answered += 1
+            answered_correct += category == row['category']
+
+    latencies.sort()
+    tested = len(test_rows)
+    return {
+        'train_rows': len(train_rows),
+        'test_rows': tested,
+        'classes': len(model.class_docs),
+        'accuracy': round(correct / tested, 3) if tested else None,
+        'threshold': threshold,
+        'coverage': round(answered / tested, 3) if tested else None,
+        'accuracy_when_confident': round(answered_correct / answered, 3) if answered else None,
+        'latency_ms_p50': round(latencies[len(latencies) // 2], 3) if latencies else None,
+        'latency_ms_p95': round(latencies[int(len(latencies) * 0.95)], 3) if latencies else None,
+    }
+
+
+if __name__ == '__main__':
+    import sys
+
+    init_db()
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'train':
+        trained = train()
+        print(f"Trained on {trained.trained_rows} rows, {len(trained.class_docs)} categories, "
+              f"{trained.vocabulary_size} features -> {Config.CATEGORY_MODEL_PATH}")
+    elif command == 'report':
+        for key, value in report().items():
+            print(f"{key:<26} {value}")
+    else:
+        print(__doc__.strip())
@@ -3,6 +3,7 @@ Configuration management for Social Saver Bot
 """
 
 import os
+import re
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -10,6 +11,16 @@ env_path = Path(__file__).parent / '.env'
 load_dotenv(env_path)
 
 
+def _env_mapping(name: str, default: str, cast=int) -> dict:
+    """Parse a "key=value,key=value" environment variable into a dict."""
+    mapping = {}
+    for item in os.getenv(name, default).split(','):
+        if '=' in item:
+            key, value = item.split('=', 1)
+            mapping[key.strip().lower()] = cast(value.strip())
+    return mapping
+
+
 class Config:
     # Flask
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -24,6 +35,17 @@ class Config:
     TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER', '')
     WHATSAPP_WEBHOOK_VERIFY_TOKEN = os.getenv('WHATSAPP_WEBHOOK_VERIFY_TOKEN', 'social_saver_verify_token')
 
+    # Outbound WhatsApp queue: messages per second for the sender number, burst size,
+    # dedicated sender threads, and retries (with backoff) for 429/5xx responses
+    TWILIO_SEND_RATE = float(os.getenv('TWILIO_SEND_RATE', 1.0))
+    TWILIO_SEND_BURST = int(os.getenv('TWILIO_SEND_BURST', 3))
+    TWILIO_HTTP_TIMEOUT = float(os.getenv('TWILIO_HTTP_TIMEOUT', 15))
+    OUTBOUND_WORKERS = int(os.getenv('OUTBOUND_WORKERS', 1))
+    OUTBOUND_MAX_ATTEMPTS = int(os.getenv('OUTBOUND_MAX_ATTEMPTS', 5))
+    OUTBOUND_RETRY_BACKOFF_SECONDS = float(os.getenv('OUTBOUND_RETRY_BACKOFF_SECONDS', 2))
+    # How long handled inbound MessageSids are remembered to drop Twilio webhook retries
+    PROCESSED_MESSAGE_TTL_SECONDS = int(os.getenv('PROCESSED_MESSAGE_TTL_SECONDS', 86400))
+
     # MiniMax AI
     MINIMAX_API_KEY = os.getenv('MINIMAX_API_KEY', '')
     MINIMAX_BASE_URL = os.getenv('MINIMAX_BASE_URL', 'https://api.minimax.chat/v1')
@@ -46,6 +68,26 @@ class Config:
 
     ACTIVE_AI_PROVIDER = os.getenv('ACTIVE_AI_PROVIDER', 'groq')
 
+    # AI pipeline
+    AI_CONCURRENT = os.getenv('AI_CONCURRENT', 'true').lower() == 'true'
+    AI_MAX_WORKERS = int(os.getenv('AI_MAX_WORKERS', 16))
+    AI_PROCESS_DEADLINE_SECONDS = float(os.getenv('AI_PROCESS_DEADLINE_SECONDS', 240))
+    # One Groq call returning category, summary and tags as JSON instead of three
+    AI_FUSED_PROMPT = os.getenv('AI_FUSED_PROMPT', 'false').lower() == 'true'
+
+    # LLM provider quotas (0 disables a limit), retries and circuit breaker
+    GROQ_REQUESTS_PER_MINUTE = float(os.getenv('GROQ_REQUESTS_PER_MINUTE', 30))
+    GROQ_TOKENS_PER_MINUTE = float(os.getenv('GROQ_TOKENS_PER_MINUTE', 30000))
+    GEMINI_REQUESTS_PER_MINUTE = float(os.getenv('GEMINI_REQUESTS_PER_MINUTE', 15))
+    GEMINI_TOKENS_PER_MINUTE = float(os.getenv('GEMINI_TOKENS_PER_MINUTE', 1000000))
+    LLM_MAX_ATTEMPTS = int(os.getenv('LLM_MAX_ATTEMPTS', 3))
+    LLM_RETRY_BASE_DELAY = float(os.getenv('LLM_RETRY_BASE_DELAY', 1))
+    LLM_RETRY_MAX_DELAY = float(os.getenv('LLM_RETRY_MAX_DELAY', 20))
+    # Longest a call waits for quota (or a Retry-After) before using the fallback
+    LLM_MAX_WAIT_SECONDS = float(os.getenv('LLM_MAX_WAIT_SECONDS', 30))
+    LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', 5))
+    LLM_BREAKER_RESET_SECONDS = float(os.getenv('LLM_BREAKER_RESET_SECONDS', 60))
+
     # Content
     USER_AGENT = os.getenv('USER_AGENT', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
     REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', 30))
@@ -53,8 +95,101 @@ class Config:
     ITEMS_PER_PAGE = int(os.getenv('ITEMS_PER_PAGE', 20))
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 5000))
     MAX_MEDIA_DOWNLOAD_BYTES = int(os.getenv('MAX_MEDIA_DOWNLOAD_BYTES', 52428800))
+    # Meta-only extractors stop reading at </head> or after this many bytes
+    HTTP_HEAD_ONLY = os.getenv('HTTP_HEAD_ONLY', 'true').lower() == 'true'
+    HTTP_HEAD_MAX_BYTES = int(os.getenv('HTTP_HEAD_MAX_BYTES', 524288))
+    # Meta-tag parser backend: auto (selectolax > lxml > stdlib), selectolax, lxml or stdlib
+    HTML_PARSER = os.getenv('HTML_PARSER', 'auto')
     YTDLP_ENABLED = os.getenv('YTDLP_ENABLED', 'true').lower() == 'true'
     YTDLP_COOKIES_FILE = os.getenv('YTDLP_COOKIES_FILE', '')
+    # yt-dlp runs in a separate process pool (0 = run inline in the calling thread)
+    YTDLP_PROCESS_WORKERS = int(os.getenv('YTDLP_PROCESS_WORKERS', 2))
+    YTDLP_TIMEOUT_SECONDS = float(os.getenv('YTDLP_TIMEOUT_SECONDS', 45))
+    # Title/description/thumbnail stay valid for long; signed media URLs expire quickly
+    YTDLP_METADATA_CACHE_TTL = int(os.getenv('YTDLP_METADATA_CACHE_TTL', 7 * 24 * 3600))
+    YTDLP_MEDIA_CACHE_TTL = int(os.getenv('YTDLP_MEDIA_CACHE_TTL', 1800))
+
+    # Database connection pool
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 8))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+    DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000))
+    DB_JOURNAL_MODE = os.getenv('DB_JOURNAL_MODE', 'WAL')
+    DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')
+    DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', 16384))
+    DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', 134217728))
+
+    # Response cache (shared SQLite file for LLM and HTTP caches)
+    CACHE_DB_PATH = os.getenv('CACHE_DB_PATH', os.path.join(os.path.dirname(__file__), 'cache.db'))
+    LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_TTL_SECONDS = int(os.getenv('LLM_CACHE_TTL_SECONDS', 30 * 24 * 3600))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', 5000))
+    HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', 'true').lower() == 'true'
+    HTTP_CACHE_MAX_ENTRIES = int(os.getenv('HTTP_CACHE_MAX_ENTRIES', 2000))
+    HTTP_CACHE_MAX_BODY_BYTES = int(os.getenv('HTTP_CACHE_MAX_BODY_BYTES', 2097152))
+    # Freshness when a response has no Cache-Control/Expires
+    HTTP_CACHE_DEFAULT_TTL = int(os.getenv('HTTP_CACHE_DEFAULT_TTL', 300))
+    # How long stale entries with an ETag/Last-Modified are kept for revalidation
+    HTTP_CACHE_STALE_TTL = int(os.getenv('HTTP_CACHE_STALE_TTL', 7 * 24 * 3600))
+    # Per-platform freshness that overrides response headers, e.g. "instagram=3600,youtube=86400"
+    HTTP_CACHE_PLATFORM_TTLS = _env_mapping('HTTP_CACHE_PLATFORM_TTLS', '')
+
+    # Bulk extraction (extract_many): overall and per-host concurrency, plus the
+    # minimum gap between request starts to the same host
+    EXTRACT_CONCURRENCY = int(os.getenv('EXTRACT_CONCURRENCY', 8))
+    EXTRACT_PER_HOST_CONCURRENCY = int(os.getenv('EXTRACT_PER_HOST_CONCURRENCY', 2))
+    EXTRACT_POLITENESS_DELAY = float(os.getenv('EXTRACT_POLITENESS_DELAY', 0.5))
+    EXTRACT_HOST_CONCURRENCY = _env_mapping(
+        'EXTRACT_HOST_CONCURRENCY',
+        'instagram.com=1,x.com=1,twitter.com=1,tiktok.com=1,facebook.com=1'
+    )
+    EXTRACT_HOST_DELAYS = _env_mapping(
+        'EXTRACT_HOST_DELAYS',
+        'instagram.com=2,x.com=1,twitter.com=1,tiktok.com=2,facebook.com=1',
+        cast=float
+    )
+
+    # Semantic retrieval for "ask:": 'hashing' (built in) or a local sentence-transformers
+    # model such as all-MiniLM-L6-v2; LSH kicks in above SEMANTIC_ANN_THRESHOLD items
+    EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'hashing')
+    EMBEDDING_DIM = int(os.getenv('EMBEDDING_DIM', 512))
+    SEMANTIC_ANN_THRESHOLD = int(os.getenv('SEMANTIC_ANN_THRESHOLD', 5000))
+    SEMANTIC_MIN_SCORE = float(os.getenv('SEMANTIC_MIN_SCORE', 0.1))
+
+    # Near-duplicate detection (MinHash over title + caption): Jaccard similarity at which a
+    # save is a duplicate outright, and above which the LLM is asked to decide
+    NEAR_DUPLICATE_ENABLED = os.getenv('NEAR_DUPLICATE_ENABLED', 'true').lower() == 'true'
+    NEAR_DUPLICATE_MIN_SIMILARITY = float(os.getenv('NEAR_DUPLICATE_MIN_SIMILARITY', 0.8))
+    NEAR_DUPLICATE_BORDERLINE_SIMILARITY = float(os.getenv('NEAR_DUPLICATE_BORDERLINE_SIMILARITY', 0.6))
+    NEAR_DUPLICATE_MIN_WORDS = int(os.getenv('NEAR_DUPLICATE_MIN_WORDS', 3))
+
+    # Local category classifier (python category_classifier.py train): categorize_content
+    # skips Groq when the model is at least this confident
+    CATEGORY_CLASSIFIER_ENABLED = os.getenv('CATEGORY_CLASSIFIER_ENABLED', 'true').lower() == 'true'
+    CATEGORY_MODEL_PATH = os.getenv(
+        'CATEGORY_MODEL_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'category_model.json')
+    )
+    CATEGORY_CLASSIFIER_MIN_CONFIDENCE = float(os.getenv('CATEGORY_CLASSIFIER_MIN_CONFIDENCE', 0.9))
+    CATEGORY_CLASSIFIER_MIN_ROWS = int(os.getenv('CATEGORY_CLASSIFIER_MIN_ROWS', 200))
+
+    # Background job queue
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+    JOB_RETRY_BACKOFF_SECONDS = int(os.getenv('JOB_RETRY_BACKOFF_SECONDS', 30))
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1.0))
+    JOB_SYNC_WAIT_SECONDS = float(os.getenv('JOB_SYNC_WAIT_SECONDS', 5))
+
+    # Bulk save: URLs accepted per request, and saved items enriched per background job
+    BULK_SAVE_MAX_URLS = int(os.getenv('BULK_SAVE_MAX_URLS', 500))
+    BULK_ENRICH_BATCH_SIZE = int(os.getenv('BULK_ENRICH_BATCH_SIZE', 10))
+    # Enrichment runs on its own pool, separate from the live-save workers
+    BULK_ENRICH_WORKERS = int(os.getenv('BULK_ENRICH_WORKERS', 1))
+
+    # Two-phase saves: video saves are stored and answered after the quick text pass,
+    # and Gemini video analysis runs later on its own small worker pool
+    DEFER_VIDEO_ANALYSIS = os.getenv('DEFER_VIDEO_ANALYSIS', 'true').lower() == 'true'
+    VIDEO_ANALYSIS_WORKERS = int(os.getenv('VIDEO_ANALYSIS_WORKERS', 1))
+    # Send a WhatsApp follow-up when the video summary is ready
+    VIDEO_ANALYSIS_NOTIFY = os.getenv('VIDEO_ANALYSIS_NOTIFY', 'true').lower() == 'true'
 
     # Platform patterns
     PLATFORM_PATTERNS = {
@@ -297,6 +432,29 @@ travel, southeast-asia, budget-travel, backpacking, travel-tips, thailand, vietn
 
 Tags:"""
 
+    FUSED_METADATA_PROMPT = """You are an expert content librarian. Classify, summarize and tag a piece of saved content in one pass.
+
+AVAILABLE CATEGORIES:
+{categories}
+
+CONTENT:
+- URL: {url}
+- Platform: {platform}
+- Title: {title}
+- Description: {caption}
+
+RULES:
+1. Return ONLY a JSON object with exactly these keys: "category", "summary", "tags".
+2. "category": the exact name of ONE category from the list above. Pick the most specific; prefer skill-based categories for tutorials. If unsure, use "Other". Never invent a category.
+3. "summary": one cautious, factual sentence (maximum 25 words) about what the content is likely about. Do not pretend you watched the video. No hype, emojis, hashtags or quotes.
+4. "tags": a list of 8 to 12 lowercase search tags. Hyphenate multi-word tags ("machine-learning"). Mix broad and specific tags; include the platform name if it is a social platform. Avoid generic tags like "post", "content", "link", "video", "article".
+5. No markdown, no code fences, no text outside the JSON object.
+
+EXAMPLE:
+{{"category": "Programming & Coding", "summary": "A walkthrough of ten Python idioms that make everyday code shorter and easier to read.", "tags": ["python", "programming", "python-tricks", "clean-code", "developer-tips", "tutorial", "software-engineering", "productivity"]}}
+
+JSON:"""
+
     RAG_PROMPT = """You are a personal knowledge assistant. The user has saved a collection of links with AI-generated summaries, categories, and tags. Your job is to answer their question using ONLY the saved content provided below.
 
 USER QUESTION:
@@ -414,6 +572,114 @@ def detect_platform(url: str) -> str:
     return 'blog'
 
 
+TRACKING_PARAMS = {'fbclid', 'gclid', 'igshid', 'igsh', 'si', 'ref_src', 'ref_url', 'mc_cid', 'mc_eid'}
+
+# Hosts whose links only redirect elsewhere; resolved once and remembered in url_redirects
+SHORT_LINK_HOSTS = {
+    'pin.it', 't.co', 'vm.tiktok.com', 'vt.tiktok.com', 'fb.watch', 'lnkd.in',
+    'bit.ly', 'tinyurl.com', 'goo.gl', 'ow.ly', 'buff.ly', 'amzn.to', 'a.co',
+}
+
+
+def _host_matches(host: str, *domains: str) -> bool:
+    return any(host == domain or host.endswith('.' + domain) for domain in domains)
+
+
+def _canonical_youtube(host: str, path: str, query: dict) -> str:
+    video_id = ''
+    if host == 'youtu.be':
+        video_id = path.strip('/').split('/')[0]
+    elif path == '/watch':
+        video_id = query.get('v', '')
+    else:
+        match = re.match(r'^/(?:shorts|embed|live|v)/([\w-]+)', path)
+        video_id = match.group(1) if match else ''
+    return f'https://youtube.com/watch?v={video_id}' if video_id else ''
+
+
+def _canonical_instagram(host: str, path: str, query: dict) -> str:
+    # /p/, /reel/, /reels/ and /tv/ (optionally under /<username>/) all address the same media
+    match = re.match(r'^/(?:[\w.]+/)?(?:p|reels?|tv)/([\w-]+)', path)
+    return f'https://instagram.com/p/{match.group(1)}' if match else ''
+
+
+def _canonical_twitter(host: str, path: str, query: dict) -> str:
+    match = re.match(r'^/(?:\w+|i(?:/web)?)/status(?:es)?/(\d+)', path)
+    return f'https://x.com/i/status/{match.group(1)}' if match else ''
+
+
+def _canonical_tiktok(host: str, path: str, query: dict) -> str:
+    match = re.match(r'^/(@[\w.-]+)/(?:video|photo)/(\d+)', path)
+    return f'https://tiktok.com/{match.group(1)}/video/{match.group(2)}' if match else ''
+
+
+def _canonical_reddit(host: str, path: str, query: dict) -> str:
+    if host == 'redd.it':
+        post_id = path.strip('/').split('/')[0]
+    else:
+        match = re.match(r'^(?:/r/\w+)?/comments/(\w+)', path)
+        post_id = match.group(1) if match else ''
+    return f'https://reddit.com/comments/{post_id}' if post_id else ''
+
+
+PLATFORM_CANONICALIZERS = (
+    (('youtube.com', 'youtu.be', 'youtube-nocookie.com'), _canonical_youtube),
+    (('instagram.com', 'instagr.am'), _canonical_instagram),
+    (('twitter.com', 'x.com'), _canonical_twitter),
+    (('tiktok.com',), _canonical_tiktok),
+    (('reddit.com', 'redd.it'), _canonical_reddit),
+)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL for use as a cache/dedupe key (not for fetching).
+
+    Every URL gets a lowercase host without www./m., no fragment, no tracking
+    parameters and a sorted query. Known platforms are then reduced to their
+    content ID, so youtu.be/X and youtube.com/watch?v=X&t=10 share one key.
+    """
+    from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+
+    host = (parts.hostname or '').lower()
+    for prefix in ('www.', 'm.', 'mobile.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+    )
+    path = parts.path.rstrip('/') or '/'
+
+    for domains, canonicalizer in PLATFORM_CANONICALIZERS:
+        if _host_matches(host, *domains):
+            canonical = canonicalizer(host, path, dict(query))
+            if canonical:
+                return canonical
+            break
+
+    if parts.port and parts.port not in (80, 443):
+        host = f'{host}:{parts.port}'
+    return urlunsplit(('https' if parts.scheme in ('http', 'https') else parts.scheme,
+                       host, path, urlencode(query), ''))
+
+
+def is_short_link(url: str) -> bool:
+    from urllib.parse import urlsplit
+    try:
+        host = (urlsplit(url.strip()).hostname or '').lower()
+    except ValueError:
+        return False
+    return host in SHORT_LINK_HOSTS
+
+
 def is_valid_url(url: str) -> bool:
     from urllib.parse import urlparse
     try:
@@ -6,15 +6,105 @@ Extracts content from various social media platforms and blogs
 import re
 import json
 import os
+import base64
+import asyncio
+import atexit
+import multiprocessing
+import threading
+import time
 import requests
 from bs4 import BeautifulSoup
-from typing import Dict, Optional, Tuple
-from config import Config, detect_platform, is_valid_url
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from cache import get_cache, make_key
+from config import Config, canonicalize_url, detect_platform, is_short_link, is_valid_url
+from database import get_url_redirect, save_url_redirect
+from html_meta import parse_meta
+import ytdlp_runner
 
-try:
-    from yt_dlp import YoutubeDL
-except ImportError:
-    YoutubeDL = None
+HEAD_END = re.compile(rb'</head\s*>', re.IGNORECASE)
+
+
+def _declared_charset(headers) -> str:
+    """The charset parameter of a Content-Type header, or ''."""
+    match = re.search(r'charset\s*=\s*["\']?([\w.:-]+)', headers.get('Content-Type', ''), re.IGNORECASE)
+    return match.group(1) if match else ''
+
+
+def _freshness_lifetime(headers) -> Optional[int]:
+    """Seconds a response stays fresh per Cache-Control/Expires, or None if unspecified."""
+    cache_control = headers.get('Cache-Control', '').lower()
+    if 'no-cache' in cache_control:
+        return 0
+
+    match = re.search(r'max-age=(\d+)', cache_control)
+    if match:
+        return int(match.group(1))
+
+    expires = headers.get('Expires')
+    if expires:
+        try:
+            return max(0, int(parsedate_to_datetime(expires).timestamp() - time.time()))
+        except (TypeError, ValueError):
+            return 0
+    return None
+
+
+class _YtdlpPool:
+    """A worker pool plus the number of callers still waiting on it."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.waiting = 0
+
+
+_ytdlp_pool: Optional[_YtdlpPool] = None
+_ytdlp_pool_lock = threading.Lock()
+
+
+def _checkout_ytdlp_pool() -> _YtdlpPool:
+    global _ytdlp_pool
+    with _ytdlp_pool_lock:
+        if _ytdlp_pool is None:
+            # spawn, not fork: the parent runs job and AI worker threads. Workers
+            # only import ytdlp_runner, never this module or the database.
+            context = multiprocessing.get_context('spawn')
+            _ytdlp_pool = _YtdlpPool(
+                context.Pool(processes=Config.YTDLP_PROCESS_WORKERS, maxtasksperchild=50)
+            )
+        _ytdlp_pool.waiting += 1
+        return _ytdlp_pool
+
+
+def _checkin_ytdlp_pool(entry: _YtdlpPool, timed_out: bool = False) -> None:
+    """
+    Release a caller's hold on a pool.
+
+    A pool cannot cancel one task, so a timeout retires the pool: new calls get
+    a fresh one, while extractions already running on the old pool finish
+    normally. The old pool (with the hung task) is killed once the last of
+    them returns.
+    """
+    global _ytdlp_pool
+    with _ytdlp_pool_lock:
+        entry.waiting -= 1
+        if timed_out and _ytdlp_pool is entry:
+            _ytdlp_pool = None
+        retire = _ytdlp_pool is not entry and entry.waiting == 0
+    if retire:
+        entry.pool.terminate()
+
+
+def _terminate_ytdlp_pool() -> None:
+    global _ytdlp_pool
+    with _ytdlp_pool_lock:
+        entry, _ytdlp_pool = _ytdlp_pool, None
+    if entry is not None:
+        entry.pool.terminate()
+
+
+atexit.register(_terminate_ytdlp_pool)
 
 
 class ContentExtractor:
@@ -47,6 +137,7 @@ class ContentExtractor:
                 'error': 'Invalid URL format'
             }
         
+        url = self.resolve_short_link(url)
         platform = detect_platform(url)
         
         # Dispatch to platform-specific extractor
@@ -64,16 +155,150 @@ class ContentExtractor:
         extractor = extractors.get(platform, self._extract_generic)
         return extractor(url)
     
+    def resolve_short_link(self, url: str, network: bool = True) -> str:
+        """
+        Expand pin.it / t.co / vm.tiktok.com style links to their target URL.
+
+        Resolved targets are remembered in url_redirects, so each short link
+        costs one request ever; with network=False only that table is consulted.
+        Anything that is not a known short link is returned unchanged.
+        """
+        if not is_short_link(url):
+            return url
+
+        short_url = canonicalize_url(url)
+        target = get_url_redirect(short_url)
+        if target or not network:
+            return target or url
+
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            if response.status_code >= 400:
+                # Some shorteners reject HEAD; a streamed GET follows the same redirects
+                response = self.session.get(url, allow_redirects=True, timeout=self.timeout, stream=True)
+                response.close()
+            target = response.url
+        except requests.exceptions.RequestException as e:
+            print(f"Short link resolution failed for {url}: {e}")
+            return url
+
+        if target and target != url:
+            save_url_redirect(short_url, target)
+            return target
+        return url
+
     def _make_request(self, url: str) -> Optional[BeautifulSoup]:
         """Make HTTP request and return BeautifulSoup object"""
+        content = self._fetch(url)
+        if content is None:
+            return None
+        return BeautifulSoup(content, 'html.parser')
+
+    def _fetch_meta(self, url: str) -> Optional[Dict]:
+        """
+        Fetch a page for extractors that only read <title> and <meta> tags.
+
+        The body is streamed and the download stops at </head>; the tags are
+        collected in one pass into parse_meta()'s {'title', 'meta'} dict.
+        """
+        fetched = self._fetch_page(url, head_only=Config.HTTP_HEAD_ONLY)
+        if fetched is None:
+            return None
+        content, charset = fetched
+        return parse_meta(content, encoding=charset)
+
+    def _fetch(self, url: str, head_only: bool = False) -> Optional[bytes]:
+        """GET a page body through the HTTP cache (see _fetch_page)."""
+        fetched = self._fetch_page(url, head_only)
+        return fetched[0] if fetched else None
+
+    def _fetch_page(self, url: str, head_only: bool = False) -> Optional[Tuple[bytes, str]]:
+        """
+        GET a page through the HTTP cache and return (body, Content-Type charset).
+
+        Fresh entries are served locally; stale ones with an ETag or
+        Last-Modified are revalidated with a conditional request, so
+        re-extracting a saved URL is usually a local hit or a 304. The charset
+        is '' when the server did not declare one.
+        """
+        cache = get_cache('http', Config.HTTP_CACHE_MAX_ENTRIES, Config.HTTP_CACHE_STALE_TTL) \
+            if Config.HTTP_CACHE_ENABLED else None
+        cache_key = make_key(canonicalize_url(url), 'head' if head_only else 'full')
+        entry = cache.get(cache_key) if cache else None
+
+        if entry and entry['fresh_until'] > time.time():
+            return base64.b64decode(entry['body']), entry.get('charset', '')
+
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
         try:
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
+            response = self.session.get(url, headers=headers, timeout=self.timeout, stream=head_only)
+            if response.status_code == 304 and entry:
+                content = base64.b64decode(entry['body'])
+            else:
+                response.raise_for_status()
+                content = self._read_head(response) if head_only else response.content
         except requests.exceptions.RequestException as e:
             print(f"Request error: {e}")
             return None
 
+        charset = _declared_charset(response.headers) or (entry or {}).get('charset', '')
+        if cache:
+            self._store_http_response(cache, cache_key, url, response, content, entry, charset)
+        return content, charset
+
+    def _read_head(self, response) -> bytes:
+        """Read a streamed response up to </head> or HTTP_HEAD_MAX_BYTES, then drop the connection."""
+        buffer = bytearray()
+        try:
+            for chunk in response.iter_content(chunk_size=16384):
+                if not chunk:
+                    continue
+                # Re-scan a few bytes before the new chunk in case the tag straddles two chunks
+                scan_from = max(0, len(buffer) - 8)
+                buffer.extend(chunk)
+                match = HEAD_END.search(buffer, scan_from)
+                if match:
+                    return bytes(buffer[:match.end()])
+                if len(buffer) >= Config.HTTP_HEAD_MAX_BYTES:
+                    return bytes(buffer[:Config.HTTP_HEAD_MAX_BYTES])
+            return bytes(buffer)
+        finally:
+            response.close()
+
+    def _store_http_response(self, cache, cache_key: str, url: str, response, content: bytes,
+                             entry: Optional[Dict], charset: str = '') -> None:
+        cache_control = response.headers.get('Cache-Control', '').lower()
+        if 'no-store' in cache_control or len(content) > Config.HTTP_CACHE_MAX_BODY_BYTES:
+            return
+
+        etag = response.headers.get('ETag') or (entry or {}).get('etag', '')
+        last_modified = response.headers.get('Last-Modified') or (entry or {}).get('last_modified', '')
+
+        fresh_for = _freshness_lifetime(response.headers)
+        platform = detect_platform(url)
+        if platform in Config.HTTP_CACHE_PLATFORM_TTLS:
+            fresh_for = Config.HTTP_CACHE_PLATFORM_TTLS[platform]
+        elif fresh_for is None:
+            fresh_for = Config.HTTP_CACHE_DEFAULT_TTL
+
+        # Without validators a stale entry is useless, so drop it once it expires.
+        keep_for = max(fresh_for, Config.HTTP_CACHE_STALE_TTL) if (etag or last_modified) else fresh_for
+        if keep_for <= 0:
+            return
+
+        cache.set(cache_key, {
+            'body': base64.b64encode(content).decode('ascii'),
+            'etag': etag,
+            'last_modified': last_modified,
+            'charset': charset,
+            'fresh_until': time.time() + fresh_for
+        }, ttl=keep_for)
+
     def _get_meta_content(self, soup: BeautifulSoup, **attrs) -> str:
         """Return the content value for the first matching meta tag."""
         tag = soup.find('meta', attrs=attrs)
@@ -92,6 +317,13 @@ class ContentExtractor:
                 return video_url
         return ''
 
+    def _video_url_from_meta(self, meta: Dict[str, str]) -> str:
+        """Same lookup as _extract_video_meta_url, over a parse_meta() dict."""
+        for key in ('og:video', 'og:video:url', 'og:video:secure_url', 'twitter:player:stream'):
+            if meta.get(key):
+                return meta[key]
+        return ''
+
     def _pick_ytdlp_media_url(self, info: Dict) -> str:
         """Choose the best available video URL from yt-dlp metadata."""
         direct_url = info.get('url')
@@ -181,7 +413,7 @@ class ContentExtractor:
                 'media_extraction_error': 'yt-dlp fallback is disabled in configuration.'
             }
 
-        if YoutubeDL is None:
+        if not ytdlp_runner.available():
             return {
                 'media_extraction_status': 'yt_dlp_not_installed',
                 'media_extraction_error': 'yt-dlp is not installed in this environment.'
@@ -206,9 +438,30 @@ class ContentExtractor:
                     'media_extraction_error': detail
                 }
 
+        cache = get_cache('ytdlp', Config.HTTP_CACHE_MAX_ENTRIES, Config.YTDLP_METADATA_CACHE_TTL) \
+            if Config.HTTP_CACHE_ENABLED else None
+        canonical_url = canonicalize_url(url)
+        meta_key = make_key(canonical_url, 'metadata')
+        media_key = make_key(canonical_url, 'media')
+        cached_meta = None
+        if cache:
+            cached_meta = cache.get(meta_key)
+            cached_media = cache.get(media_key)
+            if cached_meta is not None and cached_media is not None:
+                return self._ytdlp_result(url, cached_meta, cached_media)
+
+        # Only the signed media URL has expired: yt-dlp has to run again for a
+        # fresh one, but a failed refresh still returns the cached metadata.
         try:
-            with YoutubeDL(options) as ydl:
-                info = ydl.extract_info(url, download=False)
+            info = self._run_ytdlp_isolated(url, options)
+        except multiprocessing.TimeoutError:
+            detail = f'yt-dlp did not finish within {Config.YTDLP_TIMEOUT_SECONDS:g}s.'
+            print(f"yt-dlp extraction failed [timeout] url={url} detail={detail}")
+            return {
+                **(cached_meta or {}),
+                'media_extraction_status': 'timeout',
+                'media_extraction_error': detail
+            }
         except Exception as exc:
             status, detail = self._classify_ytdlp_error(exc)
             print(
@@ -216,31 +469,55 @@ class ContentExtractor:
                 f"cookiefile={cookiefile or 'none'} detail={detail} raw_error={exc}"
             )
             return {
+                **(cached_meta or {}),
                 'media_extraction_status': status,
                 'media_extraction_error': detail
             }
 
-        if info and info.get('_type') == 'playlist':
-            entries = [entry for entry in (info.get('entries') or []) if entry]
-            info = entries[0] if entries else {}
-
         if not info:
             detail = 'yt-dlp returned no extraction data for this URL.'
             print(f"yt-dlp extraction failed [empty_result] url={url} detail={detail}")
             return {
+                **(cached_meta or {}),
                 'media_extraction_status': 'empty_result',
                 'media_extraction_error': detail
             }
 
+        metadata = {
+            'title': info.get('title') or '',
+            'caption': info.get('description') or '',
+            'image_url': info.get('thumbnail') or '',
+            'author': info.get('uploader') or info.get('channel') or '',
+        }
         media_url = self._pick_ytdlp_media_url(info)
+        if cache:
+            cache.set(meta_key, metadata, ttl=Config.YTDLP_METADATA_CACHE_TTL)
+            cache.set(media_key, media_url, ttl=Config.YTDLP_MEDIA_CACHE_TTL)
+
+        return self._ytdlp_result(url, metadata, media_url)
+
+    def _run_ytdlp_isolated(self, url: str, options: Dict) -> Dict:
+        """Run yt-dlp in the process pool under a hard timeout (inline if the pool is disabled)."""
+        if Config.YTDLP_PROCESS_WORKERS <= 0:
+            return ytdlp_runner.run_ytdlp(url, options)
+
+        entry = _checkout_ytdlp_pool()
+        timed_out = False
+        try:
+            pending = entry.pool.apply_async(ytdlp_runner.run_ytdlp, (url, options))
+            return pending.get(timeout=Config.YTDLP_TIMEOUT_SECONDS)
+        except multiprocessing.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            _checkin_ytdlp_pool(entry, timed_out)
+
+    def _ytdlp_result(self, url: str, metadata: Dict, media_url: str) -> Dict:
         extraction_status = 'yt_dlp_success' if media_url else 'no_media_url_found'
         extraction_error = '' if media_url else 'yt-dlp extracted metadata but no direct media URL was available.'
 
         return {
-            'title': info.get('title', ''),
-            'caption': info.get('description', ''),
-            'image_url': info.get('thumbnail', ''),
-            'author': info.get('uploader') or info.get('channel') or '',
+            **metadata,
             'media_url': media_url,
             'media_type': 'reel' if '/reel/' in url.lower() else ('video' if media_url else ''),
             'media_extraction_status': extraction_status,
@@ -473,38 +750,35 @@ class ContentExtractor:
     
     def _extract_facebook(self, url: str) -> Dict:
         """Extract content from Facebook posts"""
-        soup = self._make_request(url)
+        page = self._fetch_meta(url)
         
-        if not soup:
+        if not page:
             return {'success': False, 'error': 'Failed to fetch Facebook post'}
         
-        title = soup.find('meta', property='og:title')
-        description = soup.find('meta', property='og:description')
-        image = soup.find('meta', property='og:image')
+        meta = page['meta']
+        video_url = self._video_url_from_meta(meta)
         
         result = {
             'success': True,
             'platform': 'facebook',
             'url': url,
-            'title': title['content'] if title else 'Facebook Post',
-            'caption': description['content'] if description else '',
-            'image_url': image['content'] if image else '',
+            'title': meta.get('og:title') or 'Facebook Post',
+            'caption': meta.get('og:description', ''),
+            'image_url': meta.get('og:image', ''),
             'author': '',
-            'media_type': 'video' if self._extract_video_meta_url(soup) else 'post',
-            'media_url': self._extract_video_meta_url(soup)
+            'media_type': 'video' if video_url else 'post',
+            'media_url': video_url
         }
         return self._merge_ytdlp_result(result)
     
     def _extract_youtube(self, url: str) -> Dict:
         """Extract content from YouTube videos"""
-        soup = self._make_request(url)
+        page = self._fetch_meta(url)
         
-        if not soup:
+        if not page:
             return {'success': False, 'error': 'Failed to fetch YouTube video'}
         
-        title = soup.find('meta', property='og:title')
-        description = soup.find('meta', property='og:description')
-        image = soup.find('meta', property='og:image')
+        meta = page['meta']
         
         # Extract video ID
         video_id = ''
@@ -521,9 +795,9 @@ class ContentExtractor:
             'success': True,
             'platform': 'youtube',
             'url': url,
-            'title': title['content'] if title else 'YouTube Video',
-            'caption': description['content'] if description else '',
-            'image_url': f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg' if video_id else (image['content'] if image else ''),
+            'title': meta.get('og:title') or 'YouTube Video',
+            'caption': meta.get('og:description', ''),
+            'image_url': f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg' if video_id else meta.get('og:image', ''),
             'video_id': video_id,
             'media_type': 'video',
             'media_url': url
@@ -531,92 +805,85 @@ class ContentExtractor:
     
     def _extract_tiktok(self, url: str) -> Dict:
         """Extract content from TikTok videos"""
-        soup = self._make_request(url)
+        page = self._fetch_meta(url)
         
-        if not soup:
+        if not page:
             return {'success': False, 'error': 'Failed to fetch TikTok video'}
         
-        title = soup.find('meta', property='og:title')
-        description = soup.find('meta', property='og:description')
-        image = soup.find('meta', property='og:image')
+        meta = page['meta']
         
         result = {
             'success': True,
             'platform': 'tiktok',
             'url': url,
-            'title': title['content'] if title else 'TikTok Video',
-            'caption': description['content'] if description else '',
-            'image_url': image['content'] if image else '',
+            'title': meta.get('og:title') or 'TikTok Video',
+            'caption': meta.get('og:description', ''),
+            'image_url': meta.get('og:image', ''),
             'author': '',
             'media_type': 'video',
-            'media_url': self._extract_video_meta_url(soup)
+            'media_url': self._video_url_from_meta(meta)
         }
         return self._merge_ytdlp_result(result)
     
     def _extract_linkedin(self, url: str) -> Dict:
         """Extract content from LinkedIn posts"""
-        soup = self._make_request(url)
+        page = self._fetch_meta(url)
         
-        if not soup:
+        if not page:
             return {'success': False, 'error': 'Failed to fetch LinkedIn post'}
         
-        title = soup.find('meta', property='og:title')
-        description = soup.find('meta', property='og:description')
-        image = soup.find('meta', property='og:image')
+        meta = page['meta']
+        video_url = self._video_url_from_meta(meta)
         
         result = {
             'success': True,
             'platform': 'linkedin',
             'url': url,
-            'title': title['content'] if title else 'LinkedIn Post',
-            'caption': description['content'] if description else '',
-            'image_url': image['content'] if image else '',
+            'title': meta.get('og:title') or 'LinkedIn Post',
+            'caption': meta.get('og:description', ''),
+            'image_url': meta.get('og:image', ''),
             'author': '',
-            'media_type': 'video' if self._extract_video_meta_url(soup) else 'post',
-            'media_url': self._extract_video_meta_url(soup)
+            'media_type': 'video' if video_url else 'post',
+            'media_url': video_url
         }
         return self._merge_ytdlp_result(result)
     
     def _extract_reddit(self, url: str) -> Dict:
         """Extract content from Reddit posts"""
-        soup = self._make_request(url)
+        page = self._fetch_meta(url)
         
-        if not soup:
+        if not page:
             return {'success': False, 'error': 'Failed to fetch Reddit post'}
         
-        title = soup.find('meta', property='og:title')
-        description = soup.find('meta', property='og:description')
-        image = soup.find('meta', property='og:image')
+        meta = page['meta']
         
         return {
             'success': True,
             'platform': 'reddit',
             'url': url,
-            'title': title['content'] if title else 'Reddit Post',
-            'caption': description['content'] if description else '',
-            'image_url': image['content'] if image else '',
+            'title': meta.get('og:title') or 'Reddit Post',
+            'caption': meta.get('og:description', ''),
+            'image_url': meta.get('og:image', ''),
             'author': '',
             'media_type': 'post'
         }
     
     def _extract_pinterest(self, url: str) -> Dict:
         """Extract content from Pinterest pins"""
-        soup = self._make_request(url)
+        page = self._fetch_meta(url)
         
-        if not soup:
+        if not page:
             return {'success': False, 'error': 'Failed to fetch Pinterest pin'}
         
-        title = soup.find('meta', property='og:title')
-        description = soup.find('meta', property='og:description')
-        image = soup.find('meta', property='og:image')
+        meta = page['meta']
         
         return {
             'success': True,
             'platform': 'pinterest',
             'url': url,
-            'title': title['content'] if title else 'Pinterest Pin',
-            'caption': description['content'] if description else '',
-            'image_url': image['content'] if image else '',
+            'title': meta.get('og:title') or 'Pinterest Pin',
+            'caption': meta.get('og:description', ''),
+            'image_url': meta.get('og:image', ''),
             'author': '',
             'media_type': 'image',
             'media_url': ''
@@ -697,6 +964,80 @@ class ContentExtractor:
         
         return result
 
+    def extract_many(self, urls: Iterable[str], max_concurrency: int = None) -> List[Dict]:
+        """Extract a batch of URLs concurrently (blocking); see extract_many_async."""
+        return asyncio.run(extract_many_async(urls, self, max_concurrency))
+
+
+class HostThrottle:
+    """
+    Per-host concurrency limit plus a minimum gap between request starts.
+
+    Hosts are matched on their registrable suffix, so www.instagram.com and
+    m.instagram.com share the instagram.com limits.
+    """
+
+    def __init__(self):
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._next_start: Dict[str, float] = {}
+
+    def host_key(self, url: str) -> str:
+        host = (urlsplit(url).hostname or '').lower()
+        for configured in set(Config.EXTRACT_HOST_CONCURRENCY) | set(Config.EXTRACT_HOST_DELAYS):
+            if host == configured or host.endswith('.' + configured):
+                return configured
+        return host[4:] if host.startswith('www.') else host
+
+    async def acquire(self, host: str) -> asyncio.Semaphore:
+        if host not in self._semaphores:
+            limit = Config.EXTRACT_HOST_CONCURRENCY.get(host, Config.EXTRACT_PER_HOST_CONCURRENCY)
+            self._semaphores[host] = asyncio.Semaphore(max(1, limit))
+            self._locks[host] = asyncio.Lock()
+
+        semaphore = self._semaphores[host]
+        await semaphore.acquire()
+        async with self._locks[host]:
+            loop = asyncio.get_running_loop()
+            wait = self._next_start.get(host, 0) - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            delay = Config.EXTRACT_HOST_DELAYS.get(host, Config.EXTRACT_POLITENESS_DELAY)
+            self._next_start[host] = loop.time() + delay
+        return semaphore
+
+
+async def extract_many_async(
+    urls: Iterable[str],
+    engine: 'ContentExtractor' = None,
+    max_concurrency: int = None
+) -> List[Dict]:
+    """
+    Extract many URLs concurrently, respecting per-host limits and politeness delays.
+
+    Each extraction runs the normal synchronous extractor in a worker thread, so
+    the HTTP cache, head-only streaming and the yt-dlp pool all still apply.
+    Results come back in input order; failures are returned as
+    {'success': False, 'error': ...} rather than raised.
+    """
+    engine = engine or extractor
+    urls = list(urls)
+    throttle = HostThrottle()
+    overall = asyncio.Semaphore(max(1, max_concurrency or Config.EXTRACT_CONCURRENCY))
+
+    async def run(url: str) -> Dict:
+        host_semaphore = await throttle.acquire(throttle.host_key(url))
+        try:
+            async with overall:
+                return await asyncio.to_thread(engine.extract, url)
+        except Exception as exc:
+            print(f"Bulk extraction failed for {url}: {exc}")
+            return {'success': False, 'url': url, 'error': str(exc)}
+        finally:
+            host_semaphore.release()
+
+    return await asyncio.gather(*(run(url) for url in urls))
+
 
 # Singleton instance
 extractor = ContentExtractor()
@@ -710,3 +1051,13 @@ def extract_content(url: str) -> Dict:
 def extract_content_with_retry(url: str, max_retries: int = 3) -> Dict:
     """Convenience function to extract content with retry"""
     return extractor.extract_with_retry(url, max_retries)
+
+
+def resolve_short_link(url: str, network: bool = True) -> str:
+    """Convenience function to expand a short link (see ContentExtractor.resolve_short_link)"""
+    return extractor.resolve_short_link(url, network)
+
+
+def extract_many(urls: Iterable[str], max_concurrency: int = None) -> List[Dict]:
+    """Convenience function to extract a batch of URLs concurrently"""
+    return extractor.extract_many(urls, max_concurrency)
@@ -3,73 +3,251 @@ Database module for Social Saver Bot
 Handles SQLite operations for storing and retrieving saved content
 """
 
+import base64
+import json
 import sqlite3
 import os
+import queue
+import re
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 
-# Database file path
-DB_PATH = os.path.join(os.path.dirname(__file__), 'social_saver.db')
+from config import Config, canonicalize_url
 
+# Database file path (DATABASE_PATH in .env)
+DB_PATH = Config.DATABASE_PATH
 
-def get_db_connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
 
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection whose close() hands it back to its pool.
 
-def init_db() -> None:
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    Borrow it with `with get_db_connection() as conn:`: leaving the block
+    commits (or rolls back on an exception) and always returns the connection,
+    so an error inside a query can never leak a pool slot.
+    """
+
+    pool = None
 
-    # Create table with image_url for fresh installs
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS saved_content (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            url TEXT NOT NULL,
-            platform TEXT NOT NULL,
-            title TEXT,
-            caption TEXT,
-            image_url TEXT,
-            media_extraction_status TEXT,
-            media_extraction_error TEXT,
-            category TEXT,
-            summary TEXT,
-            summary_source TEXT,
-            video_summary TEXT,
-            video_summary_status TEXT,
-            tags TEXT,
-            user_phone TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            return super().__exit__(exc_type, exc_value, traceback)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def dispose(self) -> None:
+        super().close()
+
+
+class ConnectionPool:
+    """Bounded pool of reusable SQLite connections for one database file."""
+
+    def __init__(self, path: str, max_size: int, timeout: float):
+        self.path = path
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> PooledConnection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=Config.DB_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            factory=PooledConnection
         )
-    ''')
-
-    # ✅ FIX: Auto-migrate existing databases — adds missing columns
-    for col_name in (
-        'image_url',
-        'media_extraction_status',
-        'media_extraction_error',
-        'summary_source',
-        'video_summary',
-        'video_summary_status'
-    ):
+        conn.row_factory = sqlite3.Row
+        conn.execute(f'PRAGMA busy_timeout = {int(Config.DB_BUSY_TIMEOUT_MS)}')
+        if self.path != ':memory:':
+            conn.execute(f'PRAGMA journal_mode = {Config.DB_JOURNAL_MODE}')
+        conn.execute(f'PRAGMA synchronous = {Config.DB_SYNCHRONOUS}')
+        conn.execute(f'PRAGMA cache_size = -{int(Config.DB_CACHE_SIZE_KB)}')
+        conn.execute(f'PRAGMA mmap_size = {int(Config.DB_MMAP_SIZE)}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        conn.pool = self
+        return conn
+
+    def acquire(self) -> PooledConnection:
         try:
-            cursor.execute(f'ALTER TABLE saved_content ADD COLUMN {col_name} TEXT')
-            print(f"Migrated DB: added {col_name} column")
-        except sqlite3.OperationalError:
-            pass  # Column already exists — fine, do nothing
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f'Timed out waiting for a database connection (pool size {self.max_size})'
+            )
+
+    def release(self, conn: PooledConnection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+
+        if self._closed:
+            self._discard(conn)
+        else:
+            self._idle.put(conn)
+
+    def _discard(self, conn: PooledConnection) -> None:
+        with self._lock:
+            self._created -= 1
+        try:
+            conn.dispose()
+        except sqlite3.Error:
+            pass
+
+    def close_all(self) -> None:
+        """Close idle connections; connections still checked out close on release."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the shared pool, rebuilding it if DB_PATH has been changed."""
+    global _pool
+    pool = _pool
+    if pool is not None and pool.path == DB_PATH:
+        return pool
+
+    with _pool_lock:
+        if _pool is None or _pool.path != DB_PATH:
+            if _pool is not None:
+                _pool.close_all()
+            _pool = ConnectionPool(DB_PATH, Config.DB_POOL_SIZE, Config.DB_POOL_TIMEOUT)
+        return _pool
 
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_platform ON saved_content(platform)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_category ON saved_content(category)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_phone ON saved_content(user_phone)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON saved_content(timestamp)')
 
-    conn.commit()
-    conn.close()
+def close_pool() -> None:
+    """Close every pooled connection (used on shutdown and in tests)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+            _pool = None
+
+
+def get_db_connection() -> sqlite3.Connection:
+    """Borrow a pooled connection; leaving its `with` block (or close()) returns it to the pool."""
+    return get_pool().acquire()
+
+
+def init_db() -> None:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        # Create table with image_url for fresh installs
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS saved_content (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                title TEXT,
+                caption TEXT,
+                image_url TEXT,
+                media_extraction_status TEXT,
+                media_extraction_error TEXT,
+                category TEXT,
+                category_source TEXT,
+                summary TEXT,
+                summary_source TEXT,
+                video_summary TEXT,
+                video_summary_status TEXT,
+                tags TEXT,
+                user_phone TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # ✅ FIX: Auto-migrate existing databases — adds missing columns
+        for col_name in (
+            'image_url',
+            'media_extraction_status',
+            'media_extraction_error',
+            'summary_source',
+            'video_summary',
+            'video_summary_status',
+            'canonical_url',
+            'category_source'
+        ):
+            try:
+                cursor.execute(f'ALTER TABLE saved_content ADD COLUMN {col_name} TEXT')
+                print(f"Migrated DB: added {col_name} column")
+            except sqlite3.OperationalError:
+                continue  # Column already exists — fine, do nothing
+            if col_name == 'category_source':
+                # Categories saved before sources were tracked came from the LLM
+                cursor.execute("UPDATE saved_content SET category_source = 'ai' WHERE category IS NOT NULL AND category != 'Other'")
+
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_platform ON saved_content(platform)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_category ON saved_content(category)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_phone ON saved_content(user_phone)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON saved_content(timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp_id ON saved_content(timestamp DESC, id DESC)')
+
+        conn.commit()
+    init_canonical_urls()
     init_collections_table()
+    init_search_index()
+    init_stats_table()
+    init_embeddings_table()
+    init_minhash_table()
+    init_jobs_table()
+    init_processed_messages_table()
+    init_outbound_messages_table()
     print("Database initialized successfully!")
 
 
+# Callbacks run with a content id after save_content/update_content commit
+# (the semantic index registers one to embed new and edited items)
+_content_hooks: List[Callable[[int], None]] = []
+
+
+def on_content_saved(hook: Callable[[int], None]) -> Callable[[int], None]:
+    if hook not in _content_hooks:
+        _content_hooks.append(hook)
+    return hook
+
+
+def _run_content_hooks(content_id: int) -> None:
+    for hook in _content_hooks:
+        try:
+            hook(content_id)
+        except Exception as exc:
+            print(f"Content hook {hook.__name__} failed for {content_id}: {exc}")
+
+
 def save_content(
     url: str,
     platform: str,
@@ -84,133 +262,405 @@ def save_content(
     video_summary: str = None,
     video_summary_status: str = None,
     tags: str = None,
-    user_phone: str = None
+    user_phone: str = None,
+    canonical_url: str = None,
+    category_source: str = None
 ) -> int:
+    """
+    Insert a saved item and return its id.
+
+    canonical_url defaults to canonicalize_url(url); pass it explicitly when the
+    URL was a short link resolved elsewhere. If the canonical URL is already
+    saved (e.g. two saves raced), the existing row's id is returned instead.
+    category_source records who chose the category: 'ai', 'user' or 'local'
+    (the category classifier's own prediction, which it must not train on).
+    """
+    canonical_url = canonical_url or canonicalize_url(url)
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    cursor.execute('''
-        INSERT INTO saved_content (
-            url, platform, title, caption, image_url,
+    try:
+        cursor.execute('''
+            INSERT INTO saved_content (
+                url, canonical_url, platform, title, caption, image_url,
+                media_extraction_status, media_extraction_error,
+                category, category_source, summary, summary_source, video_summary, video_summary_status, tags, user_phone
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            url, canonical_url, platform, title, caption, image_url,
             media_extraction_status, media_extraction_error,
-            category, summary, summary_source, video_summary, video_summary_status, tags, user_phone
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        url, platform, title, caption, image_url,
-        media_extraction_status, media_extraction_error,
-        category, summary, summary_source, video_summary, video_summary_status, tags, user_phone
-    ))
-
-    content_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+            category, category_source, summary, summary_source, video_summary, video_summary_status, tags, user_phone
+        ))
+        content_id = cursor.lastrowid
+        conn.commit()
+    except sqlite3.IntegrityError:
+        conn.rollback()
+        cursor.execute('SELECT id FROM saved_content WHERE canonical_url = ?', (canonical_url,))
+        row = cursor.fetchone()
+        if row is None:
+            raise  # some other constraint failed, not a duplicate URL
+        return row['id']
+    finally:
+        conn.close()
+
+    _run_content_hooks(content_id)
     return content_id
 
 
+_CONTENT_COLUMNS = (
+    'url', 'canonical_url', 'platform', 'title', 'caption', 'image_url',
+    'media_extraction_status', 'media_extraction_error',
+    'category', 'category_source', 'summary', 'summary_source', 'video_summary', 'video_summary_status', 'tags',
+    'user_phone', 'collection', 'timestamp'
+)
+
+
+def save_contents_many(items: List[Dict], chunk_size: int = 500) -> List[Tuple[int, bool]]:
+    """
+    Insert many items (dicts of save_content's arguments) in one transaction.
+
+    Returns (content_id, created) per item, in input order. Items whose canonical
+    URL is already saved, or repeated earlier in the batch, get the existing id
+    with created=False. A missing timestamp defaults to now.
+    """
+    rows = []
+    for item in items:
+        row = {column: item.get(column) for column in _CONTENT_COLUMNS}
+        row['canonical_url'] = row['canonical_url'] or canonicalize_url(row['url'])
+        rows.append(row)
+
+    canonical_urls = list(dict.fromkeys(row['canonical_url'] for row in rows))
+    placeholders = ', '.join(
+        'COALESCE(?, CURRENT_TIMESTAMP)' if column == 'timestamp' else '?' for column in _CONTENT_COLUMNS
+    )
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        existing = _ids_by_canonical_url(cursor, canonical_urls, chunk_size)
+
+        new_rows, queued = [], set()
+        for row in rows:
+            if row['canonical_url'] not in existing and row['canonical_url'] not in queued:
+                queued.add(row['canonical_url'])
+                new_rows.append(tuple(row[column] for column in _CONTENT_COLUMNS))
+
+        cursor.executemany(
+            f'INSERT OR IGNORE INTO saved_content ({", ".join(_CONTENT_COLUMNS)}) VALUES ({placeholders})',
+            new_rows
+        )
+        ids = _ids_by_canonical_url(cursor, list(queued), chunk_size)
+        conn.commit()
+    finally:
+        conn.close()
+
+    ids.update(existing)
+    results, seen = [], set()
+    for row in rows:
+        canonical_url = row['canonical_url']
+        results.append((ids[canonical_url], canonical_url not in existing and canonical_url not in seen))
+        seen.add(canonical_url)
+    return results
+
+
+def _ids_by_canonical_url(cursor, canonical_urls: List[str], chunk_size: int) -> Dict[str, int]:
+    ids = {}
+    for start in range(0, len(canonical_urls), chunk_size):
+        chunk = canonical_urls[start:start + chunk_size]
+        cursor.execute(
+            f'SELECT canonical_url, id FROM saved_content WHERE canonical_url IN ({", ".join("?" for _ in chunk)})',
+            chunk
+        )
+        ids.update({row['canonical_url']: row['id'] for row in cursor.fetchall()})
+    return ids
+
+
+def encode_cursor(item: Dict) -> str:
+    """Build an opaque pagination cursor pointing just past the given row."""
+    raw = json.dumps([item['timestamp'], item['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[str, int]]:
+    """Return (timestamp, id) for a cursor from encode_cursor, or None if malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, content_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(timestamp, str) or not isinstance(content_id, int):
+            return None
+        return timestamp, content_id
+    except (ValueError, TypeError, UnicodeError):
+        return None
+
+
 def get_all_content(
     limit: int = 100,
     offset: int = 0,
     platform: str = None,
     category: str = None,
-    user_phone: str = None
+    user_phone: str = None,
+    cursor: str = None
 ) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    """
+    List saved content newest first.
 
-    query = 'SELECT * FROM saved_content WHERE 1=1'
-    params = []
+    Pass the next_cursor of the previous page as cursor for keyset pagination,
+    which stays fast on deep pages; offset is ignored when a cursor is given.
+    Raises ValueError for a malformed cursor.
+    """
+    position = None
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise ValueError('Invalid pagination cursor')
 
-    if platform:
-        query += ' AND platform = ?'
-        params.append(platform)
+    with get_db_connection() as conn:
+        db_cursor = conn.cursor()
 
-    if category:
-        query += ' AND category = ?'
-        params.append(category)
+        query = 'SELECT * FROM saved_content WHERE 1=1'
+        params = []
 
-    if user_phone:
-        query += ' AND user_phone = ?'
-        params.append(user_phone)
+        if platform:
+            query += ' AND platform = ?'
+            params.append(platform)
 
-    query += ' ORDER BY timestamp DESC LIMIT ? OFFSET ?'
-    params.extend([limit, offset])
+        if category:
+            query += ' AND category = ?'
+            params.append(category)
 
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-    conn.close()
+        if user_phone:
+            query += ' AND user_phone = ?'
+            params.append(user_phone)
+
+        if position:
+            query += ' AND (timestamp, id) < (?, ?)'
+            params.extend(position)
+            offset = 0
+
+        query += ' ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?'
+        params.extend([limit, offset])
+
+        db_cursor.execute(query, params)
+        rows = db_cursor.fetchall()
 
     return [dict(row) for row in rows]
 
 
+def iter_content_rows(
+    platform: str = None,
+    category: str = None,
+    collection: str = None,
+    user_phone: str = None,
+    date_from: str = None,
+    date_to: str = None,
+    chunk_size: int = 500
+) -> Iterator[Dict]:
+    """
+    Yield every matching row, newest first, reading chunk_size rows at a time.
+
+    Each chunk is a keyset query on (timestamp, id) with its own pooled
+    connection, so memory stays flat and no read transaction is held open
+    while a slow client consumes the stream. date_from/date_to are inclusive
+    YYYY-MM-DD dates.
+    """
+    query = 'SELECT * FROM saved_content WHERE 1=1'
+    params = []
+
+    for column, value in (
+        ('platform', platform),
+        ('category', category),
+        ('collection', collection),
+        ('user_phone', user_phone),
+    ):
+        if value:
+            query += f' AND {column} = ?'
+            params.append(value)
+
+    if date_from:
+        query += ' AND timestamp >= ?'
+        params.append(date_from)
+    if date_to:
+        query += " AND timestamp < date(?, '+1 day')"
+        params.append(date_to)
+
+    position = None
+    while True:
+        chunk_query, chunk_params = query, list(params)
+        if position:
+            chunk_query += ' AND (timestamp, id) < (?, ?)'
+            chunk_params.extend(position)
+        chunk_query += ' ORDER BY timestamp DESC, id DESC LIMIT ?'
+        chunk_params.append(chunk_size)
+
+        conn = get_db_connection()
+        try:
+            rows = conn.execute(chunk_query, chunk_params).fetchall()
+        finally:
+            conn.close()
+
+        for row in rows:
+            yield dict(row)
+        if len(rows) < chunk_size:
+            return
+        position = (rows[-1]['timestamp'], rows[-1]['id'])
+
+
+def next_page_cursor(items: List[Dict], limit: int) -> Optional[str]:
+    """Cursor for the page after items, or None when items was the last page."""
+    if not items or len(items) < limit:
+        return None
+    return encode_cursor(items[-1])
+
+
 def get_content_by_id(content_id: int) -> Optional[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM saved_content WHERE id = ?', (content_id,))
-    row = cursor.fetchone()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM saved_content WHERE id = ?', (content_id,))
+        row = cursor.fetchone()
     return dict(row) if row else None
 
 
 def get_categories() -> List[str]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT DISTINCT category 
-        FROM saved_content 
-        WHERE category IS NOT NULL AND category != ''
-        ORDER BY category
-    ''')
-    rows = cursor.fetchall()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT key FROM content_stats
+            WHERE dimension = 'category'
+            ORDER BY key
+        ''')
+        rows = cursor.fetchall()
     return [row[0] for row in rows]
 
 
 def get_platforms() -> List[str]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT DISTINCT platform 
-        FROM saved_content 
-        WHERE platform IS NOT NULL AND platform != ''
-        ORDER BY platform
-    ''')
-    rows = cursor.fetchall()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT key FROM content_stats
+            WHERE dimension = 'platform' AND key != ''
+            ORDER BY key
+        ''')
+        rows = cursor.fetchall()
     return [row[0] for row in rows]
 
 
-def get_stats() -> Dict:
-    conn = get_db_connection()
-    cursor = conn.cursor()
+# ==================== Stats ====================
+
+# (dimension, key expression, condition) for each counter kept in content_stats.
+# {row} is replaced with NEW or OLD inside the triggers and dropped for backfills.
+_STAT_DIMENSIONS = (
+    ('total', "''", '1'),
+    ('platform', '{row}platform', '{row}platform IS NOT NULL'),
+    ('category', '{row}category', "{row}category IS NOT NULL AND {row}category != ''"),
+    ('day', 'DATE({row}timestamp)', '{row}timestamp IS NOT NULL'),
+    ('user', '{row}user_phone', "{row}user_phone IS NOT NULL AND {row}user_phone != ''"),
+    (
+        'user_day',
+        "{row}user_phone || '|' || DATE({row}timestamp)",
+        "{row}user_phone IS NOT NULL AND {row}user_phone != '' AND {row}timestamp IS NOT NULL"
+    ),
+)
+
+
+def _stat_increment_sql(row: str) -> str:
+    statements = []
+    for dimension, key, condition in _STAT_DIMENSIONS:
+        statements.append(
+            f"INSERT INTO content_stats (dimension, key, count) "
+            f"SELECT '{dimension}', {key.format(row=row)}, 1 WHERE {condition.format(row=row)} "
+            f"ON CONFLICT (dimension, key) DO UPDATE SET count = count + 1;"
+        )
+    return '\n'.join(statements)
 
-    cursor.execute('SELECT COUNT(*) FROM saved_content')
-    total = cursor.fetchone()[0]
 
-    cursor.execute('SELECT platform, COUNT(*) as count FROM saved_content GROUP BY platform')
-    by_platform = {row[0]: row[1] for row in cursor.fetchall()}
+def _stat_decrement_sql(row: str) -> str:
+    statements = []
+    for dimension, key, condition in _STAT_DIMENSIONS:
+        statements.append(
+            f"UPDATE content_stats SET count = count - 1 "
+            f"WHERE dimension = '{dimension}' AND key = {key.format(row=row)} "
+            f"AND {condition.format(row=row)};"
+        )
+    statements.append('DELETE FROM content_stats WHERE count <= 0;')
+    return '\n'.join(statements)
 
-    cursor.execute('''
-        SELECT category, COUNT(*) as count 
-        FROM saved_content 
-        WHERE category IS NOT NULL AND category != ''
-        GROUP BY category
-    ''')
-    by_category = {row[0]: row[1] for row in cursor.fetchall()}
 
-    cursor.execute("SELECT COUNT(*) FROM saved_content WHERE timestamp >= datetime('now', '-7 days')")
-    recent = cursor.fetchone()[0]
+def init_stats_table() -> None:
+    """Create the content_stats summary table and the triggers that maintain it."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'content_stats'")
+        exists = cursor.fetchone() is not None
 
-    cursor.execute('''
-        SELECT COUNT(DISTINCT user_phone) 
-        FROM saved_content 
-        WHERE user_phone IS NOT NULL AND user_phone != ''
-    ''')
-    unique_users = cursor.fetchone()[0]
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS content_stats (
+                dimension TEXT NOT NULL,
+                key TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (dimension, key)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS content_stats_insert AFTER INSERT ON saved_content BEGIN
+                {_stat_increment_sql('new.')}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS content_stats_delete AFTER DELETE ON saved_content BEGIN
+                {_stat_decrement_sql('old.')}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS content_stats_update
+            AFTER UPDATE OF platform, category, user_phone, timestamp ON saved_content BEGIN
+                {_stat_decrement_sql('old.')}
+                {_stat_increment_sql('new.')}
+            END
+        ''')
+        conn.commit()
+
+    if not exists:
+        rebuild_stats()
+        print("Migrated DB: built content_stats summary table")
+
+
+def rebuild_stats() -> None:
+    """Recompute every content_stats counter from saved_content."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM content_stats')
+        for dimension, key, condition in _STAT_DIMENSIONS:
+            key_sql = key.format(row='')
+            cursor.execute(f'''
+                INSERT INTO content_stats (dimension, key, count)
+                SELECT '{dimension}', {key_sql}, COUNT(*) FROM saved_content
+                WHERE {condition.format(row='')}
+                GROUP BY {key_sql}
+            ''')
+        conn.commit()
+
+
+def _get_stat_counts(cursor: sqlite3.Cursor, dimension: str) -> Dict[str, int]:
+    cursor.execute('SELECT key, count FROM content_stats WHERE dimension = ?', (dimension,))
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def get_stats() -> Dict:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        total = _get_stat_counts(cursor, 'total').get('', 0)
+        by_platform = _get_stat_counts(cursor, 'platform')
+        by_category = _get_stat_counts(cursor, 'category')
+
+        cursor.execute("SELECT COUNT(*) FROM content_stats WHERE dimension = 'user'")
+        unique_users = cursor.fetchone()[0]
 
-    conn.close()
 
     streak_data = get_streak_stats()
+    recent = streak_data['total_this_week']
 
     return {
         'total': total,
@@ -225,131 +675,125 @@ def get_stats() -> Dict:
 
 
 def get_random_content(count: int = 5, exclude_id: int = None) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
 
-    if exclude_id:
-        cursor.execute('''
-            SELECT * FROM saved_content WHERE id != ? ORDER BY RANDOM() LIMIT ?
-        ''', (exclude_id, count))
-    else:
-        cursor.execute('SELECT * FROM saved_content ORDER BY RANDOM() LIMIT ?', (count,))
+        if exclude_id:
+            cursor.execute('''
+                SELECT * FROM saved_content WHERE id != ? ORDER BY RANDOM() LIMIT ?
+            ''', (exclude_id, count))
+        else:
+            cursor.execute('SELECT * FROM saved_content ORDER BY RANDOM() LIMIT ?', (count,))
 
-    rows = cursor.fetchall()
-    conn.close()
+        rows = cursor.fetchall()
     return [dict(row) for row in rows]
 
 
 def get_random_content_by_category(count: int = 1, categories: List[str] = None) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    if categories:
-        placeholders = ','.join(['?'] * len(categories))
-        cursor.execute(f'''
-            SELECT * FROM saved_content 
-            WHERE category IN ({placeholders})
-            ORDER BY RANDOM() LIMIT ?
-        ''', (*categories, count))
-    else:
-        cursor.execute('SELECT * FROM saved_content ORDER BY RANDOM() LIMIT ?', (count,))
-
-    rows = cursor.fetchall()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        if categories:
+            placeholders = ','.join(['?'] * len(categories))
+            cursor.execute(f'''
+                SELECT * FROM saved_content 
+                WHERE category IN ({placeholders})
+                ORDER BY RANDOM() LIMIT ?
+            ''', (*categories, count))
+        else:
+            cursor.execute('SELECT * FROM saved_content ORDER BY RANDOM() LIMIT ?', (count,))
+
+        rows = cursor.fetchall()
     return [dict(row) for row in rows]
 
 
 def get_related_content(category: str, exclude_id: int = None, limit: int = 2) -> List[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    if exclude_id:
-        cursor.execute('''
-            SELECT * FROM saved_content 
-            WHERE category = ? AND id != ?
-            ORDER BY RANDOM() LIMIT ?
-        ''', (category, exclude_id, limit))
-    else:
-        cursor.execute('''
-            SELECT * FROM saved_content WHERE category = ? ORDER BY RANDOM() LIMIT ?
-        ''', (category, limit))
-
-    rows = cursor.fetchall()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        if exclude_id:
+            cursor.execute('''
+                SELECT * FROM saved_content 
+                WHERE category = ? AND id != ?
+                ORDER BY RANDOM() LIMIT ?
+            ''', (category, exclude_id, limit))
+        else:
+            cursor.execute('''
+                SELECT * FROM saved_content WHERE category = ? ORDER BY RANDOM() LIMIT ?
+            ''', (category, limit))
+
+        rows = cursor.fetchall()
     return [dict(row) for row in rows]
 
 
 def get_content_count_by_category(days: int = 7) -> Dict[str, int]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT category, COUNT(*) as count 
-        FROM saved_content 
-        WHERE timestamp >= datetime('now', '-' || ? || ' days')
-          AND category IS NOT NULL AND category != ''
-        GROUP BY category ORDER BY count DESC
-    ''', (days,))
-    rows = cursor.fetchall()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT category, COUNT(*) as count 
+            FROM saved_content 
+            WHERE timestamp >= datetime('now', '-' || ? || ' days')
+              AND category IS NOT NULL AND category != ''
+            GROUP BY category ORDER BY count DESC
+        ''', (days,))
+        rows = cursor.fetchall()
     return {row[0]: row[1] for row in rows}
 
 
 def get_total_content_count(days: int = 7) -> int:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT COUNT(*) FROM saved_content 
-        WHERE timestamp >= datetime('now', '-' || ? || ' days')
-    ''', (days,))
-    count = cursor.fetchone()[0]
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT COUNT(*) FROM saved_content 
+            WHERE timestamp >= datetime('now', '-' || ? || ' days')
+        ''', (days,))
+        count = cursor.fetchone()[0]
     return count
 
 
 def check_duplicate(url: str) -> Optional[Dict]:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM saved_content WHERE url = ?', (url,))
-    row = cursor.fetchone()
-    conn.close()
+    """Find an earlier save of the same content via the canonical_url index."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM saved_content WHERE canonical_url = ?', (canonicalize_url(url),))
+        row = cursor.fetchone()
     return dict(row) if row else None
 
 
 def get_streak_stats(user_phone: str = None) -> Dict:
     from datetime import datetime, timedelta
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    if user_phone:
-        cursor.execute('''
-            SELECT DATE(timestamp) as save_date 
-            FROM saved_content 
-            WHERE user_phone = ?
-            GROUP BY DATE(timestamp)
-            ORDER BY save_date DESC
-        ''', (user_phone,))
-    else:
-        cursor.execute('''
-            SELECT DATE(timestamp) as save_date 
-            FROM saved_content 
-            GROUP BY DATE(timestamp)
-            ORDER BY save_date DESC
-        ''')
-
-    dates = [row[0] for row in cursor.fetchall()]
-
-    if user_phone:
-        cursor.execute('''
-            SELECT COUNT(*) FROM saved_content 
-            WHERE user_phone = ? AND timestamp >= datetime('now', '-7 days')
-        ''', (user_phone,))
-    else:
-        cursor.execute("SELECT COUNT(*) FROM saved_content WHERE timestamp >= datetime('now', '-7 days')")
-
-    result = cursor.fetchone()
-    total_this_week = result[0] if result else 0
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        if user_phone:
+            prefix = f'{user_phone}|'
+            cursor.execute('''
+                SELECT SUBSTR(key, ?) as save_date
+                FROM content_stats
+                WHERE dimension = 'user_day' AND key >= ? AND key < ?
+                ORDER BY save_date DESC
+            ''', (len(prefix) + 1, prefix, prefix + '\uffff'))
+        else:
+            cursor.execute('''
+                SELECT key as save_date
+                FROM content_stats
+                WHERE dimension = 'day'
+                ORDER BY save_date DESC
+            ''')
+
+        dates = [row[0] for row in cursor.fetchall()]
+
+        if user_phone:
+            cursor.execute('''
+                SELECT COUNT(*) FROM saved_content 
+                WHERE user_phone = ? AND timestamp >= datetime('now', '-7 days')
+            ''', (user_phone,))
+        else:
+            cursor.execute("SELECT COUNT(*) FROM saved_content WHERE timestamp >= datetime('now', '-7 days')")
+
+        result = cursor.fetchone()
+        total_this_week = result[0] if result else 0
 
     if not dates:
         return {'current_streak': 0, 'total_this_week': 0, 'best_streak': 0}
@@ -394,27 +838,349 @@ def get_streak_stats(user_phone: str = None) -> Dict:
     }
 
 
-def search_content(query: str, limit: int = 20) -> List[Dict]:
+# ==================== Full-Text Search ====================
+
+_FTS_COLUMNS = ('title', 'caption', 'tags', 'summary', 'url')
+# bm25 column weights, in _FTS_COLUMNS order: title and tags matter most
+_FTS_WEIGHTS = (10.0, 2.0, 5.0, 3.0, 1.0)
+_FTS_STOPWORDS = {
+    'a', 'about', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'by', 'can', 'did', 'do', 'does',
+    'for', 'from', 'have', 'how', 'i', 'in', 'is', 'it', 'me', 'my', 'of', 'on', 'or', 'saved',
+    'save', 'saves', 'show', 'that', 'the', 'this', 'to', 'was', 'what', 'when', 'where',
+    'which', 'who', 'why', 'with', 'you', 'your'
+}
+
+fts_available = False
+
+
+def init_search_index() -> bool:
+    """Create the FTS5 index over saved_content and the triggers that keep it in sync."""
+    global fts_available
     conn = get_db_connection()
     cursor = conn.cursor()
-    search_pattern = f'%{query}%'
-    cursor.execute('''
-        SELECT * FROM saved_content 
-        WHERE title LIKE ? OR caption LIKE ? OR tags LIKE ? OR summary LIKE ? OR url LIKE ?
-        ORDER BY timestamp DESC LIMIT ?
-    ''', (search_pattern, search_pattern, search_pattern, search_pattern, search_pattern, limit))
-    rows = cursor.fetchall()
-    conn.close()
+    columns = ', '.join(_FTS_COLUMNS)
+    new_values = ', '.join(f'new.{col}' for col in _FTS_COLUMNS)
+    old_values = ', '.join(f'old.{col}' for col in _FTS_COLUMNS)
+
+    try:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'saved_content_fts'")
+        exists = cursor.fetchone() is not None
+
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS saved_content_fts USING fts5(
+                {columns},
+                content='saved_content',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS saved_content_fts_insert AFTER INSERT ON saved_content BEGIN
+                INSERT INTO saved_content_fts (rowid, {columns}) VALUES (new.id, {new_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS saved_content_fts_delete AFTER DELETE ON saved_content BEGIN
+                INSERT INTO saved_content_fts (saved_content_fts, rowid, {columns})
+                VALUES ('delete', old.id, {old_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS saved_content_fts_update AFTER UPDATE OF {columns} ON saved_content BEGIN
+                INSERT INTO saved_content_fts (saved_content_fts, rowid, {columns})
+                VALUES ('delete', old.id, {old_values});
+                INSERT INTO saved_content_fts (rowid, {columns}) VALUES (new.id, {new_values});
+            END
+        ''')
+
+        if not exists:
+            # Backfill rows saved before the index existed
+            cursor.execute("INSERT INTO saved_content_fts (saved_content_fts) VALUES ('rebuild')")
+            print("Migrated DB: built full-text search index")
+
+        conn.commit()
+        fts_available = True
+    except sqlite3.OperationalError as exc:
+        conn.rollback()
+        print(f"Full-text search unavailable, falling back to LIKE search: {exc}")
+        fts_available = False
+    finally:
+        conn.close()
+
+    return fts_available
+
+
+def rebuild_search_index() -> int:
+    """Rebuild the FTS5 index from saved_content. Returns the number of indexed rows."""
+    if not fts_available and not init_search_index():
+        return 0
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO saved_content_fts (saved_content_fts) VALUES ('rebuild')")
+        conn.commit()
+        cursor.execute('SELECT COUNT(*) FROM saved_content')
+        count = cursor.fetchone()[0]
+    return count
+
+
+def build_fts_query(query: str, match_any: bool = False) -> str:
+    """
+    Translate user input into an FTS5 MATCH expression.
+
+    "quoted text" becomes a phrase, a trailing * is an explicit prefix query and
+    bare words are prefix-matched so partial words behave like the old LIKE search.
+    Short words are matched exactly, except the last one, which is usually still
+    being typed ("in" finds "instagram"). With match_any the terms are OR-ed (and
+    stopwords dropped) for natural-language questions; otherwise every term must match.
+    """
+    terms = []
+
+    for phrase in re.findall(r'"([^"]+)"', query):
+        words = re.findall(r'\w+', phrase)
+        if words:
+            terms.append('"' + ' '.join(words) + '"')
+
+    remainder = re.sub(r'"[^"]*"', ' ', query)
+    words = re.findall(r'(\w+)(\*?)', remainder)
+    for index, (word, star) in enumerate(words):
+        lowered = word.lower()
+        if match_any and (lowered in _FTS_STOPWORDS or len(lowered) < 2):
+            continue
+        if star or len(lowered) >= 3 or index == len(words) - 1:
+            terms.append(f'"{lowered}"*')
+        else:
+            terms.append(f'"{lowered}"')
+
+    return (' OR ' if match_any else ' AND ').join(terms)
+
+
+def search_content(query: str, limit: int = 20, match_any: bool = False) -> List[Dict]:
+    """
+    Search saved content, ranked by BM25 when the FTS5 index is available.
+
+    FTS5 only matches whole words and word prefixes, so a query that finds
+    nothing there falls back to the substring LIKE search ("gram" still finds
+    "instagram").
+    """
+    fts_query = build_fts_query(query, match_any=match_any) if fts_available else ''
+    if fts_query:
+        weights = ', '.join(str(weight) for weight in _FTS_WEIGHTS)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f'''
+                SELECT s.* FROM saved_content_fts f
+                JOIN saved_content s ON s.id = f.rowid
+                WHERE saved_content_fts MATCH ?
+                ORDER BY bm25(saved_content_fts, {weights}), s.timestamp DESC
+                LIMIT ?
+            ''', (fts_query, limit))
+            rows = [dict(row) for row in cursor.fetchall()]
+            if rows or match_any:
+                return rows
+        except sqlite3.OperationalError as exc:
+            print(f"Full-text search error, falling back to LIKE search: {exc}")
+        finally:
+            conn.close()
+
+    return _search_content_like(query, limit)
+
+
+def _search_content_like(query: str, limit: int = 20) -> List[Dict]:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        search_pattern = f'%{query}%'
+        cursor.execute('''
+            SELECT * FROM saved_content 
+            WHERE title LIKE ? OR caption LIKE ? OR tags LIKE ? OR summary LIKE ? OR url LIKE ?
+            ORDER BY timestamp DESC LIMIT ?
+        ''', (search_pattern, search_pattern, search_pattern, search_pattern, search_pattern, limit))
+        rows = cursor.fetchall()
     return [dict(row) for row in rows]
 
 
+# ==================== Semantic Index ====================
+
+EMBEDDED_FIELDS = ('title', 'summary', 'tags', 'video_summary')
+
+
+def init_embeddings_table() -> None:
+    """
+    Initialize content_embeddings (one float32 vector blob per item and model).
+
+    Triggers drop a row's vector when the item is deleted or its embedded text
+    changes, so anything without a current vector is exactly what needs embedding.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS content_embeddings (
+                content_id INTEGER PRIMARY KEY,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS content_embeddings_delete AFTER DELETE ON saved_content BEGIN
+                DELETE FROM content_embeddings WHERE content_id = old.id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS content_embeddings_stale
+            AFTER UPDATE OF {', '.join(EMBEDDED_FIELDS)} ON saved_content BEGIN
+                DELETE FROM content_embeddings WHERE content_id = new.id;
+            END
+        ''')
+        conn.commit()
+
+
+def save_embeddings(rows: List[Tuple[int, str, bytes]]) -> None:
+    """Upsert (content_id, model, vector_blob) rows in one transaction."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO content_embeddings (content_id, model, vector) VALUES (?, ?, ?)
+            ON CONFLICT(content_id) DO UPDATE SET
+                model = excluded.model,
+                vector = excluded.vector,
+                updated_at = CURRENT_TIMESTAMP
+        ''', rows)
+        conn.commit()
+
+
+def get_embeddings(model: str) -> List[Tuple[int, bytes]]:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT content_id, vector FROM content_embeddings WHERE model = ? ORDER BY content_id', (model,))
+        rows = [(row[0], row[1]) for row in cursor.fetchall()]
+    return rows
+
+
+def get_content_missing_embeddings(model: str, limit: int = 500) -> List[Dict]:
+    """Items with no vector from this model yet (new, edited, or embedded by another model)."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT s.id, {', '.join('s.' + field for field in EMBEDDED_FIELDS)}
+            FROM saved_content s
+            LEFT JOIN content_embeddings e ON e.content_id = s.id AND e.model = ?
+            WHERE e.content_id IS NULL
+            ORDER BY s.id LIMIT ?
+        ''', (model, limit))
+        rows = [dict(row) for row in cursor.fetchall()]
+    return rows
+
+
+def get_contents_by_ids(content_ids: List[int]) -> List[Dict]:
+    """Fetch items by id, in the order given (missing ids are skipped)."""
+    if not content_ids:
+        return []
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT * FROM saved_content WHERE id IN ({','.join(['?'] * len(content_ids))})",
+            list(content_ids)
+        )
+        by_id = {row['id']: dict(row) for row in cursor.fetchall()}
+    return [by_id[content_id] for content_id in content_ids if content_id in by_id]
+
+
+# ==================== Near-Duplicate Index ====================
+
+def init_minhash_table() -> None:
+    """
+    Initialize minhash_bands: one row per item and LSH band of its MinHash signature.
+
+    A lookup only reads rows sharing a band bucket with the probe, so likely
+    near duplicates are found without scanning the library. Triggers drop an
+    item's rows when it is deleted or its title/caption change.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS minhash_bands (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                content_id INTEGER NOT NULL,
+                PRIMARY KEY (band, bucket, content_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_minhash_bands_content ON minhash_bands(content_id)')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS minhash_bands_delete AFTER DELETE ON saved_content BEGIN
+                DELETE FROM minhash_bands WHERE content_id = old.id;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS minhash_bands_stale AFTER UPDATE OF title, caption ON saved_content BEGIN
+                DELETE FROM minhash_bands WHERE content_id = new.id;
+            END
+        ''')
+        conn.commit()
+
+
+def save_minhash_bands(rows: List[Tuple[int, List[int]]]) -> None:
+    """
+    Replace the band rows for each (content_id, band buckets).
+
+    Items with no buckets (too little text to compare) get a single band -1
+    marker row, which lookups never match but which records them as indexed.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany('DELETE FROM minhash_bands WHERE content_id = ?', [(row[0],) for row in rows])
+        cursor.executemany(
+            'INSERT INTO minhash_bands (band, bucket, content_id) VALUES (?, ?, ?)',
+            [
+                (band, bucket, content_id)
+                for content_id, buckets in rows
+                for band, bucket in (enumerate(buckets) if buckets else [(-1, 0)])
+            ]
+        )
+        conn.commit()
+
+
+def find_minhash_candidates(buckets: List[int], user_phone: str = None) -> List[int]:
+    """
+    Ids of one user's items sharing at least one band bucket with the given signature bands.
+
+    Only rows saved by user_phone are candidates (None: rows saved without one,
+    e.g. from the dashboard), so one user's save never matches another's library.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f'''SELECT DISTINCT b.content_id FROM minhash_bands b
+                JOIN saved_content s ON s.id = b.content_id
+                WHERE s.user_phone IS ?
+                AND ({' OR '.join(['(b.band = ? AND b.bucket = ?)'] * len(buckets))})''',
+            [user_phone] + [value for band, bucket in enumerate(buckets) for value in (band, bucket)]
+        )
+        rows = [row[0] for row in cursor.fetchall()]
+    return rows
+
+
+def get_content_missing_minhash(limit: int = 500) -> List[Dict]:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT s.id, s.title, s.caption FROM saved_content s
+            WHERE NOT EXISTS (SELECT 1 FROM minhash_bands b WHERE b.content_id = s.id)
+            ORDER BY s.id LIMIT ?
+        ''', (limit,))
+        rows = [dict(row) for row in cursor.fetchall()]
+    return rows
+
+
 def delete_content(content_id: int) -> bool:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM saved_content WHERE id = ?', (content_id,))
-    deleted = cursor.rowcount > 0
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM saved_content WHERE id = ?', (content_id,))
+        deleted = cursor.rowcount > 0
+        conn.commit()
     return deleted
 
 
@@ -430,14 +1196,16 @@ def update_content(
     summary_source: str = None,
     video_summary: str = None,
     video_summary_status: str = None,
-    tags: str = None
+    tags: str = None,
+    platform: str = None,
+    category_source: str = None
 ) -> bool:
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
     updates = []
     params = []
 
+    if platform is not None:
+        updates.append('platform = ?')
+        params.append(platform)
     if title is not None:
         updates.append('title = ?')
         params.append(title)
@@ -456,6 +1224,9 @@ def update_content(
     if category is not None:
         updates.append('category = ?')
         params.append(category)
+    if category_source is not None:
+        updates.append('category_source = ?')
+        params.append(category_source)
     if summary is not None:
         updates.append('summary = ?')
         params.append(summary)
@@ -477,92 +1248,532 @@ def update_content(
 
     params.append(content_id)
     query = f'UPDATE saved_content SET {", ".join(updates)} WHERE id = ?'
-    cursor.execute(query, params)
-    updated = cursor.rowcount > 0
-
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        updated = cursor.rowcount > 0
+
+        conn.commit()
+    if updated and any(value is not None for value in (title, caption, summary, video_summary, tags)):
+        _run_content_hooks(content_id)
     return updated
 
 
 def init_collections_table():
     """Initialize collections table"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS collections (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL UNIQUE,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    try:
-        cursor.execute('ALTER TABLE saved_content ADD COLUMN collection TEXT')
-    except sqlite3.OperationalError:
-        pass  # already exists
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS collections (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        try:
+            cursor.execute('ALTER TABLE saved_content ADD COLUMN collection TEXT')
+        except sqlite3.OperationalError:
+            pass  # already exists
+        conn.commit()
 
 
 def get_collections():
     """Get all collections as a list of names"""
     init_collections_table()
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT name FROM collections ORDER BY name')
-    rows = cursor.fetchall()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT name FROM collections ORDER BY name')
+        rows = cursor.fetchall()
     return [r[0] for r in rows]
 
 
 def create_collection(name: str):
     """Create a new collection"""
     init_collections_table()
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('INSERT OR IGNORE INTO collections (name) VALUES (?)', (name,))
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('INSERT OR IGNORE INTO collections (name) VALUES (?)', (name,))
+        conn.commit()
 
 
 def assign_collection(content_id: int, collection_name: str):
     """Assign content to a collection"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('UPDATE saved_content SET collection = ? WHERE id = ?', (collection_name, content_id))
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('UPDATE saved_content SET collection = ? WHERE id = ?', (collection_name, content_id))
+        conn.commit()
 
 
 def delete_collection(name: str):
     """Delete a collection"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('UPDATE saved_content SET collection = NULL WHERE collection = ?', (name,))
+        cursor.execute('DELETE FROM collections WHERE name = ?', (name,))
+        conn.commit()
+
+
+# ==================== Background Jobs ====================
+
+def init_jobs_table() -> None:
+    """Initialize the persistent background job table"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 3,
+                result TEXT,
+                last_error TEXT,
+                dedupe_key TEXT,
+                run_after DATETIME DEFAULT CURRENT_TIMESTAMP,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        try:
+            cursor.execute('ALTER TABLE jobs ADD COLUMN dedupe_key TEXT')
+            print("Migrated DB: added jobs.dedupe_key column")
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status_run_after ON jobs(status, run_after)')
+        # At most one unfinished job per (kind, dedupe_key); finished jobs drop out of the index
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_dedupe
+            ON jobs(kind, dedupe_key) WHERE dedupe_key IS NOT NULL AND status IN ('queued', 'running')
+        ''')
+        conn.commit()
+
+
+def _job_from_row(row: sqlite3.Row) -> Dict:
+    job = dict(row)
+    job['payload'] = json.loads(job['payload']) if job.get('payload') else {}
+    job['result'] = json.loads(job['result']) if job.get('result') else None
+    return job
+
+
+def enqueue_job(kind: str, payload: Dict, max_attempts: int = 3, dedupe_key: str = None) -> int:
+    """
+    Persist a queued job and return its id.
+
+    With a dedupe_key, a queued or running job of the same kind and key is
+    reused instead: its id is returned and no new job is created.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT OR IGNORE INTO jobs (kind, payload, max_attempts, dedupe_key) VALUES (?, ?, ?, ?)',
+            (kind, json.dumps(payload), max_attempts, dedupe_key)
+        )
+        job_id = cursor.lastrowid if cursor.rowcount else None
+        if job_id is None:
+            cursor.execute('''
+                SELECT id FROM jobs
+                WHERE kind = ? AND dedupe_key = ? AND status IN ('queued', 'running')
+            ''', (kind, dedupe_key))
+            job_id = cursor.fetchone()[0]
+        conn.commit()
+    return job_id
+
+
+def add_job_watcher(job_id: int, phone: str) -> bool:
+    """
+    Add a phone to an unfinished job's payload['notify'] list (once).
+
+    Returns False if the job already finished or has sent its result (see
+    close_job_watchers), so the caller should queue its own.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE jobs SET
+                payload = CASE
+                    WHEN EXISTS (SELECT 1 FROM json_each(payload, '$.notify') WHERE value = ?) THEN payload
+                    ELSE json_insert(json_insert(payload, '$.notify', json('[]')), '$.notify[#]', ?)
+                END,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status IN ('queued', 'running')
+              AND json_extract(payload, '$.notify_closed') IS NULL
+        ''', (phone, phone, job_id))
+        updated = cursor.rowcount > 0
+        conn.commit()
+    return updated
+
+
+def close_job_watchers(job_id: int) -> List[str]:
+    """
+    Stop add_job_watcher from joining job_id and return its payload['notify'] list.
+
+    Closing and reading happen in one transaction, so a phone is either in the
+    returned list or refused by add_job_watcher, never silently dropped.
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('UPDATE saved_content SET collection = NULL WHERE collection = ?', (name,))
-    cursor.execute('DELETE FROM collections WHERE name = ?', (name,))
-    conn.commit()
-    conn.close()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(
+            "UPDATE jobs SET payload = json_set(payload, '$.notify_closed', json('true')) WHERE id = ?",
+            (job_id,)
+        )
+        cursor.execute("SELECT json_extract(payload, '$.notify') FROM jobs WHERE id = ?", (job_id,))
+        row = cursor.fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+    return json.loads(row[0]) if row and row[0] else []
+
+
+def enqueue_jobs(kind: str, payloads: List[Dict], max_attempts: int = 3) -> List[int]:
+    """Persist many queued jobs in one transaction and return their ids."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        job_ids = []
+        for payload in payloads:
+            cursor.execute(
+                'INSERT INTO jobs (kind, payload, max_attempts) VALUES (?, ?, ?)',
+                (kind, json.dumps(payload), max_attempts)
+            )
+            job_ids.append(cursor.lastrowid)
+        conn.commit()
+    return job_ids
+
+
+def claim_next_job(kinds: List[str] = None) -> Optional[Dict]:
+    """Atomically move the oldest runnable queued job (of the given kinds) to running and return it."""
+    query = "SELECT id FROM jobs WHERE status = 'queued' AND run_after <= CURRENT_TIMESTAMP"
+    params = []
+    if kinds is not None:
+        if not kinds:
+            return None
+        query += f" AND kind IN ({','.join(['?'] * len(kinds))})"
+        params.extend(kinds)
+    query += ' ORDER BY id LIMIT 1'
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(query, params)
+        row = cursor.fetchone()
+        if not row:
+            conn.rollback()
+            return None
+
+        cursor.execute('''
+            UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (row[0],))
+        cursor.execute('SELECT * FROM jobs WHERE id = ?', (row[0],))
+        job = _job_from_row(cursor.fetchone())
+        conn.commit()
+        return job
+    finally:
+        conn.close()
+
+
+def complete_job(job_id: int, result: Optional[Dict] = None) -> None:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE jobs SET status = 'done', result = ?, last_error = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (json.dumps(result) if result is not None else None, job_id))
+        conn.commit()
+
+
+def fail_job(job_id: int, error: str, retry_delay_seconds: int = 0) -> str:
+    """
+    Record a failed attempt. The job is re-queued after retry_delay_seconds while it
+    has attempts left, otherwise it moves to the 'dead' (dead-letter) state.
+
+    Returns the job's new status.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE jobs SET
+                status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'dead' END,
+                run_after = DATETIME('now', '+' || ? || ' seconds'),
+                last_error = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (int(retry_delay_seconds), error, job_id))
+        cursor.execute('SELECT status FROM jobs WHERE id = ?', (job_id,))
+        row = cursor.fetchone()
+        conn.commit()
+    return row[0] if row else 'dead'
+
+
+def get_job(job_id: int) -> Optional[Dict]:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM jobs WHERE id = ?', (job_id,))
+        row = cursor.fetchone()
+    return _job_from_row(row) if row else None
+
+
+def requeue_running_jobs(kinds: List[str] = None) -> int:
+    """Return jobs (of the given kinds) left 'running' by a previous process to the queue. Returns how many."""
+    query = '''
+        UPDATE jobs SET status = 'queued', run_after = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+        WHERE status = 'running'
+    '''
+    params = []
+    if kinds is not None:
+        if not kinds:
+            return 0
+        query += f" AND kind IN ({','.join(['?'] * len(kinds))})"
+        params.extend(kinds)
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        count = cursor.rowcount
+        conn.commit()
+    return count
+
+
+# ==================== Inbound Messages ====================
+
+def init_processed_messages_table() -> None:
+    """Initialize the table of handled Twilio MessageSids (webhook idempotency)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS processed_messages (
+                message_sid TEXT PRIMARY KEY,
+                processed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_processed_messages_at ON processed_messages(processed_at)')
+        conn.commit()
+
+
+def is_message_sid_handled(message_sid: str) -> bool:
+    """True if this inbound MessageSid was already recorded by claim_message_sid."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT 1 FROM processed_messages WHERE message_sid = ?', (message_sid,))
+        handled = cursor.fetchone() is not None
+    return handled
+
+
+def claim_message_sid(message_sid: str) -> bool:
+    """Record an inbound MessageSid. Returns False if it was already handled."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('INSERT OR IGNORE INTO processed_messages (message_sid) VALUES (?)', (message_sid,))
+        claimed = cursor.rowcount > 0
+        conn.commit()
+    return claimed
+
+
+def release_message_sid(message_sid: str) -> None:
+    """Forget a claimed MessageSid so a retry of the message is processed again."""
+    with get_db_connection() as conn:
+        conn.execute('DELETE FROM processed_messages WHERE message_sid = ?', (message_sid,))
+        conn.commit()
+
+
+def purge_processed_messages(ttl_seconds: int) -> int:
+    """Forget MessageSids older than ttl_seconds. Returns how many were removed."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM processed_messages WHERE processed_at < DATETIME('now', ?)",
+            (f'-{int(ttl_seconds)} seconds',)
+        )
+        count = cursor.rowcount
+        conn.commit()
+    return count
+
+
+# ==================== Outbound Messages ====================
+
+def init_outbound_messages_table() -> None:
+    """Initialize the WhatsApp outbound message log (one row per queued message)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS outbound_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                to_phone TEXT NOT NULL,
+                body TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                sid TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_outbound_sid ON outbound_messages(sid) WHERE sid IS NOT NULL')
+        conn.commit()
+
+
+def create_outbound_message(to_phone: str, body: str) -> int:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('INSERT INTO outbound_messages (to_phone, body) VALUES (?, ?)', (to_phone, body))
+        message_id = cursor.lastrowid
+        conn.commit()
+    return message_id
+
+
+def get_outbound_message(message_id: int = None, sid: str = None) -> Optional[Dict]:
+    """Look up an outbound message by id or by its Twilio message SID."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if sid:
+            cursor.execute('SELECT * FROM outbound_messages WHERE sid = ?', (sid,))
+        else:
+            cursor.execute('SELECT * FROM outbound_messages WHERE id = ?', (message_id,))
+        row = cursor.fetchone()
+    return dict(row) if row else None
+
+
+def update_outbound_message(message_id: int, status: str, sid: str = None,
+                            error: str = None, attempted: bool = False) -> None:
+    """Record a status change; attempted=True also counts a send attempt."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE outbound_messages SET
+                status = ?,
+                sid = COALESCE(?, sid),
+                error = ?,
+                attempts = attempts + ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (status, sid, error, 1 if attempted else 0, message_id))
+        conn.commit()
+
+
+# ==================== Canonical URLs ====================
+
+# canonical_url prefix for rows that duplicate an earlier save
+DUPLICATE_PREFIX = 'duplicate-of:'
+
+
+def init_canonical_urls() -> None:
+    """
+    Backfill canonical_url and enforce one row per canonical URL.
+
+    Rows saved before the column existed are canonicalized oldest first; a later
+    row that turns out to duplicate an earlier one is marked
+    'duplicate-of:<original id>:<id>' instead, so the unique index can still be
+    built, check_duplicate finds the original, and the row is not rescanned on
+    the next startup.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS url_redirects (
+                short_url TEXT PRIMARY KEY,
+                target_url TEXT NOT NULL,
+                resolved_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        cursor.execute('SELECT id, url FROM saved_content WHERE canonical_url IS NULL ORDER BY id')
+        pending = cursor.fetchall()
+        if pending:
+            cursor.execute('SELECT id, canonical_url FROM saved_content WHERE canonical_url IS NOT NULL')
+            seen = {row['canonical_url']: row['id'] for row in cursor.fetchall()}
+            updates = []
+            duplicates = 0
+            for row in pending:
+                canonical_url = canonicalize_url(row['url'])
+                if canonical_url in seen:
+                    duplicates += 1
+                    updates.append((f"{DUPLICATE_PREFIX}{seen[canonical_url]}:{row['id']}", row['id']))
+                else:
+                    seen[canonical_url] = row['id']
+                    updates.append((canonical_url, row['id']))
+            cursor.executemany('UPDATE saved_content SET canonical_url = ? WHERE id = ?', updates)
+            print(f"Migrated DB: canonicalized {len(updates) - duplicates} saved URL(s), "
+                  f"marked {duplicates} duplicate(s)")
+
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_canonical_url
+            ON saved_content(canonical_url) WHERE canonical_url IS NOT NULL
+        ''')
+        conn.commit()
+
+
+def set_canonical_url(content_id: int, canonical_url: str) -> Optional[int]:
+    """
+    Point a row at the canonical URL its link turned out to resolve to.
+
+    If another row already holds that canonical URL, this row is marked
+    'duplicate-of:<original id>:<id>' instead (as in init_canonical_urls) and
+    the original's id is returned; otherwise None.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute('UPDATE saved_content SET canonical_url = ? WHERE id = ?', (canonical_url, content_id))
+            original_id = None
+        except sqlite3.IntegrityError:
+            cursor.execute('SELECT id FROM saved_content WHERE canonical_url = ?', (canonical_url,))
+            original_id = cursor.fetchone()['id']
+            cursor.execute(
+                'UPDATE saved_content SET canonical_url = ? WHERE id = ?',
+                (f"{DUPLICATE_PREFIX}{original_id}:{content_id}", content_id)
+            )
+        conn.commit()
+    return original_id
+
+
+def get_url_redirect(short_url: str) -> Optional[str]:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT target_url FROM url_redirects WHERE short_url = ?', (short_url,))
+        row = cursor.fetchone()
+    return row['target_url'] if row else None
+
+
+def save_url_redirect(short_url: str, target_url: str) -> None:
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO url_redirects (short_url, target_url) VALUES (?, ?)
+            ON CONFLICT(short_url) DO UPDATE SET
+                target_url = excluded.target_url,
+                resolved_at = CURRENT_TIMESTAMP
+        ''', (short_url, target_url))
+        conn.commit()
 
 
 # ==================== Heatmap ====================
 
 def get_daily_save_counts(days: int = 365) -> dict:
     """Get daily save counts for heatmap"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT DATE(timestamp) as date, COUNT(*) as count
-        FROM saved_content
-        WHERE timestamp >= datetime('now', ?)
-        GROUP BY DATE(timestamp)
-        ORDER BY date
-    ''', (f'-{days} days',))
-    rows = cursor.fetchall()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT key as date, count
+            FROM content_stats
+            WHERE dimension = 'day' AND key >= DATE('now', ?)
+            ORDER BY date
+        ''', (f'-{days} days',))
+        rows = cursor.fetchall()
     return {row[0]: row[1] for row in rows}
 
 
 if __name__ == '__main__':
+    import sys
+
     init_db()
-else:
-    init_db()
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'rebuild-search':
+        print(f"Rebuilt full-text search index for {rebuild_search_index()} rows")
+    elif command == 'rebuild-stats':
+        rebuild_stats()
+        print("Rebuilt content_stats summary table")
@@ -0,0 +1,172 @@
+"""
+HTML meta-tag parsing for Social Saver Bot
+One pass over a page collects <title> and every <meta> into a dict, using
+selectolax or lxml when installed and the standard library otherwise.
+"""
+
+import codecs
+import re
+from html.parser import HTMLParser as StdlibHTMLParser
+from typing import Dict
+
+from config import Config
+
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+try:
+    import lxml.html as lxml_html
+except ImportError:
+    lxml_html = None
+
+
+# <meta charset="..."> or <meta http-equiv="Content-Type" content="text/html; charset=...">
+META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+
+
+def _known_encoding(name) -> str:
+    if isinstance(name, bytes):
+        name = name.decode('ascii', errors='ignore')
+    try:
+        return codecs.lookup(name).name if name else ''
+    except LookupError:
+        return ''
+
+
+def sniff_encoding(content: bytes, declared: str = None) -> str:
+    """
+    Pick the encoding for a page body, roughly as browsers do: a byte-order
+    mark, then the HTTP Content-Type charset, then a <meta charset> in the
+    first few KB. Undeclared pages are UTF-8 if they decode cleanly and
+    windows-1252 (the de facto meaning of "latin-1" on the web) otherwise.
+    """
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding
+    encoding = _known_encoding(declared)
+    if encoding:
+        return encoding
+    match = META_CHARSET.search(content[:4096])
+    encoding = _known_encoding(match.group(1)) if match else ''
+    if encoding:
+        return encoding
+    try:
+        content.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def _decode(content, encoding: str = None) -> str:
+    if isinstance(content, str):
+        return content
+    return content.decode(sniff_encoding(content, encoding), errors='replace')
+
+
+def _add_meta(meta: Dict[str, str], attrs: Dict[str, str]) -> None:
+    """Record a <meta> tag under its property/name; the first occurrence wins, like soup.find()."""
+    key = attrs.get('property') or attrs.get('name')
+    content = attrs.get('content')
+    if key and content is not None:
+        meta.setdefault(key.strip().lower(), content.strip())
+
+
+def _parse_selectolax(content) -> Dict:
+    tree = SelectolaxParser(_decode(content))
+    meta = {}
+    for node in tree.css('meta'):
+        _add_meta(meta, {key: value or '' for key, value in node.attributes.items()})
+    title = tree.css_first('title')
+    return {'title': title.text(strip=True) if title else '', 'meta': meta}
+
+
+def _parse_lxml(content) -> Dict:
+    text = _decode(content).strip()
+    if not text:
+        return {'title': '', 'meta': {}}
+    document = lxml_html.fromstring(text)
+    meta = {}
+    title = ''
+    for element in document.iter('meta', 'title'):
+        if element.tag == 'title':
+            title = title or (element.text_content() or '').strip()
+        else:
+            _add_meta(meta, dict(element.attrib))
+    return {'title': title, 'meta': meta}
+
+
+class _MetaCollector(StdlibHTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}
+        self.title_parts = []
+        self.title_done = False
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'meta':
+            _add_meta(self.meta, {key: value or '' for key, value in attrs})
+        elif tag == 'title' and not self.title_done:
+            self._in_title = True
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self._in_title:
+            self._in_title = False
+            self.title_done = True
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title_parts.append(data)
+
+
+def _parse_stdlib(content) -> Dict:
+    collector = _MetaCollector()
+    collector.feed(_decode(content))
+    collector.close()
+    return {'title': ''.join(collector.title_parts).strip(), 'meta': collector.meta}
+
+
+BACKENDS = {
+    'selectolax': _parse_selectolax if SelectolaxParser else None,
+    'lxml': _parse_lxml if lxml_html else None,
+    'stdlib': _parse_stdlib,
+}
+
+
+def available_backends() -> list:
+    return [name for name, parser in BACKENDS.items() if parser]
+
+
+def get_backend(name: str = None) -> str:
+    """Resolve a backend name; 'auto' (the default) picks the fastest installed one."""
+    name = (name or Config.HTML_PARSER).lower()
+    if name == 'auto' or not BACKENDS.get(name):
+        return available_backends()[0]
+    return name
+
+
+def parse_meta(content, backend: str = None, encoding: str = None) -> Dict:
+    """
+    Parse a page (or just its <head>) into {'title': str, 'meta': {key: content}}.
+
+    Meta keys are the lowercased property or name attribute, e.g. 'og:title',
+    'twitter:player:stream', 'description', 'author'. A backend that fails on
+    malformed markup falls back to the standard-library parser. Bytes are
+    decoded with encoding (the response charset) when given, else whatever
+    the page itself declares.
+    """
+    content = _decode(content, encoding)
+    name = get_backend(backend)
+    try:
+        return BACKENDS[name](content)
+    except Exception as exc:
+        if name == 'stdlib':
+            raise
+        print(f"{name} meta parse failed, using stdlib: {exc}")
+        return _parse_stdlib(content)
@@ -0,0 +1,155 @@
+"""
+Background job queue for Social Saver Bot
+SQLite-backed jobs processed by a bounded pool of worker threads
+"""
+
+import threading
+import traceback
+from typing import Callable, Dict, List, Optional
+
+from config import Config
+from database import (
+    enqueue_job, enqueue_jobs, claim_next_job, complete_job, fail_job, get_job, requeue_running_jobs
+)
+
+FINISHED_STATUSES = ('done', 'dead')
+
+
+class JobQueue:
+    """
+    Persistent job queue with a fixed number of worker threads.
+
+    Jobs live in the `jobs` table, so queued and in-flight work survives a
+    restart: start() puts jobs left 'running' by the previous process back in
+    the queue. A handler that raises is retried with exponential backoff until
+    max_attempts, after which the job is parked in the 'dead' state.
+
+    Workers only claim kinds registered on this queue, so a separate JobQueue
+    can drain its own kinds with its own concurrency and retry_backoff.
+    """
+
+    def __init__(self, workers: int, poll_interval: float, retry_backoff: float = None, name: str = 'job'):
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.retry_backoff = retry_backoff
+        self.name = name
+        self._handlers: Dict[str, Callable[[Dict, Dict], Optional[Dict]]] = {}
+        self._threads = []
+        self._started = False
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._waiters: Dict[int, threading.Event] = {}
+
+    def register(self, kind: str, handler: Callable[[Dict, Dict], Optional[Dict]]) -> None:
+        """Register handler(payload, job) for a job kind. Its return value is stored as the result."""
+        self._handlers[kind] = handler
+
+    def enqueue(self, kind: str, payload: Dict, max_attempts: int = None, dedupe_key: str = None) -> int:
+        """Queue a job; with dedupe_key an unfinished job of the same kind and key is reused."""
+        if kind not in self._handlers:
+            raise ValueError(f'No handler registered for job kind: {kind}')
+
+        job_id = enqueue_job(kind, payload, max_attempts or Config.JOB_MAX_ATTEMPTS, dedupe_key)
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def enqueue_many(self, kind: str, payloads: List[Dict], max_attempts: int = None) -> List[int]:
+        """Queue a batch of jobs of one kind with a single commit."""
+        if kind not in self._handlers:
+            raise ValueError(f'No handler registered for job kind: {kind}')
+
+        job_ids = enqueue_jobs(kind, payloads, max_attempts or Config.JOB_MAX_ATTEMPTS)
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        return job_ids
+
+    def start(self) -> None:
+        """Recover unfinished jobs and start the workers (idempotent)."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self._stopping.clear()
+
+            recovered = requeue_running_jobs(list(self._handlers))
+            if recovered:
+                print(f"{self.name.capitalize()} queue: recovered {recovered} unfinished job(s)")
+
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    name=f'{self.name}-worker-{index}',
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5) -> None:
+        with self._lock:
+            if not self._started:
+                return
+            self._stopping.set()
+            with self._wakeup:
+                self._wakeup.notify_all()
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+            self._started = False
+
+    def wait(self, job_id: int, timeout: float) -> Optional[Dict]:
+        """Block until the job finishes or timeout elapses, then return its current row."""
+        event = self._waiters.setdefault(job_id, threading.Event())
+        try:
+            job = get_job(job_id)
+            if job and job['status'] not in FINISHED_STATUSES:
+                event.wait(timeout)
+                job = get_job(job_id)
+            return job
+        finally:
+            self._waiters.pop(job_id, None)
+
+    def run_next(self) -> bool:
+        """Claim and run a single job in the calling thread. Returns False if none was ready."""
+        job = claim_next_job(list(self._handlers))
+        if not job:
+            return False
+        self._run(job)
+        return True
+
+    def _worker_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                ran = self.run_next()
+            except Exception as exc:
+                print(f"Job queue worker error: {exc}")
+                ran = False
+
+            if not ran:
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+
+    def _run(self, job: Dict) -> None:
+        handler = self._handlers[job['kind']]
+        status = 'running'
+        try:
+            result = handler(job['payload'], job)
+            complete_job(job['id'], result)
+            status = 'done'
+        except Exception as exc:
+            backoff = Config.JOB_RETRY_BACKOFF_SECONDS if self.retry_backoff is None else self.retry_backoff
+            delay = backoff * (2 ** max(job['attempts'] - 1, 0))
+            status = fail_job(job['id'], f'{type(exc).__name__}: {exc}', delay)
+            print(f"Job {job['id']} ({job['kind']}) failed on attempt {job['attempts']}, now {status}: {exc}")
+            if status == 'dead':
+                traceback.print_exc()
+        finally:
+            event = self._waiters.get(job['id'])
+            if event and status in FINISHED_STATUSES:
+                event.set()
+
+
+job_queue = JobQueue(workers=Config.JOB_WORKERS, poll_interval=Config.JOB_POLL_INTERVAL)
@@ -0,0 +1,157 @@
+"""
+Library export/import for Social Saver Bot
+NDJSON and Parquet backups of saved_content, streamed in chunks both ways
+"""
+
+import json
+from typing import BinaryIO, Dict, Iterable, Iterator, List
+
+from config import is_valid_url, detect_platform
+from database import iter_content_rows, save_contents_many, create_collection
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# CSV export columns, kept as they were for spreadsheets built on them
+CSV_FIELDS = [
+    'id', 'url', 'platform', 'title', 'caption', 'image_url',
+    'media_extraction_status', 'media_extraction_error',
+    'category', 'summary', 'summary_source',
+    'video_summary', 'video_summary_status', 'tags', 'timestamp'
+]
+
+# NDJSON/Parquet backups also carry what an import needs to restore a library
+EXPORT_FIELDS = [
+    'id', 'url', 'platform', 'title', 'caption', 'image_url',
+    'media_extraction_status', 'media_extraction_error',
+    'category', 'category_source', 'summary', 'summary_source',
+    'video_summary', 'video_summary_status', 'tags', 'timestamp',
+    'collection'
+]
+
+# The saving user's phone number is only exported when asked for (include_phone)
+PHONE_FIELD = 'user_phone'
+
+# Columns restored on import; ids are reassigned by the target database
+IMPORT_FIELDS = [field for field in EXPORT_FIELDS if field != 'id'] + [PHONE_FIELD]
+
+IMPORT_BATCH_SIZE = 500
+PARQUET_ROW_GROUP_SIZE = 5000
+
+
+def parquet_available() -> bool:
+    return pa is not None
+
+
+def export_fields(fields: List[str], include_phone: bool = False) -> List[str]:
+    """Columns to export: fields, plus user_phone only when include_phone is set."""
+    return fields + [PHONE_FIELD] if include_phone else list(fields)
+
+
+def iter_ndjson(filters: Dict, include_phone: bool = False) -> Iterator[str]:
+    """Yield one JSON line per matching row."""
+    fields = export_fields(EXPORT_FIELDS, include_phone)
+    for item in iter_content_rows(**filters):
+        yield json.dumps({field: item.get(field) for field in fields}, ensure_ascii=False) + '\n'
+
+
+def write_parquet(filters: Dict, output: BinaryIO, include_phone: bool = False) -> int:
+    """Write matching rows to output as Parquet, one row group per PARQUET_ROW_GROUP_SIZE rows."""
+    if pa is None:
+        raise RuntimeError('Parquet export needs pyarrow (pip install pyarrow)')
+
+    fields = export_fields(EXPORT_FIELDS, include_phone)
+    schema = pa.schema([
+        (field, pa.int64() if field == 'id' else pa.string()) for field in fields
+    ])
+    written = 0
+    with pq.ParquetWriter(output, schema, compression='zstd') as writer:
+        batch = []
+        for item in iter_content_rows(**filters):
+            batch.append({field: item.get(field) for field in fields})
+            if len(batch) >= PARQUET_ROW_GROUP_SIZE:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                written += len(batch)
+                batch = []
+        if batch or not written:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            written += len(batch)
+    return written
+
+
+def _iter_ndjson_records(lines: Iterable) -> Iterator[Dict]:
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        yield record if isinstance(record, dict) else None
+
+
+def _iter_parquet_records(source: BinaryIO) -> Iterator[Dict]:
+    if pa is None:
+        raise RuntimeError('Parquet import needs pyarrow (pip install pyarrow)')
+
+    parquet_file = pq.ParquetFile(source)
+    columns = [name for name in parquet_file.schema_arrow.names if name in IMPORT_FIELDS]
+    for batch in parquet_file.iter_batches(batch_size=IMPORT_BATCH_SIZE, columns=columns):
+        yield from batch.to_pylist()
+
+
+def import_records(records: Iterable[Dict], user_phone: str = None) -> Dict:
+    """
+    Bulk-insert exported records IMPORT_BATCH_SIZE at a time.
+
+    Rows whose canonical URL already exists are skipped; records without a valid
+    URL are counted as invalid. Pass user_phone to assign every row to one user.
+    """
+    counts = {'created': 0, 'skipped': 0, 'invalid': 0}
+    collections = set()
+    batch = []
+
+    def flush():
+        for _, created in save_contents_many(batch):
+            counts['created' if created else 'skipped'] += 1
+        batch.clear()
+
+    for record in records:
+        url = str((record or {}).get('url') or '').strip()
+        if not is_valid_url(url):
+            counts['invalid'] += 1
+            continue
+
+        item = {field: record.get(field) for field in IMPORT_FIELDS}
+        item['url'] = url
+        item['platform'] = item['platform'] or detect_platform(url)
+        if user_phone:
+            item['user_phone'] = user_phone
+        if item['collection']:
+            collections.add(item['collection'])
+
+        batch.append(item)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+
+    for name in collections:
+        create_collection(name)
+    return counts
+
+
+def import_ndjson(lines: Iterable, user_phone: str = None) -> Dict:
+    return import_records(_iter_ndjson_records(lines), user_phone)
+
+
+def import_parquet(source: BinaryIO, user_phone: str = None) -> Dict:
+    return import_records(_iter_parquet_records(source), user_phone)
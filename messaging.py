@@ -0,0 +1,134 @@
+"""
+Outbound WhatsApp messaging for Social Saver Bot
+One long-lived Twilio client, a rate-limited send queue and delivery tracking
+"""
+
+import threading
+from typing import Dict, Optional
+
+from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+
+from config import Config
+from database import create_outbound_message, get_outbound_message, update_outbound_message
+from job_queue import JobQueue
+from rate_limit import TokenBucket
+
+# Twilio delivery statuses in lifecycle order; callbacks can arrive out of order,
+# so a status never moves a message backwards.
+STATUS_RANK = {
+    'pending': 0, 'accepted': 1, 'queued': 1, 'sending': 2, 'sent': 3,
+    'delivered': 4, 'undelivered': 4, 'failed': 4, 'read': 5
+}
+
+_client = None
+_client_lock = threading.Lock()
+
+send_bucket = TokenBucket(Config.TWILIO_SEND_RATE, Config.TWILIO_SEND_BURST)
+outbound_queue = JobQueue(
+    workers=Config.OUTBOUND_WORKERS,
+    poll_interval=Config.JOB_POLL_INTERVAL,
+    retry_backoff=Config.OUTBOUND_RETRY_BACKOFF_SECONDS,
+    name='outbound'
+)
+
+
+def is_configured() -> bool:
+    return bool(Config.TWILIO_ACCOUNT_SID and Config.TWILIO_AUTH_TOKEN and Config.TWILIO_PHONE_NUMBER)
+
+
+def get_client() -> Client:
+    """Shared Twilio client; its pooled HTTP session keeps connections to the API open."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = Client(
+                Config.TWILIO_ACCOUNT_SID,
+                Config.TWILIO_AUTH_TOKEN,
+                http_client=TwilioHttpClient(pool_connections=True, timeout=Config.TWILIO_HTTP_TIMEOUT)
+            )
+        return _client
+
+
+def _whatsapp_address(phone: str) -> str:
+    return phone if phone.startswith('whatsapp:') else f'whatsapp:{phone}'
+
+
+def _status_callback_url() -> Optional[str]:
+    if not Config.FLASK_BASE_URL:
+        return None
+    return f"{Config.FLASK_BASE_URL.rstrip('/')}/whatsapp/status"
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Rate limits, Twilio server errors and network failures are worth retrying; other 4xx are not."""
+    if isinstance(exc, TwilioRestException):
+        return exc.status == 429 or exc.status >= 500
+    return True
+
+
+def queue_message(to_phone: str, body: str) -> Optional[int]:
+    """Queue a WhatsApp message for the sender thread. Returns the outbound message id."""
+    if not is_configured():
+        print("WhatsApp send skipped: Twilio is not fully configured.")
+        return None
+
+    message_id = create_outbound_message(_whatsapp_address(to_phone), body)
+    outbound_queue.enqueue('send_whatsapp', {'message_id': message_id}, max_attempts=Config.OUTBOUND_MAX_ATTEMPTS)
+    return message_id
+
+
+def run_send_message_job(payload: Dict, job: Dict) -> Dict:
+    """
+    Job handler: send one queued message, paced by send_bucket.
+
+    Retryable failures raise so the outbound queue backs off and tries again;
+    permanent ones (bad number, unapproved template, ...) mark the message failed.
+    """
+    message = get_outbound_message(payload['message_id'])
+    if not message:
+        return {'skipped': 'missing'}
+    if message['sid']:
+        return {'sid': message['sid']}  # sent before a restart interrupted the job
+
+    send_bucket.acquire()
+    kwargs = {
+        'body': message['body'],
+        'from_': f"whatsapp:{Config.TWILIO_PHONE_NUMBER}",
+        'to': message['to_phone'],
+    }
+    callback = _status_callback_url()
+    if callback:
+        kwargs['status_callback'] = callback
+
+    try:
+        sent = get_client().messages.create(**kwargs)
+    except Exception as exc:
+        error = f'{type(exc).__name__}: {exc}'
+        final = not is_retryable(exc) or job['attempts'] >= job['max_attempts']
+        update_outbound_message(message['id'], 'failed' if final else 'pending', error=error, attempted=True)
+        if not is_retryable(exc):
+            print(f"WhatsApp send to {message['to_phone']} failed permanently: {exc}")
+            return {'error': error}
+        raise
+
+    update_outbound_message(message['id'], sent.status or 'queued', sid=sent.sid, attempted=True)
+    return {'sid': sent.sid}
+
+
+def record_delivery_status(sid: str, status: str, error_code: str = None) -> bool:
+    """Apply a Twilio status callback. Returns False for unknown SIDs."""
+    message = get_outbound_message(sid=sid)
+    if not message:
+        return False
+
+    status = (status or '').lower()
+    if STATUS_RANK.get(status, -1) > STATUS_RANK.get(message['status'], -1):
+        update_outbound_message(
+            message['id'], status, error=f'Twilio error {error_code}' if error_code else message['error']
+        )
+    return True
+
+
+outbound_queue.register('send_whatsapp', run_send_message_job)
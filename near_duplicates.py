@@ -0,0 +1,182 @@
+"""
+Near-duplicate detection for Social Saver Bot
+MinHash signatures of normalized title + caption, looked up through LSH bands
+stored in SQLite, so a new save is checked against the user's whole library at once.
+"""
+
+import hashlib
+import random
+import re
+from typing import Dict, List, Optional, Set
+
+from config import Config
+from database import (
+    find_minhash_candidates, get_content_by_id, get_content_missing_minhash, get_contents_by_ids,
+    on_content_saved, save_minhash_bands
+)
+
+# 20 bands of 3 rows: items with Jaccard similarity 0.6 share a band ~99% of the
+# time, while unrelated items (< 0.2) rarely do. Candidates are then verified exactly.
+BANDS = 20
+ROWS_PER_BAND = 3
+SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(BANDS * ROWS_PER_BAND)
+]
+
+URL_PATTERN = re.compile(r'https?://\S+|www\.\S+')
+WORD_PATTERN = re.compile(r'[^\W_]+', re.UNICODE)
+# Tag added to a save that borderline-matches an earlier one (which is not rejected)
+DUPLICATE_TAG_PREFIX = 'duplicate-of:'
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from how in is it its of on or the this to vs with your you'.split()
+)
+
+
+def normalize_text(title: str, caption: str) -> List[str]:
+    """Lowercased words of title + caption, without URLs, punctuation, emoji or stopwords."""
+    text = URL_PATTERN.sub(' ', f"{title or ''} {caption or ''}".lower())
+    return [word for word in WORD_PATTERN.findall(text) if word not in STOPWORDS]
+
+
+def shingles(words: List[str]) -> Set[str]:
+    """Character SHINGLE_SIZE-grams, which tolerate small rewordings better than word sets."""
+    text = ' '.join(words)
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def minhash(shingle_set: Set[str]) -> List[int]:
+    hashes = [_hash64(shingle.encode('utf-8')) for shingle in shingle_set]
+    return [
+        min((a * value + b) % _MERSENNE_PRIME for value in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def band_buckets(signature: List[int]) -> List[int]:
+    """One signed 64-bit bucket per band (SQLite integers are signed)."""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        value = _hash64(b','.join(str(row).encode() for row in rows))
+        buckets.append(value - (1 << 64) if value >= 1 << 63 else value)
+    return buckets
+
+
+def _shingles_for(title: str, caption: str) -> Optional[Set[str]]:
+    """Shingles of title + caption, or None when there are too few words to compare."""
+    words = normalize_text(title, caption)
+    if len(words) < Config.NEAR_DUPLICATE_MIN_WORDS:
+        return None
+    return shingles(words)
+
+
+def index_items(items: List[Dict]) -> None:
+    rows = []
+    for item in items:
+        shingle_set = _shingles_for(item.get('title'), item.get('caption'))
+        rows.append((item['id'], band_buckets(minhash(shingle_set)) if shingle_set else []))
+    if rows:
+        save_minhash_bands(rows)
+
+
+def backfill(batch_size: int = 500) -> int:
+    """
+    Index every item not yet in the band table. Returns how many were indexed.
+
+    Imported and bulk-saved rows skip the save hook; this catches them up from a
+    background job, so find_similar() never pays for it inline.
+    """
+    indexed = 0
+    while True:
+        items = get_content_missing_minhash(batch_size)
+        if not items:
+            return indexed
+        index_items(items)
+        indexed += len(items)
+
+
+@on_content_saved
+def index_saved_content(content_id: int) -> None:
+    item = get_content_by_id(content_id)
+    if item:
+        index_items([item])
+
+
+def find_similar(title: str, caption: str, min_similarity: float = None, exclude_id: int = None,
+                 user_phone: str = None) -> List[Dict]:
+    """
+    Items saved by user_phone whose title + caption overlap this text by at least
+    min_similarity (Jaccard over shingles), most similar first, each with a 'similarity'.
+    """
+    min_similarity = Config.NEAR_DUPLICATE_BORDERLINE_SIMILARITY if min_similarity is None else min_similarity
+    shingle_set = _shingles_for(title, caption)
+    if not shingle_set:
+        return []
+
+    candidate_ids = [
+        content_id for content_id in find_minhash_candidates(band_buckets(minhash(shingle_set)), user_phone)
+        if content_id != exclude_id
+    ]
+
+    matches = []
+    for item in get_contents_by_ids(candidate_ids):
+        similarity = jaccard(shingle_set, _shingles_for(item.get('title'), item.get('caption')) or set())
+        if similarity >= min_similarity:
+            item['similarity'] = round(similarity, 3)
+            matches.append(item)
+    matches.sort(key=lambda item: item['similarity'], reverse=True)
+    return matches
+
+
+def find_near_duplicate(url: str, title: str, caption: str, confirm=None, user_phone: str = None) -> Optional[Dict]:
+    """
+    Return the item in user_phone's library this new content most likely duplicates, or None.
+
+    At NEAR_DUPLICATE_MIN_SIMILARITY or above it is a duplicate outright. Otherwise
+    the closest candidate above NEAR_DUPLICATE_BORDERLINE_SIMILARITY is passed to
+    confirm(existing) -> bool (e.g. the LLM duplicate check) when given, so at
+    most one borderline pair is ever sent to the model. The returned item's
+    'borderline' is True in that case: the new content should still be saved,
+    flagged with flag_possible_duplicate(), rather than rejected.
+    """
+    if not Config.NEAR_DUPLICATE_ENABLED:
+        return None
+
+    candidates = find_similar(title, caption, user_phone=user_phone)
+    if not candidates:
+        return None
+    closest = candidates[0]
+    closest['borderline'] = closest['similarity'] < Config.NEAR_DUPLICATE_MIN_SIMILARITY
+    if not closest['borderline']:
+        return closest
+    if confirm is None:
+        return None
+    try:
+        return closest if confirm(closest) else None
+    except Exception as exc:
+        print(f"Near-duplicate confirmation failed for {url}: {type(exc).__name__}: {exc}")
+        return None
+
+
+def flag_possible_duplicate(tags: str, near_duplicate: Optional[Dict]) -> str:
+    """Tags for a new save, plus 'duplicate-of:<id>' when it borderline-matches an earlier save."""
+    if not near_duplicate or not near_duplicate.get('borderline'):
+        return tags
+    flag = f"{DUPLICATE_TAG_PREFIX}{near_duplicate['id']}"
+    return f"{tags}, {flag}" if tags else flag
@@ -0,0 +1,225 @@
+"""
+Rate limiting for Social Saver Bot
+Thread-safe token buckets, circuit breakers and per-provider limiters for
+pacing calls to third-party APIs
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, holding at most `capacity`.
+
+    acquire() blocks until a token is available (or the timeout passes), so a
+    sender thread paced by the bucket never exceeds the provider's throughput.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(capacity, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Take tokens if available. Returns 0 on success, else the seconds until they will be."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def refund(self, tokens: float) -> None:
+        """Return tokens taken for work that turned out smaller (or never happened)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + max(tokens, 0))
+
+    def acquire(self, tokens: float = 1, timeout: float = None) -> bool:
+        """Block until tokens are taken. Returns False if timeout elapsed first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures so callers fail fast.
+
+    After `reset_timeout` seconds one trial call is let through (half-open): its
+    success closes the breaker again, its failure re-opens it for another period.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class ProviderLimiter:
+    """
+    Requests/min and tokens/min buckets plus a circuit breaker for one API provider.
+
+    Token costs are reserved up front from an estimate and settled afterwards with
+    the provider's reported usage. A rate of 0 disables that bucket. Counters are
+    exposed through stats() for monitoring.
+    """
+
+    COUNTERS = ('calls', 'successes', 'failures', 'rate_limited', 'retries', 'throttled', 'short_circuited')
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute / 60, requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute > 0 else None
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._paused_until = 0.0
+        self._counts = dict.fromkeys(self.COUNTERS, 0)
+        self._waited = 0.0
+        self._lock = threading.Lock()
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[counter] += amount
+
+    def pause(self, seconds: float) -> None:
+        """Hold every call for `seconds` (the provider said Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self, tokens: float = 0, timeout: float = None) -> float:
+        """
+        Wait for the provider to be callable. Returns the tokens reserved, or -1 when
+        the breaker is open or the wait would exceed `timeout` (use the fallback).
+        """
+        if self.breaker.state == CircuitBreaker.OPEN:
+            self.count('short_circuited')
+            return -1
+
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        with self._lock:
+            paused = self._paused_until - start
+        if paused > 0:
+            if deadline is not None and start + paused > deadline:
+                self.count('throttled')
+                return -1
+            time.sleep(paused)
+
+        def remaining():
+            return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+        if self.requests and not self.requests.acquire(1, remaining()):
+            self.count('throttled')
+            return -1
+        reserved = min(tokens, self.tokens.capacity) if self.tokens else 0
+        if reserved and not self.tokens.acquire(reserved, remaining()):
+            self.count('throttled')
+            return -1
+
+        if not self.breaker.allow():
+            # another thread's half-open trial call is already in flight
+            if self.requests:
+                self.requests.refund(1)
+            if reserved:
+                self.tokens.refund(reserved)
+            self.count('short_circuited')
+            return -1
+
+        with self._lock:
+            self._counts['calls'] += 1
+            self._waited += time.monotonic() - start
+        return reserved
+
+    def settle(self, reserved: float, used: Optional[float]) -> None:
+        """Refund the part of a reservation the call did not use."""
+        if self.tokens and reserved and used is not None and used < reserved:
+            self.tokens.refund(reserved - used)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counts)
+            stats['wait_seconds'] = round(self._waited, 3)
+        stats['circuit'] = self.breaker.state
+        return stats
@@ -0,0 +1,404 @@
+"""
+Semantic retrieval for Social Saver Bot
+Embeds each save's title, summary, tags and video summary, and finds the saves
+closest in meaning to a question (the "ask:" RAG context).
+"""
+
+import hashlib
+import heapq
+import math
+import random
+import re
+import threading
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from config import Config
+from database import (
+    EMBEDDED_FIELDS, get_content_by_id, get_content_missing_embeddings, get_contents_by_ids,
+    get_embeddings, init_db, on_content_saved, save_embeddings
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Field weights for the hashing embedder; titles and tags say most about an item
+FIELD_WEIGHTS = {'title': 2.0, 'tags': 1.5, 'summary': 1.0, 'video_summary': 1.0}
+
+STOPWORDS = frozenset('''
+a about above after again all also am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her
+here hers him his how i if in into is it its just me more most my no nor not now of off on once only or
+other our out over own same she should so some such than that the their them then there these they this
+those through to too under until up very was we were what when where which while who whom why will with
+would you your yours saved save show tell find anything something
+'''.split())
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# LSH layout for the approximate index: TABLES hash tables of BITS random hyperplanes each
+LSH_TABLES = 8
+LSH_BITS = 12
+
+
+def _tokens(text: str) -> List[str]:
+    tokens = []
+    for token in TOKEN_PATTERN.findall((text or '').lower()):
+        if token in STOPWORDS or len(token) < 2:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+@lru_cache(maxsize=65536)
+def _feature_hash(feature: str, dim: int):
+    digest = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+    return digest % dim, 1.0 if digest >> 63 else -1.0
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else vector
+
+
+def _item_text(item: Dict) -> str:
+    return '. '.join(str(item.get(field) or '') for field in EMBEDDED_FIELDS if item.get(field))
+
+
+class HashingEmbedder:
+    """
+    Dependency-free fallback: signed feature hashing of unigrams and bigrams
+    with sublinear term frequency. search() applies IDF from the indexed
+    library to the query side, so the scores behave like TF-IDF cosine.
+    """
+
+    uses_idf = True
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.name = f'hashing-{dim}'
+
+    def _add_text(self, counts: Dict[int, float], text: str, weight: float) -> None:
+        tokens = _tokens(text)
+        features = tokens + [f'{a}_{b}' for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            index, sign = _feature_hash(feature, self.dim)
+            counts[index] = counts.get(index, 0.0) + sign * weight
+
+    def _vector(self, counts: Dict[int, float]) -> List[float]:
+        vector = [0.0] * self.dim
+        for index, value in counts.items():
+            vector[index] = math.copysign(1 + math.log(abs(value)), value) if abs(value) >= 1 else value
+        return _normalize(vector)
+
+    def embed_items(self, items: List[Dict]) -> List[List[float]]:
+        vectors = []
+        for item in items:
+            counts = {}
+            for field in EMBEDDED_FIELDS:
+                self._add_text(counts, str(item.get(field) or ''), FIELD_WEIGHTS[field])
+            vectors.append(self._vector(counts))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        counts = {}
+        self._add_text(counts, text, 1.0)
+        return self._vector(counts)
+
+
+class SentenceTransformerEmbedder:
+    """Local CPU sentence-embedding model (needs the sentence-transformers package)."""
+
+    uses_idf = False
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device='cpu')
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f'st:{model_name}'
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        return [list(map(float, row)) for row in self.model.encode(texts, batch_size=32, normalize_embeddings=True)]
+
+    def embed_items(self, items: List[Dict]) -> List[List[float]]:
+        return self._encode([_item_text(item) for item in items])
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0]
+
+
+def make_embedder(model: str = None):
+    """'hashing' (the default) or a sentence-transformers model name such as all-MiniLM-L6-v2."""
+    model = model or Config.EMBEDDING_MODEL
+    if model and model != 'hashing':
+        try:
+            return SentenceTransformerEmbedder(model)
+        except Exception as exc:
+            print(f"Embedding model {model} unavailable, using hashed embeddings: {exc}")
+    return HashingEmbedder(Config.EMBEDDING_DIM)
+
+
+def to_blob(vector) -> bytes:
+    if np is not None:
+        return np.asarray(vector, dtype=np.float32).tobytes()
+    return array('f', vector).tobytes()
+
+
+def from_blob(blob: bytes):
+    if np is not None:
+        return np.frombuffer(blob, dtype=np.float32)
+    vector = array('f')
+    vector.frombytes(blob)
+    return vector
+
+
+def _dot(a, b) -> float:
+    if np is not None:
+        return float(np.dot(a, b))
+    return sum(x * y for x, y in zip(a, b) if x and y)
+
+
+class SemanticIndex:
+    """
+    In-memory copy of content_embeddings, kept current incrementally.
+
+    Below ann_threshold items, search is an exact brute-force cosine top-k
+    (one matrix-vector product with NumPy). Above it, random-hyperplane LSH
+    tables pick candidates (probing each bucket and its one-bit neighbours)
+    and only those are scored exactly.
+    """
+
+    def __init__(self, embedder=None, ann_threshold: int = None):
+        self._embedder = embedder
+        self.ann_threshold = Config.SEMANTIC_ANN_THRESHOLD if ann_threshold is None else ann_threshold
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._ids: List[int] = []
+        self._positions: Dict[int, int] = {}
+        self._vectors = []
+        self._matrix = None
+        self._df: Dict[int, int] = {}
+        self._planes = None
+        self._buckets: Optional[List[Dict[int, set]]] = None
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = make_embedder()
+        return self._embedder
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # ---------- maintenance ----------
+
+    def _nonzero(self, vector) -> List[int]:
+        return [index for index, value in enumerate(vector) if value]
+
+    def _upsert(self, content_id: int, vector) -> None:
+        position = self._positions.get(content_id)
+        if position is None:
+            self._positions[content_id] = len(self._ids)
+            self._ids.append(content_id)
+            self._vectors.append(vector)
+        else:
+            self._bucket_remove(content_id, self._vectors[position])
+            self._df_update(self._vectors[position], -1)
+            self._vectors[position] = vector
+        self._df_update(vector, 1)
+        self._bucket_add(content_id, vector)
+        self._matrix = None
+
+    def _remove(self, content_id: int) -> None:
+        position = self._positions.pop(content_id, None)
+        if position is None:
+            return
+        self._bucket_remove(content_id, self._vectors[position])
+        self._df_update(self._vectors[position], -1)
+        last_id = self._ids.pop()
+        last_vector = self._vectors.pop()
+        if last_id != content_id:
+            self._ids[position] = last_id
+            self._vectors[position] = last_vector
+            self._positions[last_id] = position
+        self._matrix = None
+
+    def _df_update(self, vector, delta: int) -> None:
+        if not self.embedder.uses_idf:
+            return
+        for index in self._nonzero(vector):
+            self._df[index] = self._df.get(index, 0) + delta
+
+    def _embed_and_store(self, items: List[Dict]) -> None:
+        # Embedding runs outside the lock so a long backfill never blocks search()
+        vectors = self.embedder.embed_items(items)
+        save_embeddings([(item['id'], self.embedder.name, to_blob(vector)) for item, vector in zip(items, vectors)])
+        with self._lock:
+            for item, vector in zip(items, vectors):
+                self._upsert(item['id'], from_blob(to_blob(vector)))
+
+    def load(self) -> None:
+        """Load the stored vectors into memory (once)."""
+        with self._lock:
+            if self._loaded:
+                return
+            for content_id, blob in get_embeddings(self.embedder.name):
+                self._upsert(content_id, from_blob(blob))
+            self._loaded = True
+
+    def sync(self, batch_size: int = 200) -> int:
+        """
+        Load stored vectors and embed every item that lacks one, a batch at a time.
+        Returns how many were embedded.
+
+        This can embed a whole imported library, so it runs in a background job
+        (and the rebuild command), never on the search path.
+        """
+        self.load()
+        embedded = 0
+        while True:
+            items = get_content_missing_embeddings(self.embedder.name, batch_size)
+            if not items:
+                return embedded
+            self._embed_and_store(items)
+            embedded += len(items)
+
+    def index_content(self, content_id: int) -> None:
+        """Embed one new or edited item (registered as a database content hook)."""
+        item = get_content_by_id(content_id)
+        if item:
+            self._embed_and_store([item])
+
+    # ---------- approximate index ----------
+
+    def _signatures(self, vector) -> List[int]:
+        if np is not None:
+            bits = ((self._planes @ np.asarray(vector, dtype=np.float32)) > 0).reshape(LSH_TABLES, LSH_BITS)
+            return (bits @ (1 << np.arange(LSH_BITS - 1, -1, -1))).tolist()
+        nonzero = self._nonzero(vector)
+        signatures = []
+        for table in range(LSH_TABLES):
+            signature = 0
+            for bit in range(LSH_BITS):
+                plane = self._planes[table * LSH_BITS + bit]
+                signature = (signature << 1) | (sum(plane[i] * vector[i] for i in nonzero) > 0)
+            signatures.append(signature)
+        return signatures
+
+    def _build_buckets(self) -> None:
+        rng = random.Random(1337)
+        planes = [[rng.gauss(0, 1) for _ in range(self.embedder.dim)] for _ in range(LSH_TABLES * LSH_BITS)]
+        self._planes = np.asarray(planes, dtype=np.float32) if np is not None else planes
+        self._buckets = [{} for _ in range(LSH_TABLES)]
+        for content_id, vector in zip(self._ids, self._vectors):
+            self._bucket_add(content_id, vector)
+
+    def _bucket_add(self, content_id: int, vector) -> None:
+        if self._buckets is None:
+            return
+        for table, signature in zip(self._buckets, self._signatures(vector)):
+            table.setdefault(signature, set()).add(content_id)
+
+    def _bucket_remove(self, content_id: int, vector) -> None:
+        if self._buckets is None:
+            return
+        for table, signature in zip(self._buckets, self._signatures(vector)):
+            table.get(signature, set()).discard(content_id)
+
+    def _candidates(self, query) -> List[int]:
+        if self._buckets is None:
+            self._build_buckets()
+        candidates = set()
+        for table, signature in zip(self._buckets, self._signatures(query)):
+            candidates |= table.get(signature, set())
+            for bit in range(LSH_BITS):
+                candidates |= table.get(signature ^ (1 << bit), set())
+        return list(candidates)
+
+    # ---------- search ----------
+
+    def _weighted_query(self, text: str):
+        query = self.embedder.embed_query(text)
+        if self.embedder.uses_idf and self._ids:
+            total = len(self._ids)
+            query = _normalize([
+                value * (math.log((total + 1) / (self._df.get(index, 0) + 1)) + 1) if value else 0.0
+                for index, value in enumerate(query)
+            ])
+        return from_blob(to_blob(query))
+
+    def _scores(self, query, candidate_ids: List[int] = None) -> List[tuple]:
+        if candidate_ids is None:
+            if np is not None:
+                if self._matrix is None:
+                    self._matrix = np.vstack(self._vectors)
+                return list(zip((self._matrix @ query).tolist(), self._ids))
+            candidate_ids = self._ids
+        return [(_dot(self._vectors[self._positions[content_id]], query), content_id) for content_id in candidate_ids]
+
+    def search(self, text: str, limit: int = 5, min_score: float = None) -> List[Dict]:
+        """
+        Saved items most similar to text, best first, each with a 'semantic_score'.
+
+        Only items already embedded are searched; sync() fills in the rest.
+        """
+        min_score = Config.SEMANTIC_MIN_SCORE if min_score is None else min_score
+        self.load()
+        with self._lock:
+            if not self._ids:
+                return []
+            query = self._weighted_query(text)
+            if not any(query[index] for index in range(len(query))):
+                return []
+
+            candidates = None
+            if len(self._ids) >= self.ann_threshold:
+                candidates = self._candidates(query)
+                if len(candidates) < limit:
+                    candidates = None  # sparse neighbourhood: fall back to exact search
+            ranked = heapq.nlargest(limit * 2, self._scores(query, candidates))
+
+        ranked = [(score, content_id) for score, content_id in ranked if score >= min_score]
+        items = get_contents_by_ids([content_id for _, content_id in ranked])
+        found = {item['id'] for item in items}
+        with self._lock:
+            for _, content_id in ranked:
+                if content_id not in found:
+                    self._remove(content_id)  # deleted since it was indexed
+
+        scores = dict((content_id, score) for score, content_id in ranked)
+        for item in items:
+            item['semantic_score'] = round(scores[item['id']], 4)
+        return items[:limit]
+
+
+semantic_index = SemanticIndex()
+
+
+@on_content_saved
+def index_saved_content(content_id: int) -> None:
+    semantic_index.index_content(content_id)
+
+
+def semantic_search(text: str, limit: int = 5, min_score: float = None) -> List[Dict]:
+    return semantic_index.search(text, limit, min_score)
+
+
+if __name__ == '__main__':
+    import sys
+
+    init_db()
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'rebuild':
+        print(f"Embedded {semantic_index.sync()} item(s) with {semantic_index.embedder.name}")
+    elif command == 'search' and len(sys.argv) > 2:
+        for result in semantic_search(' '.join(sys.argv[2:]), limit=10, min_score=0):
+            print(f"{result['semantic_score']:.3f}  {result['title']}  {result['url']}")
+    else:
+        print("Usage: python semantic_index.py rebuild | search <question>")
@@ -21,6 +21,28 @@ function safeString(value) {
     return String(value);
 }
 
+// Background jobs: saves and AI regeneration answer 202 with a status_url
+// when they outlast the server's wait, so poll it until the job finishes
+const JOB_POLL_INTERVAL_MS = 1500;
+const JOB_POLL_LIMIT = 200;
+
+async function waitForJob(data, onProcessing) {
+    if (!data.queued) return data;
+    if (onProcessing) onProcessing();
+    for (let i = 0; i < JOB_POLL_LIMIT; i++) {
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        const response = await fetch(data.status_url);
+        const job = (await response.json()).data;
+        if (!job) return { success: false, error: 'Job not found' };
+        if (job.status === 'done') {
+            const result = job.result || {};
+            return { ...result, success: result.success !== false && !result.error };
+        }
+        if (job.status === 'dead') return { success: false, error: job.last_error || 'Job failed' };
+    }
+    return { success: false, error: 'Still processing, refresh the page later' };
+}
+
 // Add content form handler
 document.getElementById('addContentForm')?.addEventListener('submit', async (e) => {
     e.preventDefault();
@@ -38,7 +60,9 @@ document.getElementById('addContentForm')?.addEventListener('submit', async (e)
             body: JSON.stringify({ url })
         });
 
-        const data = await response.json();
+        const data = await waitForJob(await response.json(), () => {
+            btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Processing...';
+        });
 
         if (data.success) {
             showToast('Content saved successfully!', 'success');
@@ -94,7 +118,7 @@ async function regenerateAI(id) {
 
     try {
         const response = await fetch(`/api/content/${id}/regenerate`, { method: 'POST' });
-        const data = await response.json();
+        const data = await waitForJob(await response.json(), () => showToast('Processing in the background...', 'success'));
 
         if (data.success) {
             showToast('AI content regenerated!', 'success');
@@ -0,0 +1,29 @@
+import os
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway database before any project module is imported:
+# init_db() (run on the app's first request) must never touch the repo's own file.
+_session_dir = tempfile.mkdtemp(prefix='social-saver-tests-')
+os.environ['DATABASE_PATH'] = os.path.join(_session_dir, 'social_saver.db')
+os.environ['CACHE_DB_PATH'] = os.path.join(_session_dir, 'cache.db')
+os.environ['CATEGORY_MODEL_PATH'] = os.path.join(_session_dir, 'category_model.json')
+
+import cache  # noqa: E402
+import database  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def temp_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'CACHE_DB_PATH', str(tmp_path / 'cache.db'))
+    yield cache
+    cache.close_caches()
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'test.db'))
+    database.init_db()
+    yield database
+    database.close_pool()
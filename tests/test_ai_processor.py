@@ -1,4 +1,12 @@
+import os
+import tempfile
+import time
+
+import requests
+
+import ai_processor
 from ai_processor import AIProcessor
+from rate_limit import ProviderLimiter
 
 
 def test_summarize_content_prefers_video_analysis(monkeypatch):
@@ -84,3 +92,366 @@ def test_clean_summary_keeps_complete_sentences_without_ellipsis():
 
     assert summary == "Akaash Singh performs stand-up comedy and jokes about a man's casual outfit."
     assert '...' not in summary
+
+
+def test_process_content_runs_tasks_concurrently(monkeypatch):
+    processor = AIProcessor()
+    processor.gemini_api_key = 'test-key'
+
+    def slow(value):
+        def run(*args, **kwargs):
+            time.sleep(0.3)
+            return value
+        return run
+
+    monkeypatch.setattr(processor, 'categorize_content_with_source', slow(('Programming & Coding', 'ai')))
+    monkeypatch.setattr(processor, 'summarize_content', slow(('A short summary.', 'video')))
+    monkeypatch.setattr(processor, 'extract_tags', slow('python, debugging'))
+    monkeypatch.setattr(processor, 'generate_video_summary', slow(('A detailed summary.', 'available')))
+
+    started = time.monotonic()
+    result = processor._process_content_concurrently(
+        url='https://www.youtube.com/watch?v=abc123',
+        title='Debugging a Flask API',
+        caption='',
+        platform='youtube',
+        media_type='video',
+        deadline_seconds=5
+    )
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.9
+    assert result == {
+        'category': 'Programming & Coding',
+        'category_source': 'ai',
+        'summary': 'A short summary.',
+        'summary_source': 'video',
+        'video_summary': 'A detailed summary.',
+        'video_summary_status': 'available',
+        'tags': 'python, debugging'
+    }
+
+
+def test_process_content_keeps_partial_results_at_deadline(monkeypatch):
+    processor = AIProcessor()
+
+    def hang(*args, **kwargs):
+        time.sleep(1)
+        return ('too late', 'available')
+
+    def broken(*args, **kwargs):
+        raise RuntimeError('tags service down')
+
+    monkeypatch.setattr(processor, 'categorize_content_with_source', lambda *args, **kwargs: ('Cricket', 'local'))
+    monkeypatch.setattr(processor, 'summarize_content', lambda *args, **kwargs: ('Quick summary.', 'metadata'))
+    monkeypatch.setattr(processor, 'extract_tags', broken)
+    monkeypatch.setattr(processor, 'generate_video_summary', hang)
+
+    result = processor._process_content_concurrently(
+        url='https://www.instagram.com/reel/example/',
+        title='Cover drive masterclass',
+        caption='',
+        platform='instagram',
+        media_type='reel',
+        deadline_seconds=0.2
+    )
+
+    assert result['category'] == 'Cricket'
+    assert result['category_source'] == 'local'
+    assert result['summary'] == 'Quick summary.'
+    assert result['tags'] == 'cover, drive, masterclass'
+    assert result['video_summary'] == ''
+    assert result['video_summary_status'] == 'video_analysis_timeout'
+
+
+def test_video_prompts_share_one_download_and_upload(monkeypatch):
+    processor = AIProcessor()
+    processor.gemini_api_key = 'test-key'
+    processor.groq_api_key = ''
+    calls = {'download': 0, 'upload': 0, 'delete': 0, 'prompts': []}
+
+    def fake_download(media_url, fallback_suffix, expected_prefix):
+        calls['download'] += 1
+        fd, path = tempfile.mkstemp(suffix='.mp4')
+        os.close(fd)
+        return path, 'video/mp4'
+
+    def fake_upload(file_path, mime_type, display_name):
+        calls['upload'] += 1
+        return {'name': 'files/abc', 'uri': 'https://gemini.example/files/abc'}
+
+    def fake_gemini(parts, model=None, media_hash=None):
+        calls['prompts'].append(parts[0]['file_data']['file_uri'])
+        return 'The creator demonstrates three debugging steps in a terminal.'
+
+    monkeypatch.setattr(processor, '_download_media_to_temp', fake_download)
+    monkeypatch.setattr(processor, '_upload_file_to_gemini', fake_upload)
+    monkeypatch.setattr(processor, '_call_gemini', fake_gemini)
+    monkeypatch.setattr(processor, '_delete_gemini_file', lambda name: calls.__setitem__('delete', calls['delete'] + 1))
+
+    for concurrent in (False, True):
+        calls.update({'download': 0, 'upload': 0, 'delete': 0, 'prompts': []})
+        monkeypatch.setattr('ai_processor.Config.AI_CONCURRENT', concurrent)
+
+        result = processor.process_content(
+            url='https://www.instagram.com/reel/example/',
+            title='Python Debugging Tips',
+            caption='',
+            platform='instagram',
+            media_url='https://cdn.example.com/reel.mp4',
+            media_type='reel'
+        )
+        time.sleep(0.05)  # let done-callbacks release the shared upload
+
+        assert result['summary_source'] == 'video'
+        assert result['video_summary_status'] == 'available'
+        assert calls['download'] == 1
+        assert calls['upload'] == 1
+        assert calls['prompts'] == ['https://gemini.example/files/abc'] * 2
+        assert calls['delete'] == 1
+
+
+def test_call_groq_serves_repeated_prompts_from_cache(monkeypatch):
+    processor = AIProcessor()
+    processor.groq_api_key = 'test-key'
+    monkeypatch.setattr('ai_processor.Config.LLM_CACHE_ENABLED', True)
+    posts = []
+
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {'choices': [{'message': {'content': ' Technology '}}]}
+
+    def fake_post(url, **kwargs):
+        posts.append(kwargs['json']['messages'][0]['content'])
+        return FakeResponse()
+
+    monkeypatch.setattr(processor.session, 'post', fake_post)
+
+    assert processor._call_groq('Categorize this post') == 'Technology'
+    assert processor._call_groq('Categorize this post') == 'Technology'
+    assert processor._call_groq('Categorize another post') == 'Technology'
+    assert posts == ['Categorize this post', 'Categorize another post']
+    assert processor._llm_cache().stats()['hits'] == 1
+
+
+def test_cached_video_prompts_skip_upload(monkeypatch):
+    processor = AIProcessor()
+    processor.gemini_api_key = 'test-key'
+    monkeypatch.setattr('ai_processor.Config.LLM_CACHE_ENABLED', True)
+    uploads = []
+
+    def fake_download(media_url, fallback_suffix, expected_prefix):
+        fd, path = tempfile.mkstemp(suffix='.mp4')
+        os.write(fd, b'same video bytes')
+        os.close(fd)
+        return path, 'video/mp4'
+
+    monkeypatch.setattr(processor, '_download_media_to_temp', fake_download)
+    monkeypatch.setattr(processor, '_upload_file_to_gemini', lambda **kwargs: uploads.append(1) or {'name': 'files/x', 'uri': 'https://gemini.example/files/x'})
+    monkeypatch.setattr(processor, '_delete_gemini_file', lambda name: None)
+
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {'candidates': [{'content': {'parts': [{'text': 'A walkthrough of terminal debugging.'}]}}]}
+
+    monkeypatch.setattr(processor.session, 'post', lambda url, **kwargs: FakeResponse())
+
+    first = processor._summarize_uploaded_media('https://cdn.example.com/a.mp4', 'Summarize', 'video/', '.mp4', 'gemini-test')
+    second = processor._summarize_uploaded_media('https://cdn.example.com/b.mp4', 'Summarize', 'video/', '.mp4', 'gemini-test')
+
+    assert first == second == 'A walkthrough of terminal debugging.'
+    assert len(uploads) == 1
+
+
+def test_fused_prompt_answers_all_fields_in_one_call(monkeypatch):
+    processor = AIProcessor()
+    processor.gemini_api_key = ''
+    prompts = []
+
+    def fake_groq(prompt):
+        prompts.append(prompt)
+        return ('```json\n{"category": "programming & coding", '
+                '"summary": "A walkthrough of three common Python debugging mistakes.", '
+                '"tags": ["Python", "debugging", "developer-tips"]}\n```')
+
+    monkeypatch.setattr(processor, '_call_groq', fake_groq)
+    monkeypatch.setattr('ai_processor.Config.AI_FUSED_PROMPT', True)
+
+    for concurrent in (False, True):
+        prompts.clear()
+        monkeypatch.setattr('ai_processor.Config.AI_CONCURRENT', concurrent)
+
+        result = processor.process_content(
+            url='https://example.com/python-debugging',
+            title='Python Debugging Tips',
+            caption='Stop making these mistakes',
+            platform='blog'
+        )
+
+        assert len(prompts) == 1
+        assert result['category'] == 'Programming & Coding'
+        assert result['summary'] == 'A walkthrough of three common Python debugging mistakes.'
+        assert result['summary_source'] == 'metadata'
+        assert result['tags'] == 'python, debugging, developer-tips'
+
+
+def test_fused_prompt_falls_back_per_missing_field(monkeypatch):
+    processor = AIProcessor()
+    processor.gemini_api_key = ''
+    prompts = []
+
+    def fake_groq(prompt):
+        prompts.append(prompt)
+        if prompt.endswith('JSON:'):
+            return '{"category": "Underwater Basket Weaving", "summary": "", "tags": "python, debugging"}'
+        if prompt.endswith('Category:'):
+            return 'Technology'
+        return 'A short post about debugging Python code.'
+
+    monkeypatch.setattr(processor, '_call_groq', fake_groq)
+    monkeypatch.setattr('ai_processor.Config.AI_FUSED_PROMPT', True)
+    monkeypatch.setattr('ai_processor.Config.AI_CONCURRENT', False)
+
+    result = processor.process_content(
+        url='https://example.com/post',
+        title='Debugging',
+        caption='',
+        platform='blog'
+    )
+
+    assert [prompt.rsplit('\n', 1)[-1] for prompt in prompts] == ['JSON:', 'Category:', 'Summary:']
+    assert result['category'] == 'Technology'
+    assert result['summary'] == 'A short post about debugging Python code.'
+    assert result['tags'] == 'python, debugging'
+
+
+class FakeHTTPResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code} Error', response=self)
+
+    def json(self):
+        return self.body
+
+
+def test_call_groq_retries_rate_limits_after_retry_after(monkeypatch):
+    processor = AIProcessor()
+    processor.groq_api_key = 'test-key'
+    monkeypatch.setattr('ai_processor.Config.LLM_CACHE_ENABLED', False)
+    limiter = ProviderLimiter('groq', requests_per_minute=600, tokens_per_minute=100000)
+    monkeypatch.setitem(ai_processor.provider_limiters, 'groq', limiter)
+    responses = [
+        FakeHTTPResponse(429, headers={'Retry-After': '0.05'}),
+        FakeHTTPResponse(200, {'choices': [{'message': {'content': 'Cricket'}}], 'usage': {'total_tokens': 40}}),
+    ]
+    monkeypatch.setattr(processor.session, 'post', lambda url, **kwargs: responses.pop(0))
+
+    start = time.monotonic()
+    assert processor._call_groq('Categorize this post') == 'Cricket'
+    assert time.monotonic() - start >= 0.05
+
+    stats = limiter.stats()
+    assert stats['rate_limited'] == 1
+    assert stats['retries'] == 1
+    assert stats['successes'] == 1
+
+
+def test_rate_limited_trial_call_closes_the_breaker(monkeypatch):
+    processor = AIProcessor()
+    processor.groq_api_key = 'test-key'
+    monkeypatch.setattr('ai_processor.Config.LLM_CACHE_ENABLED', False)
+    monkeypatch.setattr('ai_processor.Config.LLM_MAX_ATTEMPTS', 1)
+    limiter = ProviderLimiter('groq', failure_threshold=1, reset_timeout=0)
+    monkeypatch.setitem(ai_processor.provider_limiters, 'groq', limiter)
+    limiter.breaker.record_failure()
+    monkeypatch.setattr(processor.session, 'post', lambda url, **kwargs: FakeHTTPResponse(429))
+
+    assert processor._call_groq('Categorize this post') is None
+    assert limiter.stats()['rate_limited'] == 1
+    assert limiter.stats()['circuit'] == 'closed'
+    assert limiter.breaker.allow()
+
+
+def test_unexpected_errors_release_reserved_tokens(monkeypatch):
+    processor = AIProcessor()
+    processor.groq_api_key = 'test-key'
+    monkeypatch.setattr('ai_processor.Config.LLM_CACHE_ENABLED', False)
+    limiter = ProviderLimiter('groq', tokens_per_minute=1000)
+    monkeypatch.setitem(ai_processor.provider_limiters, 'groq', limiter)
+    monkeypatch.setattr(processor.session, 'post', lambda url, **kwargs: FakeHTTPResponse(200, body=None))
+    monkeypatch.setattr(FakeHTTPResponse, 'json', lambda self: (_ for _ in ()).throw(ValueError('not JSON')))
+
+    assert processor._call_groq('Categorize this post') is None
+    assert limiter.stats()['failures'] == 1
+    assert limiter.tokens.try_acquire(1000) == 0
+
+
+def test_call_gemini_short_circuits_while_provider_is_down(monkeypatch):
+    processor = AIProcessor()
+    processor.gemini_api_key = 'test-key'
+    monkeypatch.setattr('ai_processor.Config.LLM_CACHE_ENABLED', False)
+    monkeypatch.setattr('ai_processor.Config.LLM_MAX_ATTEMPTS', 2)
+    monkeypatch.setattr('ai_processor.Config.LLM_RETRY_BASE_DELAY', 0)
+    limiter = ProviderLimiter('gemini', failure_threshold=2, reset_timeout=60)
+    monkeypatch.setitem(ai_processor.provider_limiters, 'gemini', limiter)
+    posts = []
+
+    def fake_post(url, **kwargs):
+        posts.append(url)
+        return FakeHTTPResponse(503)
+
+    monkeypatch.setattr(processor.session, 'post', fake_post)
+
+    assert processor._call_gemini([{'text': 'Summarize'}]) is None
+    assert processor._call_gemini([{'text': 'Summarize again'}]) is None
+    assert len(posts) == 2
+    assert limiter.stats()['circuit'] == 'open'
+    assert limiter.stats()['short_circuited'] == 1
+
+
+def test_deferred_video_save_skips_media_analysis(monkeypatch):
+    processor = AIProcessor()
+    processor.gemini_api_key = 'test-key'
+    monkeypatch.setattr(processor, 'categorize_content_with_source', lambda *args: ('Cricket', 'ai'))
+    monkeypatch.setattr(processor, 'extract_tags', lambda *args: 'cricket')
+    monkeypatch.setattr(processor, '_call_groq', lambda prompt: 'A last-ball finish decides the final.')
+
+    def no_video(*args, **kwargs):
+        raise AssertionError('video analysis should be deferred')
+
+    monkeypatch.setattr(processor, 'generate_video_summary', no_video)
+    monkeypatch.setattr(processor, '_summarize_uploaded_media', no_video)
+
+    result = processor.process_content(
+        'https://www.instagram.com/reel/abc/', 'Final over', 'What a finish', 'instagram',
+        media_url='https://cdn.example.com/reel.mp4', media_type='reel', defer_video=True
+    )
+
+    assert result['video_summary_status'] == 'video_analysis_pending'
+    assert result['summary'] == 'A last-ball finish decides the final.'
+    assert result['category'] == 'Cricket'
+
+
+def test_analyze_video_keeps_only_video_based_summaries(monkeypatch):
+    processor = AIProcessor()
+    processor.gemini_api_key = 'test-key'
+    monkeypatch.setattr(processor, 'summarize_content', lambda **kwargs: ('Title only', 'metadata_no_video'))
+    monkeypatch.setattr(processor, 'generate_video_summary', lambda **kwargs: ('A long video summary.', 'available'))
+
+    result = processor.analyze_video('https://www.youtube.com/watch?v=abc', 'Final over', '', 'youtube')
+
+    assert result == {
+        'summary': '', 'summary_source': '',
+        'video_summary': 'A long video summary.', 'video_summary_status': 'available'
+    }
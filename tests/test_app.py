@@ -1,4 +1,10 @@
+import json
+import threading
+
+import pytest
+
 import app as app_module
+from semantic_index import HashingEmbedder, SemanticIndex
 
 
 def test_whatsapp_webhook_acknowledges_url_immediately(monkeypatch):
@@ -29,3 +35,323 @@ def test_whatsapp_webhook_acknowledges_url_immediately(monkeypatch):
     assert captured['url'] == 'https://www.instagram.com/reel/demo123/'
     assert captured['from_phone'] == 'whatsapp:+911234567890'
     assert captured['base_url'].startswith('http://localhost')
+
+
+def test_api_content_rejects_malformed_cursor():
+    client = app_module.app.test_client()
+
+    response = client.get('/api/content?cursor=garbage')
+
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_bulk_save_inserts_placeholders_and_queues_enrichment(temp_db, monkeypatch):
+    queued = []
+    monkeypatch.setattr(app_module.Config, 'BULK_ENRICH_BATCH_SIZE', 2)
+    monkeypatch.setattr(
+        app_module.enrich_queue,
+        'enqueue_many',
+        lambda kind, payloads: queued.extend((kind, payload) for payload in payloads) or list(range(len(payloads)))
+    )
+    existing_id = temp_db.save_content(url='https://example.com/already', platform='blog')
+
+    client = app_module.app.test_client()
+    response = client.post('/api/content/bulk', json={'urls': [
+        'https://example.com/a',
+        'https://youtu.be/abc',
+        'https://www.youtube.com/watch?v=abc',
+        'https://example.com/already/?utm_source=x',
+        'not a url',
+        'https://example.com/b',
+    ]})
+
+    body = response.get_json()
+    assert response.status_code == 202
+    assert [item['url'] for item in body['created']] == [
+        'https://example.com/a', 'https://youtu.be/abc', 'https://example.com/b'
+    ]
+    assert [item['id'] for item in body['duplicates']] == [body['created'][1]['id'], existing_id]
+    assert body['invalid'] == ['not a url']
+    created_ids = [item['id'] for item in body['created']]
+    assert queued == [
+        ('enrich_content', {'content_ids': created_ids[:2]}),
+        ('enrich_content', {'content_ids': created_ids[2:]}),
+    ]
+    assert temp_db.get_content_by_id(created_ids[0])['summary_source'] == 'pending'
+
+
+def test_semantic_backfill_job_embeds_rows_that_skipped_the_hook(temp_db, monkeypatch):
+    index = SemanticIndex(HashingEmbedder(128))
+    monkeypatch.setattr(app_module, 'semantic_index', index)
+    temp_db.save_contents_many([{'url': 'https://example.com/imported', 'platform': 'blog', 'title': 'Imported save'}])
+
+    assert app_module.run_semantic_backfill_job({}, {}) == {'embedded': 1}
+    assert app_module.run_semantic_backfill_job({}, {}) == {'embedded': 0}
+
+
+def test_enrich_content_job_fills_in_placeholders(temp_db, monkeypatch):
+    ids = [content_id for content_id, _ in temp_db.save_contents_many([
+        {'url': 'https://example.com/a', 'platform': 'blog', 'title': 'https://example.com/a', 'summary_source': 'pending'},
+        {'url': 'https://example.com/b', 'platform': 'blog', 'title': 'https://example.com/b', 'summary_source': 'pending'},
+    ])]
+
+    monkeypatch.setattr(app_module, 'extract_many', lambda urls: [
+        {'success': True, 'platform': 'substack', 'title': 'Sourdough basics', 'caption': 'Starter tips'},
+        {'success': False, 'error': 'Failed to fetch webpage'},
+    ])
+    monkeypatch.setattr(app_module.ai_processor, 'is_configured', lambda: False)
+
+    result = app_module.run_enrich_content_job({'content_ids': ids}, {})
+
+    assert result == {'enriched': 1, 'failed': 1}
+    assert temp_db.get_content_by_id(ids[0])['title'] == 'Sourdough basics'
+    assert temp_db.get_content_by_id(ids[0])['platform'] == 'substack'
+    assert temp_db.get_content_by_id(ids[1])['media_extraction_status'] == 'extraction_failed'
+    assert app_module.run_enrich_content_job({'content_ids': ids}, {}) == {'enriched': 0, 'failed': 0}
+
+
+def test_enrich_content_job_recanonicalizes_resolved_short_links(temp_db, monkeypatch):
+    original_id = temp_db.save_content(url='https://example.com/target', platform='blog', title='Target')
+    ids = [content_id for content_id, _ in temp_db.save_contents_many([
+        {'url': 'https://t.co/abc', 'platform': 'twitter', 'title': 'https://t.co/abc', 'summary_source': 'pending'},
+        {'url': 'https://t.co/new', 'platform': 'twitter', 'title': 'https://t.co/new', 'summary_source': 'pending'},
+    ])]
+
+    targets = {'https://t.co/abc': 'https://example.com/target', 'https://t.co/new': 'https://example.com/fresh'}
+    monkeypatch.setattr(app_module, 'resolve_short_link', lambda url, network=True: targets[url])
+    monkeypatch.setattr(app_module, 'extract_many', lambda urls: [{'success': True, 'title': url} for url in urls])
+    monkeypatch.setattr(app_module.ai_processor, 'is_configured', lambda: False)
+
+    assert app_module.run_enrich_content_job({'content_ids': ids}, {}) == {'enriched': 2, 'failed': 0}
+
+    assert temp_db.get_content_by_id(ids[0])['canonical_url'] == f'duplicate-of:{original_id}:{ids[0]}'
+    assert temp_db.check_duplicate('https://example.com/target')['id'] == original_id
+    assert temp_db.check_duplicate('https://example.com/fresh')['id'] == ids[1]
+
+
+def test_export_csv_streams_filtered_rows(temp_db):
+    temp_db.save_content(url='https://example.com/a', platform='blog', title='Bread, butter', category='Recipes & Cooking',
+                         user_phone='whatsapp:+911234567890')
+    temp_db.save_content(url='https://example.com/b', platform='youtube', title='Cricket highlights', category='Cricket')
+
+    client = app_module.app.test_client()
+    response = client.get('/export/csv?platform=blog')
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    lines = response.get_data(as_text=True).strip().splitlines()
+    assert lines[0] == ('id,url,platform,title,caption,image_url,media_extraction_status,media_extraction_error,'
+                        'category,summary,summary_source,video_summary,video_summary_status,tags,timestamp')
+    assert len(lines) == 2
+    assert '"Bread, butter"' in lines[1]
+    assert '+911234567890' not in lines[1]
+
+    with_phone = client.get('/export/csv?platform=blog&include_phone=true').get_data(as_text=True).splitlines()
+    assert with_phone[0].endswith(',timestamp,user_phone')
+    assert with_phone[1].endswith(',whatsapp:+911234567890')
+
+    assert client.get('/export/csv?date_from=yesterday').status_code == 400
+
+
+def test_export_ndjson_and_import_route(temp_db, monkeypatch):
+    temp_db.save_content(url='https://example.com/a', platform='blog', title='Bread', category='Recipes & Cooking')
+
+    client = app_module.app.test_client()
+    response = client.get('/export/ndjson?platform=blog')
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    body = response.get_data(as_text=True)
+    assert json.loads(body.strip())['title'] == 'Bread'
+    assert 'user_phone' not in json.loads(body.strip())
+
+    new_row = json.dumps({'url': 'https://example.com/b', 'title': 'Butter'})
+    response = client.post('/import', data=body + new_row + '\n', content_type='application/x-ndjson')
+    assert response.get_json() == {'success': True, 'created': 1, 'skipped': 1, 'invalid': 0}
+
+    assert client.post('/import?format=xml', data='').status_code == 400
+
+    monkeypatch.setattr(app_module, 'parquet_available', lambda: False)
+    assert client.get('/export/parquet').status_code == 501
+
+
+def test_whatsapp_webhook_ignores_repeated_message_sid(temp_db, monkeypatch):
+    started = []
+    monkeypatch.setattr(app_module, 'start_whatsapp_url_processing', lambda *args: started.append(args))
+
+    client = app_module.app.test_client()
+    data = {'Body': 'https://example.com/post', 'From': 'whatsapp:+911234567890', 'MessageSid': 'SM123'}
+    first = client.post('/whatsapp/webhook', data=data)
+    retry = client.post('/whatsapp/webhook', data=data)
+
+    assert 'Processing your URL now' in first.get_data(as_text=True)
+    assert 'Processing' not in retry.get_data(as_text=True)
+    assert len(started) == 1
+
+
+def test_concurrent_deliveries_of_one_message_sid_are_processed_once(temp_db, monkeypatch):
+    started = []
+    processing = threading.Event()
+    finish = threading.Event()
+
+    def slow_start(*args):
+        started.append(args)
+        processing.set()
+        finish.wait(5)
+
+    monkeypatch.setattr(app_module, 'start_whatsapp_url_processing', slow_start)
+    data = {'Body': 'https://example.com/post', 'From': 'whatsapp:+911234567890', 'MessageSid': 'SM789'}
+    replies = []
+    first = threading.Thread(target=lambda: replies.append(app_module.app.test_client().post('/whatsapp/webhook', data=data)))
+    first.start()
+    try:
+        assert processing.wait(5)
+        retry = app_module.app.test_client().post('/whatsapp/webhook', data=data)  # arrives while the first is in flight
+    finally:
+        finish.set()
+        first.join(5)
+
+    assert len(started) == 1
+    assert 'Processing' not in retry.get_data(as_text=True)
+    assert 'Processing your URL now' in replies[0].get_data(as_text=True)
+
+
+def test_message_sid_claim_is_released_when_handling_fails(temp_db, monkeypatch):
+    started = []
+
+    def crash_then_start(*args):
+        if not started:
+            started.append('crashed')
+            raise RuntimeError('database is locked')
+        started.append(args)
+
+    monkeypatch.setattr(app_module, 'start_whatsapp_url_processing', crash_then_start)
+    app_module.app.config['PROPAGATE_EXCEPTIONS'] = False
+    try:
+        client = app_module.app.test_client()
+        data = {'Body': 'https://example.com/post', 'From': 'whatsapp:+911234567890', 'MessageSid': 'SM456'}
+        assert client.post('/whatsapp/webhook', data=data).status_code == 500
+        retry = client.post('/whatsapp/webhook', data=data)
+    finally:
+        app_module.app.config['PROPAGATE_EXCEPTIONS'] = None
+
+    assert 'Processing your URL now' in retry.get_data(as_text=True)
+    assert len(started) == 2
+    assert temp_db.is_message_sid_handled('SM456')
+
+
+def test_concurrent_sends_of_same_link_share_one_job(temp_db, monkeypatch):
+    app_module.job_queue.stop()  # workers started by earlier webhook requests would claim the job
+    monkeypatch.setattr(app_module.job_queue, 'start', lambda: None)
+    sent = []
+    monkeypatch.setattr(app_module, 'send_whatsapp_message', lambda phone, body: sent.append(phone))
+
+    first = app_module.start_whatsapp_url_processing('https://example.com/post', 'whatsapp:+91111', 'http://host')
+    second = app_module.start_whatsapp_url_processing('https://example.com/post/?utm_source=wa', 'whatsapp:+91222', 'http://host')
+    again = app_module.start_whatsapp_url_processing('https://example.com/post', 'whatsapp:+91111', 'http://host')
+
+    assert first == second == again
+    job = temp_db.claim_next_job(['whatsapp_url'])
+    assert job['payload']['notify'] == ['whatsapp:+91222']
+    assert temp_db.claim_next_job(['whatsapp_url']) is None
+
+    monkeypatch.setattr(app_module, 'check_duplicate', lambda url: {
+        'id': 7, 'timestamp': '2026-01-01', 'title': 'Post', 'category': 'Other', 'summary': ''
+    })
+    app_module.run_whatsapp_url_job(job['payload'], job)
+    assert sent == ['whatsapp:+91111', 'whatsapp:+91222']
+
+    # The job has replied but is not marked done yet: a late sender must not join it
+    late = app_module.start_whatsapp_url_processing('https://example.com/post', 'whatsapp:+91333', 'http://host')
+    assert late != first
+    assert temp_db.get_job(first)['payload']['notify'] == ['whatsapp:+91222']
+
+    temp_db.complete_job(job['id'])
+    assert app_module.start_whatsapp_url_processing('https://example.com/post', 'whatsapp:+91222', 'http://host') != first
+
+
+def test_api_save_answers_202_and_keeps_each_users_save(temp_db, monkeypatch):
+    app_module.job_queue.stop()
+    monkeypatch.setattr(app_module.job_queue, 'start', lambda: None)
+    monkeypatch.setattr(app_module.Config, 'JOB_SYNC_WAIT_SECONDS', 0)
+    client = app_module.app.test_client()
+
+    first = client.post('/api/content', json={'url': 'https://example.com/post', 'user_phone': '+91111'})
+    again = client.post('/api/content', json={'url': 'https://example.com/post/', 'user_phone': '+91111'})
+    other = client.post('/api/content', json={'url': 'https://example.com/post', 'user_phone': '+91222'})
+
+    assert first.status_code == 202
+    job_id = first.get_json()['job_id']
+    assert first.get_json()['status_url'] == f'/api/jobs/{job_id}'
+    assert again.get_json()['job_id'] == job_id
+    assert other.get_json()['job_id'] != job_id
+    assert temp_db.get_job(other.get_json()['job_id'])['payload']['user_phone'] == '+91222'
+
+
+def test_borderline_near_duplicate_is_saved_and_flagged(temp_db, monkeypatch):
+    original = temp_db.save_content(url='https://example.com/a', platform='blog', title='Sourdough basics')
+    monkeypatch.setattr(app_module, 'find_near_duplicate', lambda *args, **kwargs: {'id': original, 'borderline': True})
+    monkeypatch.setattr(app_module, 'extract_content', lambda url: {'success': True, 'platform': 'blog', 'title': 'Sourdough 101'})
+    monkeypatch.setattr(app_module.ai_processor, 'is_configured', lambda: False)
+
+    result = app_module.run_save_url_job({'url': 'https://example.com/b', 'user_phone': None}, {})
+
+    assert result['content_id'] != original
+    assert result['possible_duplicate_of'] == original
+    assert temp_db.get_content_by_id(result['content_id'])['tags'] == f'duplicate-of:{original}'
+
+
+def test_video_save_replies_first_and_analyzes_video_later(temp_db, monkeypatch):
+    app_module.video_queue.stop()
+    monkeypatch.setattr(app_module.video_queue, 'start', lambda: None)
+    monkeypatch.setattr(app_module, 'find_near_duplicate', lambda *args, **kwargs: None)
+    monkeypatch.setattr(app_module, 'extract_content', lambda url: {
+        'success': True, 'platform': 'instagram', 'title': 'Final over', 'caption': 'What a finish',
+        'media_url': 'https://cdn.example.com/reel.mp4', 'media_type': 'reel'
+    })
+    monkeypatch.setattr(app_module.ai_processor, 'is_configured', lambda: True)
+    monkeypatch.setattr(app_module, 'process_content', lambda *args, **kwargs: {
+        'category': 'Cricket', 'summary': 'Quick summary', 'summary_source': 'metadata',
+        'video_summary': '', 'video_summary_status': 'video_analysis_pending', 'tags': 'cricket'
+    })
+    sent = []
+    monkeypatch.setattr(app_module, 'send_whatsapp_message', lambda phone, body: sent.append((phone, body)))
+
+    app_module.process_whatsapp_url('https://www.instagram.com/reel/abc/', 'whatsapp:+91111', 'http://host')
+
+    content = temp_db.search_content('Final over')[0]
+    assert content['video_summary_status'] == 'video_analysis_pending'
+    assert "I'll send it when it's ready" in sent[0][1]
+
+    job = temp_db.claim_next_job(['video_analysis'])
+    assert job['payload']['notify'] == ['whatsapp:+91111']
+    monkeypatch.setattr(app_module.ai_processor, 'analyze_video', lambda **kwargs: {
+        'summary': 'Video-based summary', 'summary_source': 'video',
+        'video_summary': 'The batter hits a six off the last ball.', 'video_summary_status': 'available'
+    })
+    app_module.run_video_analysis_job(job['payload'], job)
+
+    content = temp_db.get_content_by_id(content['id'])
+    assert content['video_summary_status'] == 'available'
+    assert content['summary'] == 'Video-based summary'
+    assert content['category'] == 'Cricket'
+    assert sent[1][0] == 'whatsapp:+91111'
+    assert 'The batter hits a six' in sent[1][1]
+    assert app_module.run_video_analysis_job(job['payload'], job) == {'skipped': True}
+
+
+def test_failed_video_analysis_is_retried_then_marked_failed(temp_db, monkeypatch):
+    content_id = temp_db.save_content(url='https://example.com/v', platform='tiktok', title='Clip',
+                                      video_summary_status='video_analysis_pending')
+
+    def fail(**kwargs):
+        raise RuntimeError('Gemini down')
+
+    monkeypatch.setattr(app_module.ai_processor, 'analyze_video', fail)
+    payload = {'content_id': content_id, 'media_url': '', 'media_type': 'video', 'notify': []}
+
+    with pytest.raises(RuntimeError):
+        app_module.run_video_analysis_job(payload, {'attempts': 1, 'max_attempts': 3})
+    app_module.run_video_analysis_job(payload, {'attempts': 3, 'max_attempts': 3})
+    assert temp_db.get_content_by_id(content_id)['video_summary_status'] == 'video_analysis_failed'
@@ -0,0 +1,56 @@
+import time
+
+from cache import SQLiteCache, get_cache, make_key
+
+
+def test_cache_round_trip_and_counters(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), 'test', max_entries=10, default_ttl=60)
+
+    assert cache.get('missing') is None
+    cache.set('key', {'summary': 'Three debugging tips.'})
+
+    assert cache.get('key') == {'summary': 'Three debugging tips.'}
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['entries'] == 1
+    cache.close()
+
+
+def test_cache_expires_entries(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), 'test', max_entries=10, default_ttl=60)
+
+    cache.set('short', 'value', ttl=0.01)
+    time.sleep(0.02)
+
+    assert cache.get('short') is None
+    assert cache.stats()['entries'] == 0
+    cache.close()
+
+
+def test_cache_evicts_least_recently_read(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), 'test', max_entries=2, default_ttl=60)
+
+    cache.set('a', 1)
+    time.sleep(0.01)
+    cache.set('b', 2)
+    time.sleep(0.01)
+    cache.get('a')
+    time.sleep(0.01)
+    cache.set('c', 3)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    cache.close()
+
+
+def test_namespaces_share_a_file_without_colliding(temp_cache):
+    llm = get_cache('llm', 10, 60)
+    http = get_cache('http', 10, 60)
+    key = make_key('groq', 'model', 'prompt', '')
+
+    llm.set(key, 'answer')
+
+    assert http.get(key) is None
+    assert llm.get(key) == 'answer'
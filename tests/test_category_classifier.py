@@ -0,0 +1,113 @@
+import category_classifier
+from ai_processor import AIProcessor
+from config import Config
+
+TOPICS = {
+    'Recipes & Cooking': ['easy pasta recipe', 'garlic butter chicken dinner', 'homemade curry recipe with rice'],
+    'Fitness & Workouts': ['full body workout routine', 'leg day squats workout', 'home workout without equipment'],
+    'Programming & Coding': ['python debugging tips', 'javascript async await explained', 'python list comprehension tricks'],
+}
+
+
+def make_rows(per_topic=40):
+    rows = []
+    for category, titles in TOPICS.items():
+        for i in range(per_topic):
+            rows.append({
+                'id': len(rows) + 1,
+                'url': f'https://example.com/{len(rows) + 1}',
+                'title': titles[i % len(titles)],
+                'caption': f'part {i}',
+                'category': category,
+            })
+    return rows
+
+
+def use_model_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, 'CATEGORY_MODEL_PATH', str(tmp_path / 'category_model.json'))
+    monkeypatch.setattr(Config, 'CATEGORY_CLASSIFIER_MIN_ROWS', 50)
+    monkeypatch.setattr(category_classifier, '_model', None)
+    monkeypatch.setattr(category_classifier, '_model_mtime', None)
+
+
+def test_confident_category_answers_familiar_content(monkeypatch, tmp_path):
+    use_model_file(monkeypatch, tmp_path)
+    category_classifier.train(make_rows())
+
+    assert category_classifier.confident_category('https://x.com/a', 'Quick python debugging tips', '') == 'Programming & Coding'
+    assert category_classifier.confident_category('https://x.com/b', 'Garlic butter chicken recipe', '') == 'Recipes & Cooking'
+    assert category_classifier.confident_category('https://x.com/c', 'Sunset over the mountains', '') is None
+
+
+def test_confident_category_needs_enough_training_rows(monkeypatch, tmp_path):
+    use_model_file(monkeypatch, tmp_path)
+    category_classifier.train(make_rows(per_topic=10))
+
+    assert category_classifier.confident_category('https://x.com/a', 'Quick python debugging tips', '') is None
+
+
+def test_model_is_reloaded_from_disk(monkeypatch, tmp_path):
+    use_model_file(monkeypatch, tmp_path)
+    category_classifier.train(make_rows())
+    monkeypatch.setattr(category_classifier, '_model', None)
+
+    category, confidence = category_classifier.predict('https://x.com/a', 'leg day squats', '')
+    assert category == 'Fitness & Workouts'
+    assert confidence > 0.9
+
+
+def test_train_reads_categorized_rows_from_database(temp_db, monkeypatch, tmp_path):
+    use_model_file(monkeypatch, tmp_path)
+    temp_db.save_content(url='https://example.com/1', platform='blog', title='Pasta recipe',
+                         category='Recipes & Cooking', category_source='ai')
+    temp_db.save_content(url='https://example.com/2', platform='blog', title='Random post', category='Other')
+    temp_db.save_content(url='https://example.com/3', platform='blog', title='Squats',
+                         category='Not A Category', category_source='ai')
+    temp_db.save_content(url='https://example.com/4', platform='blog', title='Leg day',
+                         category='Fitness & Workouts', category_source='local')
+    edited = temp_db.save_content(url='https://example.com/5', platform='blog', title='Python tricks',
+                                  category='Fitness & Workouts', category_source='local')
+    temp_db.update_content(edited, category='Programming & Coding', category_source='user')
+
+    model = category_classifier.train()
+    assert model.trained_rows == 2
+    assert sorted(model.class_docs) == ['Programming & Coding', 'Recipes & Cooking']
+
+
+def test_categorize_content_reports_where_the_category_came_from(monkeypatch, tmp_path):
+    use_model_file(monkeypatch, tmp_path)
+    category_classifier.train(make_rows())
+    processor = AIProcessor()
+    monkeypatch.setattr(processor, '_call_groq', lambda prompt: 'Travel Destinations')
+
+    assert processor.categorize_content_with_source('https://x.com/a', 'Leg day squats workout', '') == ('Fitness & Workouts', 'local')
+    assert processor.categorize_content_with_source('https://x.com/b', 'Sunset over the mountains', '') == ('Travel Destinations', 'ai')
+
+    monkeypatch.setattr(processor, '_call_groq', lambda prompt: None)
+    assert processor.categorize_content_with_source('https://x.com/c', 'Sunset over the mountains', '') == ('Other', '')
+
+
+def test_categorize_content_skips_groq_when_confident(monkeypatch, tmp_path):
+    use_model_file(monkeypatch, tmp_path)
+    category_classifier.train(make_rows())
+    processor = AIProcessor()
+
+    def fail(prompt):
+        raise AssertionError('Groq should not be called')
+
+    monkeypatch.setattr(processor, '_call_groq', fail)
+    assert processor.categorize_content('https://x.com/a', 'Home workout without equipment', '') == 'Fitness & Workouts'
+
+    monkeypatch.setattr(processor, '_call_groq', lambda prompt: 'Travel Destinations')
+    assert processor.categorize_content('https://x.com/b', 'Sunset over the mountains', '') == 'Travel Destinations'
+
+
+def test_report_scores_held_out_rows(monkeypatch):
+    monkeypatch.setattr(Config, 'CATEGORY_CLASSIFIER_MIN_CONFIDENCE', 0.9)
+    result = category_classifier.report(make_rows())
+
+    assert result['test_rows'] == 24
+    assert result['train_rows'] == 96
+    assert result['accuracy'] == 1.0
+    assert 0 < result['coverage'] <= 1.0
+    assert result['latency_ms_p50'] is not None
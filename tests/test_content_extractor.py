@@ -1,4 +1,7 @@
 import os
+import subprocess
+import sys
+import time
 
 import pytest
 from bs4 import BeautifulSoup
@@ -81,7 +84,7 @@ def test_ytdlp_reports_missing_cookies_file(monkeypatch):
     extractor = ContentExtractor()
     monkeypatch.setattr(extractor_module.Config, 'YTDLP_ENABLED', True)
     monkeypatch.setattr(extractor_module.Config, 'YTDLP_COOKIES_FILE', 'missing-cookies.txt')
-    monkeypatch.setattr(extractor_module, 'YoutubeDL', object())
+    monkeypatch.setattr(extractor_module.ytdlp_runner, 'YoutubeDL', object())
 
     result = extractor._extract_with_ytdlp('https://www.instagram.com/reel/demo123/')
 
@@ -115,9 +118,313 @@ def test_ytdlp_classifies_common_failure_modes(monkeypatch, error_message, expec
 
     monkeypatch.setattr(extractor_module.Config, 'YTDLP_ENABLED', True)
     monkeypatch.setattr(extractor_module.Config, 'YTDLP_COOKIES_FILE', '')
-    monkeypatch.setattr(extractor_module, 'YoutubeDL', RaisingYDL)
+    monkeypatch.setattr(extractor_module.Config, 'YTDLP_PROCESS_WORKERS', 0)
+    monkeypatch.setattr(extractor_module.ytdlp_runner, 'YoutubeDL', RaisingYDL)
 
     result = extractor._extract_with_ytdlp('https://www.instagram.com/reel/demo123/')
 
     assert result['media_extraction_status'] == expected_status
     assert result['media_extraction_error']
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+        self.chunks_read = 0
+        self.closed = False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise extractor_module.requests.exceptions.HTTPError(str(self.status_code))
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            self.chunks_read += 1
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+def test_fetch_serves_fresh_pages_from_cache(monkeypatch):
+    extractor = ContentExtractor()
+    calls = []
+
+    def fake_get(url, headers=None, **kwargs):
+        calls.append(url)
+        return FakeResponse(content=b'<html>post</html>', headers={'Cache-Control': 'max-age=600'})
+
+    monkeypatch.setattr(extractor.session, 'get', fake_get)
+
+    assert extractor._fetch('https://example.com/post?utm_source=share') == b'<html>post</html>'
+    assert extractor._fetch('https://www.example.com/post/') == b'<html>post</html>'
+    assert calls == ['https://example.com/post?utm_source=share']
+
+
+def test_fetch_revalidates_stale_pages_with_etag(monkeypatch):
+    extractor = ContentExtractor()
+    sent_headers = []
+    responses = [
+        FakeResponse(content=b'<html>v1</html>', headers={'Cache-Control': 'no-cache', 'ETag': '"v1"'}),
+        FakeResponse(status_code=304, headers={'ETag': '"v1"'}),
+    ]
+
+    def fake_get(url, headers=None, **kwargs):
+        sent_headers.append(headers)
+        return responses.pop(0)
+
+    monkeypatch.setattr(extractor.session, 'get', fake_get)
+
+    assert extractor._fetch('https://example.com/article') == b'<html>v1</html>'
+    assert extractor._fetch('https://example.com/article') == b'<html>v1</html>'
+    assert sent_headers == [{}, {'If-None-Match': '"v1"'}]
+
+
+def test_fetch_meta_decodes_with_response_charset_on_hits_and_misses(monkeypatch):
+    extractor = ContentExtractor()
+    page = '<head><meta property="og:title" content="東京の夜"></head>'.encode('shift_jis')
+    calls = []
+
+    def fake_get(url, headers=None, **kwargs):
+        calls.append(url)
+        return FakeResponse(content=page, headers={'Content-Type': 'text/html; charset=Shift_JIS', 'Cache-Control': 'max-age=600'})
+
+    monkeypatch.setattr(extractor.session, 'get', fake_get)
+    monkeypatch.setattr(extractor_module.Config, 'HTTP_HEAD_ONLY', False)
+
+    assert extractor._fetch_meta('https://example.jp/night')['meta']['og:title'] == '東京の夜'
+    assert extractor._fetch_meta('https://example.jp/night')['meta']['og:title'] == '東京の夜'
+    assert len(calls) == 1
+
+
+def test_platform_ttl_override_beats_response_headers(monkeypatch):
+    extractor = ContentExtractor()
+    calls = []
+
+    def fake_get(url, headers=None, **kwargs):
+        calls.append(url)
+        return FakeResponse(content=b'<html>reel</html>', headers={'Cache-Control': 'no-cache'})
+
+    monkeypatch.setattr(extractor.session, 'get', fake_get)
+    monkeypatch.setattr(extractor_module.Config, 'HTTP_CACHE_PLATFORM_TTLS', {'instagram': 3600})
+
+    extractor._fetch('https://www.instagram.com/reel/demo123/')
+    extractor._fetch('https://www.instagram.com/reel/demo123/')
+
+    assert len(calls) == 1
+
+
+def test_head_only_fetch_stops_at_end_of_head(monkeypatch):
+    extractor = ContentExtractor()
+    page = (
+        b'<html><head><title>Pin</title>'
+        b'<meta property="og:title" content="Sourdough starter guide" />'
+        b'</HEAD><body>' + b'<p>filler</p>' * 20000 + b'</body></html>'
+    )
+    response = FakeResponse(content=page)
+    streamed = []
+
+    def fake_get(url, headers=None, **kwargs):
+        streamed.append(kwargs.get('stream'))
+        return response
+
+    monkeypatch.setattr(extractor.session, 'get', fake_get)
+
+    result = extractor._extract_pinterest('https://www.pinterest.com/pin/123/')
+
+    assert result['title'] == 'Sourdough starter guide'
+    assert streamed == [True]
+    assert response.chunks_read == 1
+    assert response.closed is True
+
+
+def test_youtube_extractor_reads_meta_from_fixture(monkeypatch):
+    extractor = ContentExtractor()
+    fixture = os.path.join(os.path.dirname(__file__), 'fixtures', 'html', 'youtube_watch.html')
+    with open(fixture, 'rb') as handle:
+        page = handle.read()
+
+    monkeypatch.setattr(extractor.session, 'get', lambda url, headers=None, **kwargs: FakeResponse(content=page))
+
+    result = extractor._extract_youtube('https://www.youtube.com/watch?v=abc123XYZ00')
+
+    assert result['title'] == 'Three Python Debugging Mistakes'
+    assert result['caption'] == 'Stop making these three debugging mistakes in Python.'
+    assert result['image_url'] == 'https://img.youtube.com/vi/abc123XYZ00/maxresdefault.jpg'
+
+
+def test_ytdlp_results_are_cached_with_separate_media_ttl(monkeypatch):
+    extractor = ContentExtractor()
+    runs = []
+
+    class FakeYDL:
+        def __init__(self, options):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc, tb):
+            return False
+
+        def extract_info(self, url, download=False):
+            runs.append(url)
+            return {
+                'title': 'Debugging reel',
+                'description': 'Three Python debugging mistakes',
+                'thumbnail': 'https://cdn.example.com/thumb.jpg',
+                'uploader': 'creator',
+                'formats': [
+                    {'url': 'https://cdn.example.com/360.mp4?sig=a', 'vcodec': 'avc1', 'height': 360},
+                    {'url': 'https://cdn.example.com/720.mp4?sig=b', 'vcodec': 'avc1', 'height': 720},
+                    {'url': 'https://cdn.example.com/audio.m4a', 'vcodec': 'none'},
+                ],
+            }
+
+    monkeypatch.setattr(extractor_module.Config, 'YTDLP_ENABLED', True)
+    monkeypatch.setattr(extractor_module.Config, 'YTDLP_COOKIES_FILE', '')
+    monkeypatch.setattr(extractor_module.Config, 'YTDLP_PROCESS_WORKERS', 0)
+    monkeypatch.setattr(extractor_module.ytdlp_runner, 'YoutubeDL', FakeYDL)
+
+    first = extractor._extract_with_ytdlp('https://www.instagram.com/reel/demo123/?igsh=abc')
+    second = extractor._extract_with_ytdlp('https://instagram.com/reel/demo123/')
+
+    assert runs == ['https://www.instagram.com/reel/demo123/?igsh=abc']
+    assert first == second
+    assert second['media_url'] == 'https://cdn.example.com/720.mp4?sig=b'
+    assert second['title'] == 'Debugging reel'
+
+    # Once the signed media URL expires, yt-dlp runs again
+    now = time.time()
+    monkeypatch.setattr(extractor_module.time, 'time', lambda: now + 3600)
+    extractor._extract_with_ytdlp('https://instagram.com/reel/demo123/')
+    assert len(runs) == 2
+
+    # ...and if that refresh fails, the still-fresh cached metadata is returned
+    def rate_limited(self, url, download=False):
+        raise Exception('HTTP Error 429: Too Many Requests')
+
+    monkeypatch.setattr(FakeYDL, 'extract_info', rate_limited)
+    monkeypatch.setattr(extractor_module.time, 'time', lambda: now + 7200)
+    refreshed = extractor._extract_with_ytdlp('https://instagram.com/reel/demo123/')
+    assert refreshed['media_extraction_status'] == 'rate_limited'
+    assert refreshed['title'] == 'Debugging reel'
+    assert 'media_url' not in refreshed
+
+
+def test_ytdlp_timeout_retires_pool_without_failing_neighbours(monkeypatch):
+    terminated = []
+
+    class FakePool:
+        def __init__(self, processes, maxtasksperchild):
+            pass
+
+        def terminate(self):
+            terminated.append(self)
+
+    class FakeContext:
+        Pool = FakePool
+
+    monkeypatch.setattr(extractor_module, '_ytdlp_pool', None)
+    monkeypatch.setattr(extractor_module.multiprocessing, 'get_context', lambda method: FakeContext())
+
+    hung = extractor_module._checkout_ytdlp_pool()
+    neighbour = extractor_module._checkout_ytdlp_pool()
+    assert hung is neighbour
+
+    extractor_module._checkin_ytdlp_pool(hung, timed_out=True)
+    assert terminated == []  # the neighbour's extraction is still running
+    fresh = extractor_module._checkout_ytdlp_pool()
+    assert fresh is not hung
+
+    extractor_module._checkin_ytdlp_pool(neighbour)
+    assert terminated == [hung.pool]
+    extractor_module._checkin_ytdlp_pool(fresh)
+    assert terminated == [hung.pool]
+
+
+def test_extract_many_limits_per_host_and_keeps_order(monkeypatch):
+    extractor = ContentExtractor()
+    active = {}
+    peak = {}
+    starts = {}
+
+    def fake_extract(url):
+        host = 'instagram' if 'instagram' in url else 'blog'
+        active[host] = active.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), active[host])
+        starts.setdefault(host, []).append(time.monotonic())
+        time.sleep(0.02)
+        active[host] -= 1
+        if url.endswith('/broken'):
+            raise RuntimeError('boom')
+        return {'success': True, 'url': url}
+
+    monkeypatch.setattr(extractor, 'extract', fake_extract)
+    monkeypatch.setattr(extractor_module.Config, 'EXTRACT_HOST_CONCURRENCY', {'instagram.com': 1})
+    monkeypatch.setattr(extractor_module.Config, 'EXTRACT_HOST_DELAYS', {'instagram.com': 0.05})
+    monkeypatch.setattr(extractor_module.Config, 'EXTRACT_PER_HOST_CONCURRENCY', 4)
+    monkeypatch.setattr(extractor_module.Config, 'EXTRACT_POLITENESS_DELAY', 0)
+
+    urls = [f'https://www.instagram.com/reel/{i}/' for i in range(3)]
+    urls += [f'https://blog.example.com/post/{i}' for i in range(4)] + ['https://blog.example.com/broken']
+
+    results = extractor.extract_many(urls)
+
+    assert [result['url'] for result in results] == urls
+    assert results[-1]['success'] is False
+    assert peak['instagram'] == 1
+    assert peak['blog'] > 1
+    gaps = [later - earlier for earlier, later in zip(starts['instagram'], starts['instagram'][1:])]
+    assert min(gaps) >= 0.045
+
+
+def test_short_links_are_resolved_once_and_remembered(temp_db, monkeypatch):
+    extractor = ContentExtractor()
+    heads = []
+
+    class Redirected:
+        status_code = 200
+        url = 'https://www.pinterest.com/pin/123456/'
+
+    def fake_head(url, **kwargs):
+        heads.append(url)
+        return Redirected()
+
+    monkeypatch.setattr(extractor.session, 'head', fake_head)
+
+    assert extractor.resolve_short_link('https://pin.it/abc', network=False) == 'https://pin.it/abc'
+    assert extractor.resolve_short_link('https://pin.it/abc') == 'https://www.pinterest.com/pin/123456/'
+    assert extractor.resolve_short_link('https://pin.it/abc/', network=False) == 'https://www.pinterest.com/pin/123456/'
+    assert extractor.resolve_short_link('https://www.pinterest.com/pin/1/') == 'https://www.pinterest.com/pin/1/'
+    assert heads == ['https://pin.it/abc']
+
+
+def test_ytdlp_workers_do_not_import_config_or_database():
+    """Spawned yt-dlp workers import ytdlp_runner; it must not load .env or migrate the database."""
+    code = "import sys, ytdlp_runner; print(sorted({'config', 'database', 'content_extractor'} & set(sys.modules)))"
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == '[]'
+
+
+def test_reimporting_app_as_mp_main_has_no_side_effects(tmp_path):
+    """Spawned workers also re-run the parent's main script (app.py) as __mp_main__."""
+    code = (
+        "import runpy, threading; runpy.run_path('app.py', run_name='__mp_main__'); "
+        "print(threading.active_count())"
+    )
+    env = dict(os.environ, DATABASE_PATH=str(tmp_path / 'app.db'), CACHE_DB_PATH=str(tmp_path / 'cache.db'))
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, check=True, env=env
+    ).stdout
+
+    assert 'Database initialized' not in output
+    assert output.strip().splitlines()[-1] == '1'  # no job worker threads
+    assert not (tmp_path / 'app.db').exists()
@@ -0,0 +1,307 @@
+import sqlite3
+import threading
+
+import pytest
+
+
+def test_connections_are_reused_across_calls(temp_db):
+    first = temp_db.get_db_connection()
+    first.close()
+    second = temp_db.get_db_connection()
+    second.close()
+
+    assert first is second
+
+
+def test_pool_enables_wal_and_pragmas(temp_db):
+    conn = temp_db.get_db_connection()
+    journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    busy_timeout = conn.execute('PRAGMA busy_timeout').fetchone()[0]
+    conn.close()
+
+    assert journal_mode.lower() == 'wal'
+    assert busy_timeout == temp_db.Config.DB_BUSY_TIMEOUT_MS
+
+
+def test_released_connection_rolls_back_uncommitted_work(temp_db):
+    conn = temp_db.get_db_connection()
+    conn.execute("INSERT INTO saved_content (url, platform) VALUES ('https://example.com', 'blog')")
+    conn.close()
+
+    assert temp_db.get_all_content() == []
+
+
+def test_errors_inside_a_borrow_return_the_connection(temp_db, monkeypatch):
+    monkeypatch.setattr(temp_db.Config, 'DB_POOL_SIZE', 2)
+    monkeypatch.setattr(temp_db.Config, 'DB_POOL_TIMEOUT', 0.1)
+    temp_db.close_pool()
+
+    for _ in range(3):
+        with pytest.raises(sqlite3.Error):
+            temp_db.get_contents_by_ids([object()])  # unbindable parameter fails inside the query
+
+    assert temp_db.get_stats()['total'] == 0
+    assert temp_db.get_pool()._created <= 2
+
+
+def test_concurrent_writers_share_bounded_pool(temp_db):
+    errors = []
+
+    def writer(index):
+        try:
+            for offset in range(5):
+                temp_db.save_content(url=f'https://example.com/{index}/{offset}', platform='blog')
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert temp_db.get_stats()['total'] == 60
+    assert temp_db.get_pool()._created <= temp_db.Config.DB_POOL_SIZE
+
+
+def test_search_content_ranks_title_matches_first(temp_db):
+    temp_db.save_content(url='https://example.com/a', platform='blog', title='Weekly recipes', caption='python snake facts')
+    temp_db.save_content(url='https://example.com/b', platform='blog', title='Python decorators explained')
+
+    results = temp_db.search_content('python')
+
+    assert [item['url'] for item in results] == ['https://example.com/b', 'https://example.com/a']
+
+
+def test_search_content_supports_prefix_and_phrase_queries(temp_db):
+    temp_db.save_content(url='https://example.com/a', platform='blog', title='Sourdough bread for beginners')
+    temp_db.save_content(url='https://example.com/b', platform='blog', title='Bread machine review')
+
+    assert [item['url'] for item in temp_db.search_content('sourd')] == ['https://example.com/a']
+    assert [item['url'] for item in temp_db.search_content('"sourdough bread"')] == ['https://example.com/a']
+
+
+def test_search_content_matches_partial_words(temp_db):
+    temp_db.save_content(url='https://www.instagram.com/reel/abc/', platform='instagram', title='Sourdough shaping reel')
+    temp_db.save_content(url='https://example.com/b', platform='blog', title='Bread machine review')
+
+    assert temp_db.build_fts_query('sourdough in') == '"sourdough"* AND "in"*'
+    assert [item['platform'] for item in temp_db.search_content('insta')] == ['instagram']
+    assert [item['platform'] for item in temp_db.search_content('in')] == ['instagram']
+    assert [item['platform'] for item in temp_db.search_content('gram')] == ['instagram']  # LIKE fallback
+    assert temp_db.search_content('croissant') == []
+
+
+def test_search_index_tracks_updates_and_deletes(temp_db):
+    content_id = temp_db.save_content(url='https://example.com/a', platform='blog', title='Old title')
+    temp_db.update_content(content_id, title='Kubernetes networking deep dive')
+
+    assert temp_db.search_content('old') == []
+    assert len(temp_db.search_content('kubernetes')) == 1
+
+    temp_db.delete_content(content_id)
+    assert temp_db.search_content('kubernetes') == []
+
+
+def test_match_any_ignores_question_stopwords(temp_db):
+    temp_db.save_content(url='https://example.com/a', platform='blog', title='Python testing with pytest')
+
+    results = temp_db.search_content('what did I save about pytest?', match_any=True)
+
+    assert [item['url'] for item in results] == ['https://example.com/a']
+
+
+def test_rebuild_search_index_backfills_existing_rows(temp_db):
+    conn = temp_db.get_db_connection()
+    for trigger in ('insert', 'delete', 'update'):
+        conn.execute(f'DROP TRIGGER saved_content_fts_{trigger}')
+    conn.execute('DROP TABLE saved_content_fts')
+    conn.execute("INSERT INTO saved_content (url, platform, title) VALUES ('https://example.com/a', 'blog', 'Rust ownership')")
+    conn.commit()
+    conn.close()
+
+    temp_db.init_search_index()
+
+    assert len(temp_db.search_content('ownership')) == 1
+    assert temp_db.rebuild_search_index() == 1
+
+
+def test_cursor_pagination_walks_all_rows_in_order(temp_db):
+    conn = temp_db.get_db_connection()
+    for index in range(7):
+        # Several rows share a timestamp so the id tie-breaker matters
+        conn.execute(
+            'INSERT INTO saved_content (url, platform, timestamp) VALUES (?, ?, ?)',
+            (f'https://example.com/{index}', 'blog', f'2024-01-0{1 + index // 3} 10:00:00')
+        )
+    conn.commit()
+    conn.close()
+
+    seen = []
+    cursor = None
+    while True:
+        page = temp_db.get_all_content(limit=3, cursor=cursor)
+        seen.extend(item['id'] for item in page)
+        cursor = temp_db.next_page_cursor(page, 3)
+        if not cursor:
+            break
+
+    assert seen == [item['id'] for item in temp_db.get_all_content(limit=100)]
+    assert len(seen) == 7
+
+
+def test_get_all_content_rejects_malformed_cursor(temp_db):
+    with pytest.raises(ValueError):
+        temp_db.get_all_content(cursor='not-a-cursor')
+
+
+def test_stats_counters_follow_inserts_updates_and_deletes(temp_db):
+    first = temp_db.save_content(url='https://example.com/a', platform='youtube', category='Cricket', user_phone='+1')
+    temp_db.save_content(url='https://example.com/b', platform='blog', category='Cricket', user_phone='+2')
+    temp_db.save_content(url='https://example.com/c', platform='blog', user_phone='+2')
+
+    stats = temp_db.get_stats()
+    assert stats['total'] == 3
+    assert stats['by_platform'] == {'youtube': 1, 'blog': 2}
+    assert stats['by_category'] == {'Cricket': 2}
+    assert stats['unique_users'] == 2
+    assert stats['recent_7_days'] == 3
+    assert stats['current_streak'] == 1
+
+    temp_db.update_content(first, category='Tennis & Racket Sports')
+    temp_db.delete_content(first)
+
+    stats = temp_db.get_stats()
+    assert stats['total'] == 2
+    assert stats['by_platform'] == {'blog': 2}
+    assert stats['by_category'] == {'Cricket': 1}
+    assert stats['unique_users'] == 1
+    assert temp_db.get_categories() == ['Cricket']
+    assert temp_db.get_platforms() == ['blog']
+
+
+def test_streak_stats_read_per_user_days(temp_db):
+    conn = temp_db.get_db_connection()
+    for phone, day in (('+1', '-0 days'), ('+1', '-1 days'), ('+1', '-3 days'), ('+2', '-2 days')):
+        conn.execute(
+            "INSERT INTO saved_content (url, platform, user_phone, timestamp) "
+            "VALUES ('https://example.com', 'blog', ?, DATETIME('now', 'localtime', ?))",
+            (phone, day)
+        )
+    conn.commit()
+    conn.close()
+
+    streak = temp_db.get_streak_stats('+1')
+
+    assert streak['current_streak'] == 2
+    assert streak['best_streak'] == 2
+    assert temp_db.get_streak_stats('+3')['current_streak'] == 0
+
+
+def test_rebuild_stats_matches_trigger_maintained_counts(temp_db):
+    temp_db.save_content(url='https://example.com/a', platform='reddit', category='World News', user_phone='+1')
+    temp_db.save_content(url='https://example.com/b', platform='reddit', user_phone='+1')
+    before = temp_db.get_stats()
+
+    temp_db.rebuild_stats()
+
+    assert temp_db.get_stats() == before
+    assert temp_db.get_daily_save_counts(7) == {temp_db.get_all_content()[0]['timestamp'][:10]: 2}
+
+
+def test_check_duplicate_matches_canonical_variants(temp_db):
+    content_id = temp_db.save_content(url='https://youtu.be/dQw4w9WgXcQ?si=share', platform='youtube')
+    reel_id = temp_db.save_content(url='https://www.instagram.com/reel/C9abc/?igshid=xyz', platform='instagram')
+
+    assert temp_db.check_duplicate('https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=10')['id'] == content_id
+    assert temp_db.check_duplicate('https://instagram.com/reel/C9abc?utm_source=ig_web')['id'] == reel_id
+    assert temp_db.check_duplicate('https://www.instagram.com/reel/C9other/') is None
+
+    # A racing second save of the same content returns the original row
+    assert temp_db.save_content(url='https://m.youtube.com/shorts/dQw4w9WgXcQ', platform='youtube') == content_id
+
+
+def test_canonical_url_backfill_keeps_oldest_duplicate(temp_db):
+    conn = temp_db.get_db_connection()
+    conn.execute('DROP INDEX idx_canonical_url')
+    conn.executemany(
+        'INSERT INTO saved_content (url, platform) VALUES (?, ?)',
+        [('https://x.com/jack/status/20', 'twitter'), ('https://twitter.com/jack/status/20?s=20', 'twitter')]
+    )
+    conn.commit()
+    conn.close()
+
+    temp_db.init_canonical_urls()
+
+    conn = temp_db.get_db_connection()
+    rows = conn.execute('SELECT id, url, canonical_url FROM saved_content ORDER BY id').fetchall()
+    conn.close()
+    original_id, duplicate_id = rows[0]['id'], rows[1]['id']
+    assert [tuple(row)[1:] for row in rows] == [
+        ('https://x.com/jack/status/20', 'https://x.com/i/status/20'),
+        ('https://twitter.com/jack/status/20?s=20', f'duplicate-of:{original_id}:{duplicate_id}'),
+    ]
+    assert temp_db.check_duplicate('https://twitter.com/jack/status/20')['url'] == 'https://x.com/jack/status/20'
+
+    # Marked duplicates are not rescanned on the next startup
+    conn = temp_db.get_db_connection()
+    assert conn.execute('SELECT COUNT(*) FROM saved_content WHERE canonical_url IS NULL').fetchone()[0] == 0
+    conn.close()
+
+
+def test_category_source_migration_marks_existing_categories_as_ai(temp_db):
+    categorized = temp_db.save_content(url='https://example.com/a', platform='blog', category='Education')
+    other = temp_db.save_content(url='https://example.com/b', platform='blog', category='Other')
+    conn = temp_db.get_db_connection()
+    conn.execute('ALTER TABLE saved_content DROP COLUMN category_source')
+    conn.commit()
+    conn.close()
+
+    temp_db.init_db()
+
+    assert temp_db.get_content_by_id(categorized)['category_source'] == 'ai'
+    assert temp_db.get_content_by_id(other)['category_source'] is None
+
+
+def test_save_content_reraises_non_duplicate_integrity_errors(temp_db):
+    with pytest.raises(sqlite3.IntegrityError):
+        temp_db.save_content(url='https://example.com/no-platform', platform=None)
+
+
+def test_iter_content_rows_streams_all_rows_in_chunks(temp_db):
+    conn = temp_db.get_db_connection()
+    conn.executemany(
+        'INSERT INTO saved_content (url, canonical_url, platform, category, timestamp) VALUES (?, ?, ?, ?, ?)',
+        [
+            (f'https://example.com/{index}', f'https://example.com/{index}',
+             'youtube' if index % 2 else 'blog', 'Cricket', f'2025-01-{index % 28 + 1:02d} 10:00:00')
+            for index in range(1205)
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+    rows = list(temp_db.iter_content_rows(chunk_size=100))
+    assert len(rows) == 1205
+    assert len({row['id'] for row in rows}) == 1205
+    assert [(row['timestamp'], row['id']) for row in rows] == sorted(
+        ((row['timestamp'], row['id']) for row in rows), reverse=True
+    )
+
+    filtered = list(temp_db.iter_content_rows(platform='youtube', date_from='2025-01-02', date_to='2025-01-03', chunk_size=7))
+    assert filtered
+    assert all(row['platform'] == 'youtube' and row['timestamp'][:10] in ('2025-01-02', '2025-01-03') for row in filtered)
+
+
+def test_processed_message_sids_are_claimed_once_and_expire(temp_db):
+    assert temp_db.claim_message_sid('SM1')
+    assert not temp_db.claim_message_sid('SM1')
+
+    assert temp_db.purge_processed_messages(3600) == 0
+    conn = temp_db.get_db_connection()
+    conn.execute("UPDATE processed_messages SET processed_at = DATETIME('now', '-2 hours')")
+    conn.commit()
+    conn.close()
+    assert temp_db.purge_processed_messages(3600) == 1
+    assert temp_db.claim_message_sid('SM1')
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+import html_meta
+from html_meta import available_backends, parse_meta
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'html')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as handle:
+        return handle.read()
+
+
+@pytest.mark.parametrize('backend', available_backends())
+@pytest.mark.parametrize('fixture', sorted(os.listdir(FIXTURES)))
+def test_backends_agree_with_beautifulsoup(backend, fixture):
+    content = load_fixture(fixture)
+    soup = BeautifulSoup(content, 'html.parser')
+
+    page = parse_meta(content, backend=backend)
+
+    assert page['title'] == soup.find('title').get_text(strip=True)
+    for key in ('og:title', 'og:description', 'og:image'):
+        tag = soup.find('meta', property=key)
+        assert page['meta'].get(key) == (tag['content'] if tag else None)
+
+
+def test_parse_meta_reads_names_and_keeps_first_occurrence():
+    page = parse_meta(
+        '<head><title> Post </title>'
+        '<meta name="Description" content="first">'
+        '<meta name="description" content="second">'
+        '<meta name="author" content="Jamie">'
+        '<meta property="og:video:url" content="https://cdn.example.com/v.mp4"/></head>',
+        backend='stdlib'
+    )
+
+    assert page['title'] == 'Post'
+    assert page['meta'] == {
+        'description': 'first',
+        'author': 'Jamie',
+        'og:video:url': 'https://cdn.example.com/v.mp4',
+    }
+
+
+def test_failing_backend_falls_back_to_stdlib(monkeypatch):
+    def broken(content):
+        raise ValueError('boom')
+
+    monkeypatch.setitem(html_meta.BACKENDS, 'lxml', broken)
+
+    page = parse_meta('<title>Still parsed</title>', backend='lxml')
+
+    assert page['title'] == 'Still parsed'
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_non_utf8_pages_are_decoded_with_their_charset(backend):
+    declared = '<head><meta charset="windows-1251"><title>Рецепт борща</title></head>'.encode('cp1251')
+    from_header = '<head><title>ラーメンの作り方</title></head>'.encode('shift_jis')
+    undeclared = '<head><title>Café crème</title></head>'.encode('latin-1')
+
+    assert parse_meta(declared, backend=backend)['title'] == 'Рецепт борща'
+    assert parse_meta(from_header, backend=backend, encoding='shift_jis')['title'] == 'ラーメンの作り方'
+    assert parse_meta(undeclared, backend=backend)['title'] == 'Café crème'
+
+
+def test_response_charset_beats_meta_charset_and_bogus_names_are_ignored():
+    page = '<head><meta charset="utf-8"><title>Grüße</title></head>'.encode('latin-1')
+
+    assert parse_meta(page, backend='stdlib', encoding='iso-8859-1')['title'] == 'Grüße'
+    assert parse_meta(page, backend='stdlib', encoding='not-a-charset')['title'] == 'Gr��e'
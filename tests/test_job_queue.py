@@ -0,0 +1,70 @@
+from job_queue import JobQueue
+
+
+def make_queue(monkeypatch):
+    monkeypatch.setattr('job_queue.Config.JOB_RETRY_BACKOFF_SECONDS', 0)
+    return JobQueue(workers=2, poll_interval=0.05)
+
+
+def test_enqueued_job_runs_and_stores_result(temp_db, monkeypatch):
+    queue = make_queue(monkeypatch)
+    queue.register('double', lambda payload, job: {'value': payload['value'] * 2})
+
+    job_id = queue.enqueue('double', {'value': 21})
+    job = queue.wait(job_id, timeout=5)
+    queue.stop()
+
+    assert job['status'] == 'done'
+    assert job['result'] == {'value': 42}
+    assert job['attempts'] == 1
+
+
+def test_failing_job_is_retried_then_dead_lettered(temp_db, monkeypatch):
+    queue = make_queue(monkeypatch)
+    calls = []
+
+    def flaky(payload, job):
+        calls.append(job['attempts'])
+        raise RuntimeError('upstream down')
+
+    queue.register('flaky', flaky)
+    job_id = temp_db.enqueue_job('flaky', {}, max_attempts=3)
+
+    while queue.run_next():
+        pass
+
+    job = temp_db.get_job(job_id)
+    assert calls == [1, 2, 3]
+    assert job['status'] == 'dead'
+    assert 'upstream down' in job['last_error']
+
+
+def test_retry_succeeds_on_later_attempt(temp_db, monkeypatch):
+    queue = make_queue(monkeypatch)
+
+    def eventually(payload, job):
+        if job['attempts'] < 2:
+            raise RuntimeError('transient')
+        return {'ok': True}
+
+    queue.register('eventually', eventually)
+    job_id = temp_db.enqueue_job('eventually', {}, max_attempts=3)
+
+    while queue.run_next():
+        pass
+
+    assert temp_db.get_job(job_id)['status'] == 'done'
+
+
+def test_start_recovers_jobs_left_running(temp_db, monkeypatch):
+    queue = make_queue(monkeypatch)
+    queue.register('noop', lambda payload, job: {'recovered': True})
+    job_id = temp_db.enqueue_job('noop', {})
+    assert temp_db.claim_next_job()['id'] == job_id  # simulate a crash mid-job
+
+    queue.start()
+    job = queue.wait(job_id, timeout=5)
+    queue.stop()
+
+    assert job['status'] == 'done'
+    assert job['result'] == {'recovered': True}
@@ -0,0 +1,41 @@
+import io
+import json
+
+import library_io
+
+
+def test_ndjson_round_trip_skips_existing_canonical_urls(temp_db):
+    temp_db.save_content(url='https://example.com/a', platform='blog', title='Bread', category='Recipes & Cooking', tags='food,baking')
+    temp_db.save_content(url='https://youtu.be/abc123', platform='youtube', title='Cricket', category='Cricket')
+    temp_db.assign_collection(1, 'Kitchen')
+
+    lines = list(library_io.iter_ndjson({'platform': None, 'category': None, 'collection': None,
+                                         'user_phone': None, 'date_from': None, 'date_to': None}))
+    records = [json.loads(line) for line in lines]
+    assert [r['title'] for r in records] == ['Cricket', 'Bread']
+    assert records[1]['collection'] == 'Kitchen'
+
+    # Re-importing into the same library only skips
+    assert library_io.import_ndjson(io.StringIO(''.join(lines))) == {'created': 0, 'skipped': 2, 'invalid': 0}
+
+    temp_db.delete_content(1)
+    payload = ''.join(lines) + '\n{"url": "not a url"}\nnot json\n'
+    counts = library_io.import_ndjson(io.BytesIO(payload.encode('utf-8')))
+
+    assert counts == {'created': 1, 'skipped': 1, 'invalid': 2}
+    restored = temp_db.check_duplicate('https://example.com/a')
+    assert restored['title'] == 'Bread'
+    assert restored['tags'] == 'food,baking'
+    assert restored['timestamp'] == records[1]['timestamp']
+    assert 'Kitchen' in temp_db.get_collections()
+
+
+def test_import_assigns_user_phone_and_detects_platform(temp_db):
+    counts = library_io.import_ndjson(['{"url": "https://www.instagram.com/reel/xyz/", "title": "Reel"}'],
+                                      user_phone='whatsapp:+911234567890')
+
+    assert counts['created'] == 1
+    saved = temp_db.check_duplicate('https://www.instagram.com/reel/xyz/')
+    assert saved['platform'] == 'instagram'
+    assert saved['user_phone'] == 'whatsapp:+911234567890'
+    assert saved['timestamp']
@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+from twilio.base.exceptions import TwilioRestException
+
+import messaging
+
+
+class FakeMessages:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def configure(monkeypatch, outcomes):
+    monkeypatch.setattr(messaging.Config, 'TWILIO_ACCOUNT_SID', 'AC123')
+    monkeypatch.setattr(messaging.Config, 'TWILIO_AUTH_TOKEN', 'token')
+    monkeypatch.setattr(messaging.Config, 'TWILIO_PHONE_NUMBER', '+14155238886')
+    monkeypatch.setattr(messaging.Config, 'FLASK_BASE_URL', 'https://saver.example.com/')
+    monkeypatch.setattr(messaging, 'outbound_queue', messaging.JobQueue(workers=1, poll_interval=0.05, retry_backoff=0))
+    messaging.outbound_queue.register('send_whatsapp', messaging.run_send_message_job)
+    monkeypatch.setattr(messaging.outbound_queue, 'start', lambda: None)
+    monkeypatch.setattr(messaging, 'send_bucket', messaging.TokenBucket(rate=1000, capacity=10))
+    fake = FakeMessages(outcomes)
+    monkeypatch.setattr(messaging, 'get_client', lambda: SimpleNamespace(messages=fake))
+    return fake
+
+
+def test_queued_message_is_sent_and_tracked(temp_db, monkeypatch):
+    fake = configure(monkeypatch, [SimpleNamespace(sid='SM1', status='queued')])
+
+    message_id = messaging.queue_message('+911234567890', 'Saved!')
+    while messaging.outbound_queue.run_next():
+        pass
+
+    assert fake.calls[0]['to'] == 'whatsapp:+911234567890'
+    assert fake.calls[0]['status_callback'] == 'https://saver.example.com/whatsapp/status'
+    message = temp_db.get_outbound_message(message_id)
+    assert (message['status'], message['sid'], message['attempts']) == ('queued', 'SM1', 1)
+
+    assert messaging.record_delivery_status('SM1', 'delivered')
+    assert messaging.record_delivery_status('SM1', 'sent')  # late, out-of-order callback
+    assert temp_db.get_outbound_message(message_id)['status'] == 'delivered'
+    assert not messaging.record_delivery_status('SMunknown', 'delivered')
+
+
+def test_rate_limited_send_is_retried(temp_db, monkeypatch):
+    fake = configure(monkeypatch, [
+        TwilioRestException(429, '/Messages', 'Too Many Requests'),
+        TwilioRestException(503, '/Messages', 'Service Unavailable'),
+        SimpleNamespace(sid='SM2', status='accepted'),
+    ])
+
+    message_id = messaging.queue_message('whatsapp:+911234567890', 'Digest')
+    while messaging.outbound_queue.run_next():
+        pass
+
+    assert len(fake.calls) == 3
+    message = temp_db.get_outbound_message(message_id)
+    assert (message['status'], message['sid'], message['attempts']) == ('accepted', 'SM2', 3)
+
+
+def test_permanent_error_fails_without_retry(temp_db, monkeypatch):
+    fake = configure(monkeypatch, [TwilioRestException(400, '/Messages', 'Invalid To number', code=21211)])
+
+    message_id = messaging.queue_message('+000', 'Hello')
+    while messaging.outbound_queue.run_next():
+        pass
+
+    assert len(fake.calls) == 1
+    message = temp_db.get_outbound_message(message_id)
+    assert message['status'] == 'failed'
+    assert 'Invalid To number' in message['error']
+
+
+def test_queue_message_skips_when_twilio_unconfigured(temp_db, monkeypatch):
+    monkeypatch.setattr(messaging.Config, 'TWILIO_ACCOUNT_SID', '')
+    assert messaging.queue_message('+911234567890', 'Hello') is None
+
+
+@pytest.mark.parametrize('status, retryable', [(429, True), (500, True), (400, False), (404, False)])
+def test_is_retryable(status, retryable):
+    assert messaging.is_retryable(TwilioRestException(status, '/Messages')) is retryable
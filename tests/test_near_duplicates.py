@@ -0,0 +1,104 @@
+import near_duplicates
+
+BREAD = ('How to make perfect sourdough bread at home', 'Full recipe with starter, timings and oven temperature')
+
+
+def save(db, url, title, caption=''):
+    return db.save_content(url=url, platform='blog', title=title, caption=caption, summary='s')
+
+
+def shingles(title, caption=''):
+    return near_duplicates.shingles(near_duplicates.normalize_text(title, caption))
+
+
+def test_similarity_ignores_case_punctuation_urls_and_stopwords():
+    reposted = shingles('How to make PERFECT sourdough bread at home!!',
+                        'Full recipe with starter, timings & oven temperature 🍞 https://t.co/x')
+    different = shingles('How to make perfect pizza dough at home')
+
+    assert near_duplicates.jaccard(shingles(*BREAD), reposted) == 1.0
+    assert near_duplicates.jaccard(shingles(BREAD[0]), different) < 0.6
+
+
+def test_minhash_bands_agree_for_identical_text():
+    signature = near_duplicates.minhash(shingles(*BREAD))
+
+    assert len(signature) == near_duplicates.BANDS * near_duplicates.ROWS_PER_BAND
+    assert near_duplicates.band_buckets(signature) == near_duplicates.band_buckets(near_duplicates.minhash(shingles(*BREAD)))
+    assert all(-(1 << 63) <= bucket < (1 << 63) for bucket in near_duplicates.band_buckets(signature))
+
+
+def test_find_near_duplicate_uses_band_index(temp_db):
+    original = save(temp_db, 'https://example.com/a', *BREAD)
+    save(temp_db, 'https://example.com/b', 'India vs Australia final over highlights', 'Last ball six wins the test series')
+    save(temp_db, 'https://example.com/c', 'Short')
+
+    match = near_duplicates.find_near_duplicate(
+        'https://mirror.example.org/a', 'How to make perfect sourdough bread at home!',
+        'Full recipe with starter, timings & oven temperature #baking'
+    )
+    assert match['id'] == original
+    assert match['similarity'] >= 0.8
+    assert not match['borderline']
+
+    assert near_duplicates.find_near_duplicate('https://x.example/', 'Async Python tips for web scraping', 'asyncio queues') is None
+    assert near_duplicates.find_near_duplicate('https://x.example/', 'Short', '') is None
+
+
+def test_only_the_closest_borderline_candidate_goes_to_confirm(temp_db, monkeypatch):
+    original = save(temp_db, 'https://example.com/a', *BREAD)
+    monkeypatch.setattr(near_duplicates.Config, 'NEAR_DUPLICATE_MIN_SIMILARITY', 1.01)
+    asked = []
+
+    def confirm(existing):
+        asked.append(existing['id'])
+        return True
+
+    match = near_duplicates.find_near_duplicate('https://b.example/', *BREAD, confirm=confirm)
+
+    assert match['id'] == original
+    assert match['borderline']
+    assert asked == [original]
+    assert near_duplicates.find_near_duplicate('https://b.example/', *BREAD) is None
+
+
+def test_candidates_come_only_from_the_saving_users_library(temp_db):
+    original = temp_db.save_content(url='https://example.com/a', platform='blog', title=BREAD[0], caption=BREAD[1],
+                                    user_phone='whatsapp:+91111')
+
+    assert near_duplicates.find_near_duplicate('https://b.example/', *BREAD, user_phone='whatsapp:+91111')['id'] == original
+    assert near_duplicates.find_near_duplicate('https://b.example/', *BREAD, user_phone='whatsapp:+91222') is None
+    assert near_duplicates.find_near_duplicate('https://b.example/', *BREAD) is None
+
+
+def test_borderline_matches_are_flagged_in_tags():
+    assert near_duplicates.flag_possible_duplicate('baking, bread', {'id': 7, 'borderline': True}) == 'baking, bread, duplicate-of:7'
+    assert near_duplicates.flag_possible_duplicate('', {'id': 7, 'borderline': True}) == 'duplicate-of:7'
+    assert near_duplicates.flag_possible_duplicate('baking', {'id': 7, 'borderline': False}) == 'baking'
+    assert near_duplicates.flag_possible_duplicate('baking', None) == 'baking'
+
+
+def test_failed_confirmation_is_logged_with_its_type(temp_db, monkeypatch, capsys):
+    save(temp_db, 'https://example.com/a', *BREAD)
+    monkeypatch.setattr(near_duplicates.Config, 'NEAR_DUPLICATE_MIN_SIMILARITY', 1.01)
+
+    def confirm(existing):
+        raise TimeoutError('LLM took too long')
+
+    assert near_duplicates.find_near_duplicate('https://b.example/', *BREAD, confirm=confirm) is None
+    assert 'TimeoutError: LLM took too long' in capsys.readouterr().out
+
+
+def test_index_follows_edits_and_backfills_bulk_rows(temp_db):
+    content_id = save(temp_db, 'https://example.com/a', *BREAD)
+    temp_db.update_content(content_id, title='Ten minute chickpea curry with coconut milk', caption='')
+
+    assert near_duplicates.find_similar(*BREAD) == []
+    assert near_duplicates.find_similar('Ten minute chickpea curry with coconut milk', '')[0]['id'] == content_id
+
+    [(bulk_id, _)] = temp_db.save_contents_many([{
+        'url': 'https://example.com/bulk', 'platform': 'blog', 'title': 'Beginner guide to growing tomatoes on a balcony'
+    }])
+    assert near_duplicates.find_similar('Beginner guide to growing tomatoes on a balcony', '') == []  # no inline backfill
+    assert near_duplicates.backfill() == 1
+    assert near_duplicates.find_similar('Beginner guide to growing tomatoes on a balcony', '')[0]['id'] == bulk_id
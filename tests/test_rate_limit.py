@@ -0,0 +1,82 @@
+import time
+
+from rate_limit import CircuitBreaker, ProviderLimiter, TokenBucket, parse_retry_after
+
+
+def test_token_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=20, capacity=2)
+
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() > 0
+
+    start = time.monotonic()
+    assert bucket.acquire()
+    assert time.monotonic() - start >= 0.03
+
+
+def test_token_bucket_acquire_times_out():
+    bucket = TokenBucket(rate=0.5, capacity=1)
+    bucket.acquire()
+
+    assert bucket.acquire(timeout=0.05) is False
+
+
+def test_parse_retry_after_accepts_seconds_and_dates():
+    assert parse_retry_after('7') == 7.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+def test_circuit_breaker_opens_then_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial call at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_provider_limiter_reserves_and_refunds_tokens():
+    limiter = ProviderLimiter('test', requests_per_minute=600, tokens_per_minute=1000)
+
+    assert limiter.acquire(800, timeout=0) == 800
+    assert limiter.acquire(800, timeout=0) == -1
+    limiter.settle(800, 100)
+    assert limiter.acquire(800, timeout=0) == 800
+
+    stats = limiter.stats()
+    assert stats['calls'] == 2
+    assert stats['throttled'] == 1
+    assert stats['circuit'] == 'closed'
+
+
+def test_provider_limiter_refunds_request_token_when_trial_is_in_flight():
+    limiter = ProviderLimiter('test', requests_per_minute=2, tokens_per_minute=1000,
+                              failure_threshold=1, reset_timeout=0)
+    limiter.breaker.record_failure()
+
+    assert limiter.acquire(100, timeout=0) == 100  # the half-open trial call
+    assert limiter.acquire(100, timeout=0) == -1
+    limiter.breaker.record_success()
+    assert limiter.acquire(100, timeout=0) == 100  # its request token was given back
+    assert limiter.tokens.try_acquire(800) == 0
+
+
+def test_provider_limiter_honors_pause_and_open_circuit():
+    limiter = ProviderLimiter('test', failure_threshold=1, reset_timeout=60)
+    limiter.pause(5)
+    assert limiter.acquire(timeout=0.01) == -1
+
+    limiter = ProviderLimiter('test', failure_threshold=1, reset_timeout=60)
+    limiter.breaker.record_failure()
+    assert limiter.acquire(timeout=1) == -1
+    assert limiter.stats()['short_circuited'] == 1
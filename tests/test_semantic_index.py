@@ -0,0 +1,93 @@
+import pytest
+
+import semantic_index
+from semantic_index import HashingEmbedder, SemanticIndex
+
+
+def seed(db):
+    bread = db.save_content(url='https://example.com/bread', platform='blog', title='Sourdough bread at home',
+                            summary='Step by step starter feeding, kneading and baking a crusty loaf', tags='baking,recipes')
+    cricket = db.save_content(url='https://example.com/cricket', platform='youtube', title='India vs Australia highlights',
+                              summary='Final over drama in the test match', tags='cricket,sports')
+    python = db.save_content(url='https://example.com/python', platform='blog', title='Async Python tips',
+                             summary='Using asyncio tasks and queues for concurrent web scraping', tags='python,programming')
+    return bread, cricket, python
+
+
+def test_search_ranks_by_meaning_and_stores_float32_blobs(temp_db):
+    bread, cricket, python = seed(temp_db)
+    index = SemanticIndex(HashingEmbedder(256), ann_threshold=10_000)
+
+    assert index.sync() == 3
+    results = index.search('how do I bake a loaf of bread?', limit=2)
+    assert [item['id'] for item in results] == [bread]
+    assert results[0]['semantic_score'] > 0
+
+    assert index.search('concurrent scraping with python', limit=1)[0]['id'] == python
+    assert index.search('zebra quantum', limit=3) == []
+
+    blobs = dict(temp_db.get_embeddings('hashing-256'))
+    assert set(blobs) == {bread, cricket, python}
+    assert len(blobs[bread]) == 256 * 4
+
+
+def test_index_follows_edits_and_deletes(temp_db):
+    bread, cricket, python = seed(temp_db)
+    index = SemanticIndex(HashingEmbedder(256), ann_threshold=10_000)
+    index.sync()
+
+    temp_db.update_content(cricket, summary='Knitting a wool scarf for winter', tags='crafts')
+    assert temp_db.get_content_missing_embeddings('hashing-256') != []  # trigger dropped the stale vector
+    assert index.sync() == 1
+    assert index.search('knitting wool scarf', limit=1)[0]['id'] == cricket
+
+    temp_db.delete_content(bread)
+    assert index.search('sourdough bread baking', limit=3) == []
+    assert len(index) == 2
+
+
+def test_approximate_search_agrees_with_exact(temp_db):
+    seed(temp_db)
+    exact = SemanticIndex(HashingEmbedder(256), ann_threshold=10_000)
+    approximate = SemanticIndex(HashingEmbedder(256), ann_threshold=1)
+    exact.sync()
+    approximate.sync()
+
+    for question in ('baking bread', 'cricket test match', 'asyncio queues'):
+        assert [r['id'] for r in approximate.search(question, limit=1)] == [r['id'] for r in exact.search(question, limit=1)]
+
+
+def test_search_only_uses_vectors_already_indexed(temp_db):
+    bread, cricket, python = seed(temp_db)
+    index = SemanticIndex(HashingEmbedder(256), ann_threshold=10_000)
+
+    assert index.search('how do I bake a loaf of bread?') == []
+    assert len(temp_db.get_content_missing_embeddings('hashing-256')) == 3
+
+    assert index.sync() == 3
+    assert index.search('how do I bake a loaf of bread?', limit=1)[0]['id'] == bread
+
+
+def test_numpy_signatures_match_the_pure_python_path(temp_db, monkeypatch):
+    pytest.importorskip('numpy')
+    seed(temp_db)
+    index = SemanticIndex(HashingEmbedder(256), ann_threshold=1)
+    index.sync()
+    query = index._weighted_query('baking bread')
+
+    index._build_buckets()
+    with_numpy = [index._signatures(vector) for vector in index._vectors + [query]]
+    monkeypatch.setattr(semantic_index, 'np', None)
+    index._build_buckets()
+    without_numpy = [index._signatures(vector) for vector in index._vectors + [query]]
+
+    assert with_numpy == without_numpy
+
+
+def test_saving_content_embeds_it_through_the_content_hook(temp_db, monkeypatch):
+    index = SemanticIndex(HashingEmbedder(128))
+    monkeypatch.setattr(semantic_index, 'semantic_index', index)
+
+    content_id = temp_db.save_content(url='https://example.com/new', platform='blog', title='Fresh save')
+
+    assert content_id in dict(temp_db.get_embeddings('hashing-128'))
@@ -0,0 +1,46 @@
+"""
+yt-dlp runner for Social Saver Bot
+The part of yt-dlp extraction that runs inside pool worker processes. Spawned
+workers import this module, so it must not import config or database. They
+also re-import the parent's main script (app.py) as __mp_main__, which is
+why app.py keeps database setup and job workers out of import time.
+"""
+
+from typing import Dict
+
+try:
+    from yt_dlp import YoutubeDL
+except ImportError:
+    YoutubeDL = None
+
+INFO_FIELDS = ('title', 'description', 'thumbnail', 'uploader', 'channel', 'url', 'vcodec')
+FORMAT_FIELDS = ('url', 'vcodec', 'height', 'tbr')
+
+
+def available() -> bool:
+    return YoutubeDL is not None
+
+
+def run_ytdlp(url: str, options: Dict) -> Dict:
+    """
+    Run yt-dlp and return only the fields the extractor reads.
+
+    Trimming the info dict keeps the result cheap to send back across the
+    process boundary.
+    """
+    with YoutubeDL(options) as ydl:
+        info = ydl.extract_info(url, download=False)
+
+    if info and info.get('_type') == 'playlist':
+        entries = [entry for entry in (info.get('entries') or []) if entry]
+        info = entries[0] if entries else {}
+
+    if not info:
+        return {}
+
+    trimmed = {key: info.get(key) for key in INFO_FIELDS}
+    trimmed['formats'] = [
+        {key: fmt.get(key) for key in FORMAT_FIELDS}
+        for fmt in info.get('formats') or []
+    ]
+    return trimmed